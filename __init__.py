@@ -7,12 +7,71 @@ DATA_FILE_OUTPUT_PATH = '/Users/jakesmith/PycharmProjects/udemy_Python4BusinessA
 ROW_TYPE_DICT = 'dict'
 ROW_TYPE_LIST = 'list'
 ROW_TYPE_TUPLE = 'tuple'
+ROW_TYPE_COLUMNAR = 'columnar'
+
+JOIN_INNER = 'inner'
+JOIN_LEFT = 'left'
+JOIN_ANTI = 'anti'
+
+INDEX_TYPE_HASH = 'hash'
+INDEX_TYPE_SORTED = 'sorted'
+
+UNIQUE_MODE_EXACT = 'exact'
+UNIQUE_MODE_APPROXIMATE = 'approximate'
+UNIQUE_MODE_NONE = 'none'
+
+TIME_RESOLUTION_MINUTE = 'minute'
+TIME_RESOLUTION_HOUR = 'hour'
+TIME_RESOLUTION_DAY = 'day'
+
+QUARANTINE_MISSING_EVENTS = 'missingEvents'
+QUARANTINE_OUT_OF_ORDER = 'outOfOrder'
+QUARANTINE_LATE_EVENT = 'lateEvent'
+QUARANTINE_UNKNOWN_EVENT = 'unknownEvent'
 
 FILE_TYPE_CSV = 'csv'
 FILE_TYPE_XLS = 'xls'
 
 DEFAULT_NONE_STRINGS = ('null', 'na', 'n/a')
 
+# Max number of distinct values cached for each grouping function in FileImporter.getGroupData
+GROUPING_FUNCTION_CACHE_SIZE = 4096
+
+# Approximate number of bytes each worker process reads at a time when a CSV file is imported in parallel
+PARALLEL_CSV_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Max number of CSV chunks submitted to the process pool for each worker before their rows are read. Limits how many
+# converted chunks are held in memory when rows are read slower than they are converted.
+PARALLEL_CSV_CHUNKS_PER_WORKER = 2
+
+# Number of bytes at the end of the imported part of a file which ImportWatermark checks to tell an appended file from
+# a replaced one
+WATERMARK_CHECK_SIZE = 4096
+
+# Max number of threads used to read the files of a multi-file import when workers isn't provided
+MAX_IMPORT_FILE_THREADS = 8
+
+# Max number of distinct unmatched keys kept in FileImporter.unmatchedJoinKeys by a join
+MAX_UNMATCHED_JOIN_KEYS = 1000
+
+# Number of values used to detect the format of a safeDateTimeParse column
+DATETIME_FORMAT_SAMPLE_SIZE = 20
+# Max number of parsed values cached for each safeDateTimeParse column
+DATETIME_PARSE_CACHE_SIZE = 1024
+
+# Max size of a FileImporter import cache directory before the least recently used entries are removed
+IMPORT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Number of hash bits used to pick a HyperLogLog register for approximate unique counts (2 ** n bytes per column)
+HYPERLOGLOG_PRECISION = 12
+# Number of most frequent values kept for each column with approximate unique tracking
+TOP_K_SIZE = 20
+
+# Number of marketing scenarios simulated by a worker process at a time
+COHORT_SIMULATION_CHUNK_SIZE = 10000
+# Percentiles of nominal ROI and ROI % reported for simulated marketing scenarios
+ROI_PERCENTILES = (5, 25, 50, 75, 95)
+
 
 def safeDateTimeParse(val):
     if isinstance(val, datetime):
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+
+import openpyxl
+
+from importer import *
+from importer.benchmarks.syntheticData import DATASETS, DEFAULT_SEED, writeSyntheticCsvFile, writeSyntheticExcelFile
+from importer.dateTimeParser import DateTimeParser
+from importer.fileImport import FileImporter
+from importer.groupStatistics import GroupStatistics, GroupedStatistics
+
+DEFAULT_SCALES = (10000, 100000, 1000000, 10000000)
+DEFAULT_REPEAT = 3
+# openpyxl reads and writes about 10-20k rows per second so larger XLSX benchmarks would take hours
+MAX_EXCEL_ROWS = 100000
+# dateutil parses about 20-50k values per second so safeDateTimeParse is only timed on smaller files
+MAX_DATEUTIL_PARSE_ROWS = 100000
+# A benchmark is a regression if it is this much slower than the baseline (0.2 = 20% slower)
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+ROW_TYPES = (ROW_TYPE_DICT, ROW_TYPE_LIST, ROW_TYPE_TUPLE, ROW_TYPE_COLUMNAR)
+
+STATUS_NEW = 'new'
+STATUS_FASTER = 'faster'
+STATUS_SLOWER = 'slower'
+STATUS_UNCHANGED = 'unchanged'
+
+
+def getBestTime(fn, repeat):
+    """ Call fn repeat times and get the fastest time. The fastest run has the least noise from other processes.
+    :return: tuple of (seconds, the return value of the last call)
+    """
+    bestSeconds = None
+    result = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        seconds = perf_counter() - start
+        if bestSeconds is None or seconds < bestSeconds:
+            bestSeconds = seconds
+    return bestSeconds, result
+
+
+def getResultKey(result):
+    """ Get the key used to match a result with the same benchmark in a baseline
+    Example: 'ingest|sunFoodCustomers|10000|fileType=csv,rowDataType=dict'
+    """
+    params = ','.join(f'{key}={val}' for key, val in sorted(result['params'].items()))
+    return f'{result["benchmark"]}|{result["dataset"]}|{result["rowCount"]}|{params}'
+
+
+def getSyntheticFilePath(workDir, datasetName, rowCount, seed, fileType):
+    """ Get the path of a generated data file. Files are reused by later runs with the same seed. """
+    extension = 'xlsx' if fileType == FILE_TYPE_XLS else fileType
+    return os.path.join(workDir, f'{datasetName}_{rowCount}_{seed}.{extension}')
+
+
+def getSyntheticFile(workDir, datasetName, rowCount, seed, fileType):
+    filePath = getSyntheticFilePath(workDir, datasetName, rowCount, seed, fileType)
+    if not os.path.exists(filePath):
+        writeFn = writeSyntheticExcelFile if fileType == FILE_TYPE_XLS else writeSyntheticCsvFile
+        writeFn(datasetName, filePath, rowCount, seed)
+    return filePath
+
+
+def getEnvironment():
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpuCount': os.cpu_count(),
+        'openpyxl': openpyxl.__version__
+    }
+
+
+class BenchmarkRunner:
+
+    def __init__(self, workDir, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED):
+        """Times FileImporter ingest, datetime parsing, grouping, statistics, and writes against seeded synthetic data
+
+        :param str workDir: Directory for generated data files and written output files
+        :param int repeat: Each benchmark is run this many times and the fastest time is kept
+        :param int seed: Seed used to generate the data files. Results are only comparable with the same seed.
+        """
+        self.workDir = workDir
+        self.repeat = repeat
+        self.seed = seed
+        self.results = []
+
+    def addResult(self, benchmark, datasetName, rowCount, seconds, **params):
+        result = {
+            'benchmark': benchmark,
+            'dataset': datasetName,
+            'rowCount': rowCount,
+            'params': params,
+            'seconds': seconds,
+            'rowsPerSecond': rowCount / seconds if seconds else None
+        }
+        self.results.append(result)
+        print(f'{getResultKey(result)}: {seconds:.4f}s')
+
+    def timeBenchmark(self, benchmark, datasetName, rowCount, fn, **params):
+        seconds, result = getBestTime(fn, self.repeat)
+        self.addResult(benchmark, datasetName, rowCount, seconds, **params)
+        return result
+
+    def runDataset(self, datasetName, rowCount):
+        """ Run every benchmark for one dataset at one scale """
+        dataset = DATASETS[datasetName]
+        fileTypes = [FILE_TYPE_CSV] + ([FILE_TYPE_XLS] if rowCount <= MAX_EXCEL_ROWS else [])
+
+        fileImporter = None
+        for fileType in fileTypes:
+            filePath = getSyntheticFile(self.workDir, datasetName, rowCount, self.seed, fileType)
+            for rowDataType in ROW_TYPES:
+                importer = self.timeBenchmark(
+                    'ingest', datasetName, rowCount,
+                    lambda: FileImporter(filePath, dataset['defaultHeaders'], dataset['defaultDataTypes'],
+                                         rowDataType=rowDataType),
+                    fileType=fileType, rowDataType=rowDataType
+                )
+                if fileType == FILE_TYPE_CSV and rowDataType == ROW_TYPE_DICT:
+                    fileImporter = importer
+                else:
+                    importer.closeFile()
+
+        self.runDateTimeParse(datasetName, rowCount)
+
+        data = fileImporter.data
+        groupings = dataset['groupings']
+        for groupingCount in range(1, len(groupings) + 1):
+            self.timeBenchmark(
+                'getGroupData', datasetName, rowCount,
+                lambda: fileImporter.getGroupData(groupings[:groupingCount]),
+                groupingCount=groupingCount
+            )
+
+        grouping = groupings[0]
+        statistics = {columnKey: GroupStatistics.ALL_STATISTICS for columnKey in dataset['statisticColumns']}
+        self.timeBenchmark(
+            'GroupedStatistics', datasetName, rowCount,
+            lambda: GroupedStatistics(data, grouping, statistics=statistics),
+            grouping='+'.join(grouping)
+        )
+        groupData = fileImporter.getGroupData([grouping], isFlat=True)[0]
+        self.timeBenchmark(
+            'GroupStatistics', datasetName, rowCount,
+            lambda: [GroupStatistics(records, statistics=statistics) for records in groupData.values()],
+            grouping='+'.join(grouping)
+        )
+
+        outputPath = os.path.join(self.workDir, '')
+        self.timeBenchmark(
+            'writeCsvFile', datasetName, rowCount,
+            lambda: fileImporter.writeCsvFile(f'{datasetName}_{rowCount}', outputPath=outputPath)
+        )
+        if rowCount <= MAX_EXCEL_ROWS:
+            sheetsConfig = [{'title': datasetName, 'data': data, 'headers': fileImporter.headers}]
+            self.timeBenchmark(
+                'writeExcelFile', datasetName, rowCount,
+                lambda: fileImporter.writeExcelFile(f'{datasetName}_{rowCount}', sheetsConfig, outputPath=outputPath)
+            )
+        fileImporter.closeFile()
+
+    def runDateTimeParse(self, datasetName, rowCount):
+        """ Time parsing the raw values of every safeDateTimeParse column with safeDateTimeParse and with a
+        DateTimeParser for each column (the parser used by FileImporter)
+        """
+        dataset = DATASETS[datasetName]
+        dateTimeHeaders = [
+            header for header, dataType in dataset['defaultDataTypes'].items() if dataType is safeDateTimeParse
+        ]
+        if not dateTimeHeaders:
+            return
+
+        # Without data types the columns are imported as the raw strings from the file
+        filePath = getSyntheticFile(self.workDir, datasetName, rowCount, self.seed, FILE_TYPE_CSV)
+        rawImporter = FileImporter(filePath, dataset['defaultHeaders'], rowDataType=ROW_TYPE_LIST,
+                                   columns=dateTimeHeaders)
+        columnValues = [[val for val in values if val is not None] for values in zip(*rawImporter.data)]
+
+        def parseColumns(getParser):
+            for values in columnValues:
+                parser = getParser()
+                for val in values:
+                    parser(val)
+
+        if rowCount <= MAX_DATEUTIL_PARSE_ROWS:
+            self.timeBenchmark(
+                'parseDateTime', datasetName, rowCount, lambda: parseColumns(lambda: safeDateTimeParse),
+                parser='safeDateTimeParse'
+            )
+        # A new parser for each run so the format is detected and the cache is filled every time
+        self.timeBenchmark(
+            'parseDateTime', datasetName, rowCount, lambda: parseColumns(DateTimeParser), parser='DateTimeParser'
+        )
+
+    def run(self, scales=DEFAULT_SCALES, datasetNames=None):
+        """ Run every benchmark for each dataset at each scale
+        :param iterable scales: Row counts of the generated data files
+        :param list datasetNames: Keys of DATASETS. Defaults to every dataset.
+        :return: dict with the environment, settings, and a list of results
+        """
+        for rowCount in scales:
+            for datasetName in datasetNames or DATASETS:
+                self.runDataset(datasetName, rowCount)
+        return {
+            'createdAt': datetime.now().isoformat(),
+            'environment': getEnvironment(),
+            'seed': self.seed,
+            'repeat': self.repeat,
+            'results': self.results
+        }
+
+
+def compareResults(results, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """ Compare each result with the same benchmark in a baseline
+    :param dict results: The return value of BenchmarkRunner.run
+    :param dict baseline: Results from an earlier run
+    :param float threshold: The fraction a benchmark has to be slower (or faster) to not be STATUS_UNCHANGED
+    :return: list of dicts with the key, seconds, baselineSeconds, ratio, and status of each result
+    """
+    baselineSeconds = {getResultKey(result): result['seconds'] for result in baseline['results']}
+    comparisons = []
+    for result in results['results']:
+        key = getResultKey(result)
+        previousSeconds = baselineSeconds.get(key)
+        if previousSeconds is None:
+            ratio = None
+            status = STATUS_NEW
+        else:
+            ratio = result['seconds'] / previousSeconds if previousSeconds else None
+            if ratio is None:
+                status = STATUS_UNCHANGED
+            elif ratio > 1 + threshold:
+                status = STATUS_SLOWER
+            elif ratio < 1 - threshold:
+                status = STATUS_FASTER
+            else:
+                status = STATUS_UNCHANGED
+        comparisons.append({
+            'key': key, 'seconds': result['seconds'], 'baselineSeconds': previousSeconds, 'ratio': ratio,
+            'status': status
+        })
+    return comparisons
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Benchmark the importer with seeded synthetic data')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='Row counts to benchmark')
+    parser.add_argument('--datasets', nargs='+', choices=list(DATASETS), help='Datasets to benchmark')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--work-dir', help='Directory for generated data and output files. Defaults to a temp dir.')
+    parser.add_argument('--output', help='File to write the JSON results to')
+    parser.add_argument('--baseline', help='JSON results from an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(args)
+
+    workDir = args.work_dir or tempfile.mkdtemp(prefix='importerBenchmarks')
+    os.makedirs(workDir, exist_ok=True)
+    results = BenchmarkRunner(workDir, args.repeat, args.seed).run(args.scales, args.datasets)
+
+    if args.output:
+        with open(args.output, 'w') as outputFile:
+            json.dump(results, outputFile, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as baselineFile:
+        baseline = json.load(baselineFile)
+    comparisons = compareResults(results, baseline, args.threshold)
+    for comparison in comparisons:
+        if comparison['status'] != STATUS_UNCHANGED:
+            ratio = f'{comparison["ratio"]:.2f}x' if comparison['ratio'] else ''
+            print(f'{comparison["status"]}: {comparison["key"]} {ratio}')
+    # A non-zero exit code lets a CI job fail on a regression
+    return 1 if any(comparison['status'] == STATUS_SLOWER for comparison in comparisons) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
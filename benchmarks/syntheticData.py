@@ -0,0 +1,151 @@
+import csv
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+from importer import *
+
+DEFAULT_SEED = 1023
+
+START_DATETIME = datetime(2020, 1, 1)
+SECONDS_PER_YEAR = 366 * 24 * 60 * 60
+# Written for values that are missing so they are converted to None on import
+MISSING_VALUE = DEFAULT_NONE_STRINGS[0]
+
+SEXES = ('Female', 'Male')
+EDUCATION_LEVELS = ('Basic', 'High school', 'College', 'Masters', 'Doctorate')
+OCCUPATION_CATEGORIES = (
+    'Office administrative support', 'Sports, media, and entertainment', 'Management', 'Sales', 'Healthcare',
+    'Construction', 'Education', 'Legal'
+)
+RACES = ('African american', 'Asian', 'Hispanic', 'White', 'Other')
+LANGUAGES = ('English', 'Spanish', 'Chinese', 'French')
+PRODUCT_NAMES = ('Mountain socks', 'Storm surge jacket', 'Aspen long sleeve shirt', 'Pine short sleeve shirt')
+PART_NAMES = ('Car', 'Car engine', 'Car body', 'Car door', 'Car window')
+MACHINE_TYPES = ('Car machine', 'Car engine machine', 'Car body machine', 'Car door machine', 'Car window machine',
+                 'Paint machine')
+EVENT_DESCRIPTIONS = ('Machine broke', 'Mechanic started repairing machine', 'Machine is fixed')
+
+
+def getRandomDateTime(rng):
+    return START_DATETIME + timedelta(seconds=rng.randrange(SECONDS_PER_YEAR), microseconds=rng.randrange(1000000))
+
+
+def getSunFoodCustomerRow(rng, rowIdx):
+    return [
+        f'{rng.getrandbits(40):010x}', rng.choice(SEXES), rng.randint(0, 1), int(rng.random() < 0.8),
+        int(rng.random() < 0.05), rng.randint(18, 80), rng.choice(EDUCATION_LEVELS), rng.choice(OCCUPATION_CATEGORIES),
+        rng.randrange(0, 200000), rng.choice(RACES), rng.choice(LANGUAGES), rng.randint(0, 4),
+        round(rng.uniform(50, 400), 2)
+    ]
+
+
+def getHighArcticSaleRow(rng, rowIdx):
+    unitPrice = round(rng.uniform(10, 200), 2)
+    return [
+        f'{rng.getrandbits(40):010x}', rng.choice(PRODUCT_NAMES), getRandomDateTime(rng).isoformat(sep=' '),
+        rng.randint(1, 5), unitPrice, round(unitPrice * rng.uniform(0.3, 0.7), 2), rng.choice((0, 0.05, 0.1, 0.2))
+    ]
+
+
+def getCarProcessingRow(rng, rowIdx):
+    startTime = getRandomDateTime(rng)
+    endTime = startTime + timedelta(minutes=rng.uniform(5, 600))
+    hasInputPart = rng.random() < 0.7
+    return [
+        rowIdx // 3, rng.choice(PART_NAMES), rng.randint(1, 500), rng.choice(MACHINE_TYPES),
+        startTime.isoformat(sep=' '), endTime.isoformat(sep=' '),
+        rng.randrange(1000000) if hasInputPart else MISSING_VALUE,
+        rng.choice(PART_NAMES) if hasInputPart else MISSING_VALUE,
+        (startTime - timedelta(minutes=rng.uniform(0, 60))).isoformat(sep=' ') if hasInputPart else MISSING_VALUE
+    ]
+
+
+def getMachineBreakdownRow(rng, rowIdx):
+    return [
+        rng.randint(1, 500), rng.choice(MACHINE_TYPES), rng.choice(EVENT_DESCRIPTIONS) if rng.random() < 0.95 else MISSING_VALUE,
+        getRandomDateTime(rng).isoformat(sep=' ')
+    ]
+
+
+# Schemas match the bundled sample files. Each dataset has five groupings so getGroupData can be measured with
+# 1 to 5 groupings, and the columns used for statistics by the analysis scripts.
+DATASETS = {
+    'sunFoodCustomers': {
+        'headers': ['customerKey', 'sex', 'isMarried', 'isEmployed', 'hasNewBaby', 'age', 'educationLevel',
+                    'occupationCategory', 'annualIncome', 'race', 'primaryLanguage', 'childrenNum', 'avgPurchaseAmount'],
+        'getRow': getSunFoodCustomerRow,
+        'defaultHeaders': None,
+        'defaultDataTypes': {'isMarried': int, 'isEmployed': int, 'hasNewBaby': int, 'age': int, 'annualIncome': float,
+                             'childrenNum': int, 'avgPurchaseAmount': float},
+        'groupings': [('hasNewBaby',), ('sex', 'isMarried'), ('educationLevel',), ('race', 'primaryLanguage'),
+                      ('occupationCategory', 'sex')],
+        'statisticColumns': ['avgPurchaseAmount', 'age', 'annualIncome', 'isEmployed']
+    },
+    'highArcticSales': {
+        'headers': ['customerKey', 'productName', 'purchaseDateTime', 'quantity', 'unitPrice', 'unitCost',
+                    'discountPct'],
+        'getRow': getHighArcticSaleRow,
+        'defaultHeaders': None,
+        'defaultDataTypes': {'purchaseDateTime': safeDateTimeParse, 'unitPrice': float, 'unitCost': float,
+                             'quantity': int, 'discountPct': float},
+        'groupings': [('productName',), ('discountPct',), ('quantity',), ('productName', 'discountPct'),
+                      ('productName', 'quantity')],
+        'statisticColumns': ['quantity', 'unitPrice', 'unitCost']
+    },
+    'carProcessing': {
+        'headers': ['partId', 'partName', 'machineId', 'machineType', 'processingStartTime', 'processingEndTime',
+                    'inputPartId', 'partName', 'subPartReadyTime'],
+        'getRow': getCarProcessingRow,
+        'defaultHeaders': {7: 'inputPartName', 'subPartReadyTime': 'inputPartReadyTime'},
+        'defaultDataTypes': {'partId': int, 'machineId': int, 'processingStartTime': safeDateTimeParse,
+                             'processingEndTime': safeDateTimeParse, 'inputPartId': int,
+                             'inputPartReadyTime': safeDateTimeParse},
+        'groupings': [('partName',), ('machineType',), ('machineId',), ('partName', 'machineType'),
+                      ('machineId', 'machineType')],
+        'statisticColumns': ['processingStartTime', 'processingEndTime']
+    },
+    'machineBreakdown': {
+        'headers': ['machineId', 'machineType', 'eventDescription', 'eventDateTime'],
+        'getRow': getMachineBreakdownRow,
+        'defaultHeaders': None,
+        'defaultDataTypes': {'machineId': int, 'eventDateTime': safeDateTimeParse},
+        'groupings': [('eventDescription',), ('machineType',), ('machineId',), ('machineType', 'eventDescription'),
+                      ('machineId', 'eventDescription')],
+        'statisticColumns': ['eventDateTime']
+    }
+}
+
+
+def iterSyntheticRows(datasetName, rowCount, seed=DEFAULT_SEED):
+    """ Yield raw rows for a dataset. The same seed always gives the same rows.
+    :param str datasetName: A key of DATASETS
+    :param int rowCount: The number of rows to generate
+    :param int seed: Seed for the random number generator
+    :return: generator
+    """
+    rng = random.Random(seed)
+    getRow = DATASETS[datasetName]['getRow']
+    for rowIdx in range(rowCount):
+        yield getRow(rng, rowIdx)
+
+
+def writeSyntheticCsvFile(datasetName, filePath, rowCount, seed=DEFAULT_SEED):
+    """ Write a CSV file with the same headers and value formats as the bundled dataset
+    """
+    with open(filePath, 'w', newline='') as csvFile:
+        csvWriter = csv.writer(csvFile)
+        csvWriter.writerow(DATASETS[datasetName]['headers'])
+        csvWriter.writerows(iterSyntheticRows(datasetName, rowCount, seed))
+
+
+def writeSyntheticExcelFile(datasetName, filePath, rowCount, seed=DEFAULT_SEED):
+    """ Write an XLSX file with the same rows as writeSyntheticCsvFile
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=datasetName)
+    worksheet.append(DATASETS[datasetName]['headers'])
+    for row in iterSyntheticRows(datasetName, rowCount, seed):
+        worksheet.append(row)
+    workbook.save(filePath)
@@ -0,0 +1,172 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from operator import add, mul
+
+from importer import *
+
+"""
+A scenario is a dict describing a marketing campaign:
+    {
+        'acquisitionRates': [0.4, 0.5, ...],  # New customers each campaign month as a fraction of baseCustomerCount
+        'attritionRates': [0, 0.08, ...],  # Fraction of a cohort lost after each month it spends
+        'baseCustomerCount': 1200,
+        'monthlySpend': 45.5,  # Expected spend per customer per month
+        'adCost': 10000
+    }
+Each acquisition month starts a cohort which spends for len(attritionRates) months, so a scenario's curves cover
+len(acquisitionRates) + len(attritionRates) - 1 months.
+"""
+
+
+def simulateCohorts(scenarios, isRounded=True):
+    """ Get the monthly revenue and customer curves and the ROI of each scenario. Scenarios with the same number of
+    acquisition and spend months are simulated as a batch: each step of the cohort matrix (acquisition month x spend
+    month) is applied to every scenario in the batch at once instead of looping over the months of each scenario.
+    :param list scenarios: Scenario dicts (see above)
+    :param bool isRounded: If true, cohort sizes are rounded to whole customers after acquisition and after each
+    month of attrition
+    :return: dict of lists with one value per scenario, in the same order as scenarios:
+        {'monthlyRevenue': [[...], ...], 'monthlyCustomers': [[...], ...], 'totalRevenue': [...],
+        'nominalRoi': [...], 'roiPct': [...]}
+    """
+    results = {key: [None] * len(scenarios) for key in ('monthlyRevenue', 'monthlyCustomers')}
+    scenarioIdxsByShape = {}
+    for scenarioIdx, scenario in enumerate(scenarios):
+        shape = (len(scenario['acquisitionRates']), len(scenario['attritionRates']))
+        scenarioIdxsByShape.setdefault(shape, []).append(scenarioIdx)
+
+    for scenarioIdxs in scenarioIdxsByShape.values():
+        batch = [scenarios[scenarioIdx] for scenarioIdx in scenarioIdxs]
+        monthlyRevenue, monthlyCustomers = getBatchCurves(batch, isRounded)
+        for batchIdx, scenarioIdx in enumerate(scenarioIdxs):
+            results['monthlyRevenue'][scenarioIdx] = monthlyRevenue[batchIdx]
+            results['monthlyCustomers'][scenarioIdx] = monthlyCustomers[batchIdx]
+
+    results['totalRevenue'] = [sum(monthlyRevenue) for monthlyRevenue in results['monthlyRevenue']]
+    results['nominalRoi'] = [
+        totalRevenue - scenario['adCost'] for totalRevenue, scenario in zip(results['totalRevenue'], scenarios)
+    ]
+    results['roiPct'] = [
+        (nominalRoi / scenario['adCost']) * 100 if scenario['adCost'] else None
+        for nominalRoi, scenario in zip(results['nominalRoi'], scenarios)
+    ]
+    return results
+
+
+def getBatchCurves(batch, isRounded):
+    """ Get the monthly revenue and customer curves for scenarios with the same number of acquisition and spend
+    months. Values are stored by month with one entry per scenario so each step is a single pass over the batch.
+    :return: tuple of (monthly revenue, monthly customers), each a list with one curve per scenario
+    """
+    acquisitionMonths = len(batch[0]['acquisitionRates'])
+    spendMonths = len(batch[0]['attritionRates'])
+    monthCount = acquisitionMonths + spendMonths - 1
+    baseCustomerCounts = [scenario['baseCustomerCount'] for scenario in batch]
+    monthlySpends = [scenario['monthlySpend'] for scenario in batch]
+    retentionRates = [[1 - scenario['attritionRates'][month] for scenario in batch] for month in range(spendMonths)]
+    roundFn = round if isRounded else float
+
+    revenueByMonth = [[0] * len(batch) for _ in range(monthCount)]
+    customersByMonth = [[0] * len(batch) for _ in range(monthCount)]
+    for monthOffset in range(acquisitionMonths):
+        acquisitionRates = [scenario['acquisitionRates'][monthOffset] for scenario in batch]
+        cohortCustomers = list(map(roundFn, map(mul, baseCustomerCounts, acquisitionRates)))
+        for month in range(spendMonths):
+            currentMonth = monthOffset + month
+            # map with operator functions runs each step over the whole batch without a Python level loop body
+            revenueByMonth[currentMonth] = list(
+                map(add, revenueByMonth[currentMonth], map(mul, cohortCustomers, monthlySpends))
+            )
+            # Customers who leave during the month are not counted in that month
+            cohortCustomers = list(map(roundFn, map(mul, cohortCustomers, retentionRates[month])))
+            customersByMonth[currentMonth] = list(map(add, customersByMonth[currentMonth], cohortCustomers))
+
+    return [list(curve) for curve in zip(*revenueByMonth)], [list(curve) for curve in zip(*customersByMonth)]
+
+
+def simulateScenarios(scenarios, isRounded=True, workers=None, chunkSize=COHORT_SIMULATION_CHUNK_SIZE):
+    """ Simulate a large number of scenarios, optionally split into chunks which are simulated in worker processes.
+    Takes the same arguments and returns the same results as simulateCohorts.
+    :param int workers: If provided, chunks of scenarios are simulated in this many worker processes
+    :param int chunkSize: The number of scenarios simulated by a worker at a time
+    :return: dict
+    """
+    if not workers or len(scenarios) <= chunkSize:
+        return simulateCohorts(scenarios, isRounded)
+
+    chunks = [scenarios[start:start + chunkSize] for start in range(0, len(scenarios), chunkSize)]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Chunk results are returned in order so the results line up with scenarios
+        for chunkResults in executor.map(simulateCohorts, chunks, [isRounded] * len(chunks)):
+            for key, values in chunkResults.items():
+                results.setdefault(key, []).extend(values)
+    return results
+
+
+def getScenarioGrid(baseScenario, sweeps):
+    """ Get a scenario for every combination of the swept values
+    Example:
+        input: baseScenario, {'monthlySpend': [40, 50], 'adCost': [5000, 10000, 15000]}
+        output: 6 scenarios
+    :param dict baseScenario: Values used for every key that isn't swept
+    :param dict sweeps: A key/value pair of scenario key and the list of values to try
+    :return: list
+    """
+    keys = list(sweeps)
+    return [dict(baseScenario, **dict(zip(keys, values))) for values in product(*(sweeps[key] for key in keys))]
+
+
+def getPerturbedScenarios(baseScenario, count, rateVariation=0.1, spendVariation=0.1, seed=None):
+    """ Get Monte Carlo variations of a scenario. Every acquisition rate, attrition rate, and the monthly spend are
+    multiplied by a normally distributed factor with a mean of 1. Rates are kept between 0 and 1.
+    :param dict baseScenario: The scenario to vary
+    :param int count: The number of scenarios to generate
+    :param float rateVariation: The standard deviation of the factor applied to each rate
+    :param float spendVariation: The standard deviation of the factor applied to the monthly spend
+    :param int seed: If provided, the same scenarios are generated each time
+    :return: list
+    """
+    rng = random.Random(seed)
+
+    def getPerturbedRate(rate):
+        return min(max(rate * rng.gauss(1, rateVariation), 0), 1)
+
+    return [
+        dict(
+            baseScenario,
+            acquisitionRates=[getPerturbedRate(rate) for rate in baseScenario['acquisitionRates']],
+            attritionRates=[getPerturbedRate(rate) for rate in baseScenario['attritionRates']],
+            monthlySpend=max(baseScenario['monthlySpend'] * rng.gauss(1, spendVariation), 0)
+        )
+        for _ in range(count)
+    ]
+
+
+def getPercentile(sortedValues, percentile):
+    """ Get a percentile of sorted values, interpolating between the two closest values """
+    position = (len(sortedValues) - 1) * percentile / 100
+    lowerIdx = int(position)
+    upperIdx = min(lowerIdx + 1, len(sortedValues) - 1)
+    return sortedValues[lowerIdx] + (sortedValues[upperIdx] - sortedValues[lowerIdx]) * (position - lowerIdx)
+
+
+def getRoiDistribution(results, percentiles=ROI_PERCENTILES):
+    """ Get the mean and percentiles of the nominal ROI and ROI % of simulated scenarios
+    :param dict results: The return value of simulateCohorts or simulateScenarios
+    :param iterable percentiles: Percentiles between 0 and 100
+    :return: dict
+        Example: {'nominalRoi': {'mean': 1520.5, 5: -830.2, 50: 1490.1, 95: 3902.7}, 'roiPct': {...}}
+    """
+    distribution = {}
+    for metric in ('nominalRoi', 'roiPct'):
+        values = sorted(value for value in results[metric] if value is not None)
+        if not values:
+            distribution[metric] = None
+            continue
+        metricDistribution = {'mean': sum(values) / len(values)}
+        for percentile in percentiles:
+            metricDistribution[percentile] = getPercentile(values, percentile)
+        distribution[metric] = metricDistribution
+    return distribution
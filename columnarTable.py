@@ -0,0 +1,287 @@
+import operator
+from array import array
+from datetime import datetime, timedelta
+
+from importer import *
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+FLOAT_DATA_TYPES = (float, parsePercentageString)
+INTEGER_DATA_TYPES = (int, parseIntegerString)
+DATETIME_DATA_TYPES = (safeDateTimeParse,)
+
+
+class Column:
+
+    def __init__(self, values=None):
+        """A column of python objects. Used for values which can't be stored in a typed array.
+
+        :param iterable values: Optional starting values
+        """
+        self.values = list(values) if values is not None else []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, idx):
+        return self.values[idx]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def append(self, val):
+        self.values.append(val)
+
+
+class NumericColumn(Column):
+
+    def __init__(self, typecode, values=None):
+        """A column of numbers stored in a contiguous typed array. None values are tracked in a separate
+        null mask so they can be returned as None.
+
+        :param str typecode: 'd' for floats or 'q' for integers
+        :param iterable values: Optional starting values
+        """
+        self.typecode = typecode
+        self.values = array(typecode)
+        self.nulls = bytearray()
+        for val in values or ():
+            self.append(val)
+
+    def __getitem__(self, idx):
+        return None if self.nulls[idx] else self.values[idx]
+
+    def __iter__(self):
+        return (None if isNull else val for val, isNull in zip(self.values, self.nulls))
+
+    def append(self, val):
+        if val is None:
+            self.values.append(0)
+            self.nulls.append(1)
+        else:
+            self.values.append(val)
+            self.nulls.append(0)
+
+    def applyOperator(self, other, operatorFn, isReversed=False):
+        """ Apply an arithmetic operator to every value in the column. None values stay None.
+        :param Column|int|float other: Another column of the same length or a single number
+        :param function operatorFn: A function which takes two values (e.g. operator.add)
+        :param bool isReversed: If true, other will be the left operand
+        :return: Column
+        """
+        if isinstance(other, Column):
+            if len(other) != len(self):
+                raise ValueError('Columns must be the same length')
+            pairs = zip(other, self) if isReversed else zip(self, other)
+            results = [None if left is None or right is None else operatorFn(left, right) for left, right in pairs]
+        elif isReversed:
+            results = [None if val is None else operatorFn(other, val) for val in self]
+        else:
+            results = [None if val is None else operatorFn(val, other) for val in self]
+        return getColumnFromValues(results)
+
+    def __add__(self, other):
+        return self.applyOperator(other, operator.add)
+
+    def __radd__(self, other):
+        return self.applyOperator(other, operator.add, isReversed=True)
+
+    def __sub__(self, other):
+        return self.applyOperator(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self.applyOperator(other, operator.sub, isReversed=True)
+
+    def __mul__(self, other):
+        return self.applyOperator(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self.applyOperator(other, operator.mul, isReversed=True)
+
+    def __truediv__(self, other):
+        return self.applyOperator(other, operator.truediv)
+
+    def __rtruediv__(self, other):
+        return self.applyOperator(other, operator.truediv, isReversed=True)
+
+
+class DateTimeColumn(NumericColumn):
+
+    def __init__(self, values=None):
+        """A column of naive datetimes stored as microseconds since 1970-01-01 in a typed array
+        :param iterable values: Optional starting values
+        """
+        super().__init__('q', values)
+
+    def __getitem__(self, idx):
+        return None if self.nulls[idx] else EPOCH + timedelta(microseconds=self.values[idx])
+
+    def __iter__(self):
+        return (None if isNull else EPOCH + timedelta(microseconds=val) for val, isNull in zip(self.values, self.nulls))
+
+    def append(self, val):
+        if val is not None:
+            if not isinstance(val, datetime) or val.tzinfo is not None:
+                raise TypeError('DateTimeColumn values must be naive datetimes')
+            val = (val - EPOCH) // ONE_MICROSECOND
+        super().append(val)
+
+
+class StringColumn(Column):
+
+    def __init__(self, values=None):
+        """A dictionary encoded column of strings. Each distinct string is stored once and every row
+        stores an integer code for its string. None is stored as -1.
+
+        :param iterable values: Optional starting values
+        """
+        self.codes = array('l')
+        self.categories = []
+        self.categoryCodes = {}
+        for val in values or ():
+            self.append(val)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, idx):
+        code = self.codes[idx]
+        return None if code == -1 else self.categories[code]
+
+    def __iter__(self):
+        categories = self.categories
+        return (None if code == -1 else categories[code] for code in self.codes)
+
+    def append(self, val):
+        if val is None:
+            self.codes.append(-1)
+            return
+        if not isinstance(val, str):
+            raise TypeError('StringColumn values must be strings')
+        code = self.categoryCodes.get(val)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(val)
+            self.categoryCodes[val] = code
+        self.codes.append(code)
+
+
+def getColumnForDataType(dataType):
+    """ Get an empty column with the most compact storage for values converted by dataType
+    :param func|class dataType: The function or class used to convert each value in the column
+    :return: Column
+    """
+    if dataType in FLOAT_DATA_TYPES:
+        return NumericColumn('d')
+    if dataType in INTEGER_DATA_TYPES:
+        return NumericColumn('q')
+    if dataType in DATETIME_DATA_TYPES:
+        return DateTimeColumn()
+    if dataType is None:
+        return StringColumn()
+    return Column()
+
+
+def getColumnFromValues(values):
+    """ Get a column with the most compact storage that can hold every value
+    :param list values: The column values
+    :return: Column
+    """
+    for columnFn in (lambda: NumericColumn('q', values), lambda: NumericColumn('d', values),
+                     lambda: DateTimeColumn(values), lambda: StringColumn(values)):
+        try:
+            return columnFn()
+        except (TypeError, OverflowError):
+            continue
+    return Column(values)
+
+
+class ColumnarTable:
+
+    def __init__(self, headers, defaultDataTypes=None):
+        """A table which stores each column in its own contiguous typed array instead of one record per row.
+        Numeric columns use float or integer arrays, safeDateTimeParse columns use an integer array of
+        microseconds, and columns without a data type are dictionary encoded strings. Iterating over the
+        table yields dict records so it can be used anywhere a list of dict records is expected.
+
+        :param list headers: The column names
+        :param dict defaultDataTypes: A key/value pair of header and the function or data type used to convert
+        each value. Used to pick the storage for each column.
+        """
+        self.headers = list(headers)
+        self.columns = {}
+        for header in self.headers:
+            dataType = defaultDataTypes.get(header) if defaultDataTypes else None
+            self.columns[header] = getColumnForDataType(dataType)
+        self.rowCount = 0
+
+    def __len__(self):
+        return self.rowCount
+
+    def __iter__(self):
+        return self.iterRows()
+
+    def __getitem__(self, header):
+        return self.columns[header]
+
+    def __setitem__(self, header, values):
+        self.addColumn(header, values)
+
+    def appendRow(self, row):
+        """ Add a row of values to the end of each column. If a value doesn't fit the column's typed storage,
+        the column is converted to a column of python objects.
+        :param iterable row: Values in the same order as the headers
+        """
+        for header, val in zip(self.headers, row):
+            column = self.columns[header]
+            try:
+                column.append(val)
+            except (TypeError, OverflowError):
+                column = Column(column)
+                column.append(val)
+                self.columns[header] = column
+        self.rowCount += 1
+
+    def addColumn(self, header, values):
+        """ Add a new column or replace an existing one. Derived columns can be calculated from other columns
+        in a single expression. For example: table['totalProfit'] = table['unitProfit'] * table['quantity']
+        :param str header: The name of the column
+        :param Column|iterable values: A column or an iterable with one value for each row
+        """
+        column = values if isinstance(values, Column) else getColumnFromValues(list(values))
+        if len(column) != self.rowCount:
+            raise ValueError('Column length must match the number of rows in the table')
+        if header not in self.columns:
+            self.headers.append(header)
+        self.columns[header] = column
+
+    def getRow(self, idx, rowDataType=ROW_TYPE_DICT):
+        """ Get a single row in the format of rowDataType
+        :return: list|tuple|dict
+        """
+        row = [self.columns[header][idx] for header in self.headers]
+        if rowDataType == ROW_TYPE_LIST:
+            return row
+        if rowDataType == ROW_TYPE_DICT:
+            return {header: val for header, val in zip(self.headers, row)}
+        if rowDataType == ROW_TYPE_TUPLE:
+            return tuple(row)
+        raise ValueError('Must use a row data type of tuple, list, or dict')
+
+    def iterRows(self, rowDataType=ROW_TYPE_DICT, rowIndexes=None):
+        """ Yield each row in the format of rowDataType
+        :param iterable rowIndexes: If provided, only the rows at these indexes will be read (e.g. a group
+        from a GroupIndex). The columns are read in place so no data is copied.
+        :return: generator
+        """
+        headers = self.headers
+        columns = [self.columns[header] for header in headers]
+        rows = zip(*columns) if rowIndexes is None else ([column[idx] for column in columns] for idx in rowIndexes)
+        for row in rows:
+            if rowDataType == ROW_TYPE_DICT:
+                yield dict(zip(headers, row))
+            elif rowDataType == ROW_TYPE_LIST:
+                yield list(row)
+            else:
+                yield tuple(row)
@@ -0,0 +1,140 @@
+from importer import *
+from importer.dateTimeParser import DateTimeParser
+from importer.expressions import getDerivedRowFn, getRequiredHeaders
+
+
+def getColumnConverters(headers, defaultDataTypes, noneStrings, dateTimeParsers=None, profiler=None):
+    """ Get a converter for each header. Used to build the conversion plan for a file once instead of looking up
+    the data type for every value. Columns using safeDateTimeParse get their own DateTimeParser so the column's
+    format can be detected and parsed with a fast path.
+    :param list headers: Processed header values
+    :param dict defaultDataTypes: A key/value pair of header and the function or data type to convert each value to
+    :param frozenset noneStrings: Lowercase string values that should be converted to None
+    :param dict dateTimeParsers: If provided, the DateTimeParser created for each header will be added to it
+    :param Profiler profiler: If provided with isDetailTimed, each column's conversion is timed as 'convert:<header>'
+    :return: list
+    """
+    columnConverters = []
+    for header in headers:
+        defaultDataType = defaultDataTypes.get(header) if defaultDataTypes else None
+        if defaultDataType is safeDateTimeParse:
+            defaultDataType = DateTimeParser()
+            if dateTimeParsers is not None:
+                dateTimeParsers[header] = defaultDataType
+        columnConverter = getColumnConverter(defaultDataType, noneStrings)
+        if profiler and profiler.isDetailTimed:
+            columnConverter = profiler.getTimedFn(f'convert:{header}', columnConverter)
+        columnConverters.append(columnConverter)
+    return columnConverters
+
+
+def getColumnConverter(defaultDataType, noneStrings):
+    """ Get a function which converts a single raw value. Handles None, null strings, and function conversions
+    :param func|class defaultDataType: A function or class which converts the value into the appropriate format
+    :param frozenset noneStrings: Lowercase string values that should be converted to None
+    """
+    maxNoneStringLength = max((len(noneString) for noneString in noneStrings), default=-1)
+
+    if not defaultDataType:
+        def convertValue(val):
+            if isinstance(val, str):
+                val = val.strip()
+                if len(val) <= maxNoneStringLength and val.lower() in noneStrings:
+                    return None
+            return val
+    else:
+        def convertValue(val):
+            if isinstance(val, str):
+                val = val.strip()
+                if len(val) <= maxNoneStringLength and val.lower() in noneStrings:
+                    return None
+            elif val is None:
+                return val
+            return defaultDataType(val)
+
+    return convertValue
+
+
+def getRowBuilder(rowDataType, headers):
+    """ Get a function which turns a list of converted values into the row data type
+    :param str rowDataType: A string indicating the data type that each row should be processed as
+    :param list headers: Processed header values
+    """
+    if rowDataType == ROW_TYPE_LIST:
+        return lambda processedRow: processedRow
+    if rowDataType in (ROW_TYPE_DICT, ROW_TYPE_COLUMNAR):
+        # Columnar rows are processed as dicts so rowFilterFn can use column names
+        return lambda processedRow: dict(zip(headers, processedRow))
+    if rowDataType == ROW_TYPE_TUPLE:
+        return tuple
+    raise ValueError('Must use a row data type of tuple, list, or dict')
+
+
+def getRowProcessor(headers, defaultDataTypes, noneStrings, rowDataType, derivedColumns=None, columns=None,
+                    readFilterColumns=None, readFilterFn=None, dateTimeParsers=None, profiler=None):
+    """ Get a function which converts a raw row from the file into a processed row. Only the cells needed for
+    columns (and the derived columns in it) are converted. If readFilterFn is provided, the readFilterColumns cells
+    are converted and checked first, and the rest of the row is only converted if readFilterFn returns True.
+    :param list headers: Processed header values from the file
+    :param dict defaultDataTypes: A key/value pair of header and the function or data type to convert each value to
+    :param frozenset noneStrings: Lowercase string values that should be converted to None
+    :param str rowDataType: A string indicating the data type that each row should be processed as
+    :param dict derivedColumns: A key/value pair of new header and Expression
+    :param list columns: If provided, only these headers (from the file or derivedColumns) are kept, in this order
+    :param list readFilterColumns: Headers from the file which readFilterFn uses. Required if readFilterFn is provided.
+    :param function readFilterFn: A function which takes a dict of the converted readFilterColumns values and returns
+    True if the row should be included
+    :param dict dateTimeParsers: If provided, the DateTimeParser created for each header will be added to it
+    :param Profiler profiler: If provided with isDetailTimed, each column's conversion is timed
+    :return: tuple of (output headers, function which returns a processed row or None if the row is filtered out)
+    """
+    columnConverters = getColumnConverters(headers, defaultDataTypes, noneStrings, dateTimeParsers, profiler)
+    if columns is None and not readFilterFn:
+        outputHeaders, deriveValues = getDerivedRowFn(headers, derivedColumns)
+        rowBuilder = getRowBuilder(rowDataType, outputHeaders)
+        if not deriveValues:
+            return outputHeaders, lambda row: rowBuilder(
+                [convertValue(val) for convertValue, val in zip(columnConverters, row)]
+            )
+        return outputHeaders, lambda row: rowBuilder(deriveValues(
+            [convertValue(val) for convertValue, val in zip(columnConverters, row)]
+        ))
+
+    if readFilterFn and not readFilterColumns:
+        raise ValueError('readFilterColumns are required to use readFilterFn')
+    readFilterColumns = set(readFilterColumns or ()) if readFilterFn else set()
+    missingColumns = readFilterColumns.difference(headers)
+    if missingColumns:
+        raise ValueError(f'Unknown read filter columns: {sorted(missingColumns)}')
+    if columns is None:
+        # Every column is kept. Duplicate headers are only kept once since values are looked up by header.
+        columns = list(dict.fromkeys(list(headers) + list(derivedColumns or ())))
+    requiredHeaders = getRequiredHeaders(columns, derivedColumns)
+
+    # Cells used by the filter are converted first so the rest of a filtered out row is never converted
+    filterPositions = [pos for pos, header in enumerate(headers) if header in readFilterColumns]
+    otherPositions = [
+        pos for pos, header in enumerate(headers) if header in requiredHeaders and header not in readFilterColumns
+    ]
+    readHeaders = [headers[pos] for pos in filterPositions + otherPositions]
+    requiredDerivedColumns = {
+        header: expression for header, expression in (derivedColumns or {}).items() if header in requiredHeaders
+    }
+    outputHeaders, deriveValues = getDerivedRowFn(readHeaders, requiredDerivedColumns, columns)
+    rowBuilder = getRowBuilder(rowDataType, outputHeaders)
+    filterHeaders = readHeaders[:len(filterPositions)]
+    filterConverters = [(pos, columnConverters[pos]) for pos in filterPositions]
+    otherConverters = [(pos, columnConverters[pos]) for pos in otherPositions]
+    headerCount = len(headers)
+
+    def processRow(row):
+        # Short rows (e.g. a blank line at the end of a CSV file) are read as if the missing cells were empty
+        if len(row) < headerCount:
+            row = list(row) + [None] * (headerCount - len(row))
+        processedRow = [convertValue(row[pos]) for pos, convertValue in filterConverters]
+        if readFilterFn and not readFilterFn(dict(zip(filterHeaders, processedRow))):
+            return None
+        processedRow.extend([convertValue(row[pos]) for pos, convertValue in otherConverters])
+        return rowBuilder(deriveValues(processedRow))
+
+    return outputHeaders, processRow
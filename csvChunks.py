@@ -0,0 +1,63 @@
+import csv
+import io
+
+from importer.converters import getRowProcessor
+
+QUOTE_BYTE = b'"'
+
+
+def getCsvChunkOffsets(filePath, chunkSize, startRow=0):
+    """ Split a CSV file into byte ranges which each start and end on a record boundary. A newline only ends a
+    record if it is outside of a quoted field, which is tracked by counting quote characters (escaped quotes are
+    doubled so they don't change whether a position is inside or outside of quotes).
+    :param str filePath: Name of the CSV file
+    :param int chunkSize: The approximate number of bytes in each chunk
+    :param int startRow: The number of data records to skip (e.g. records imported in an earlier run)
+    :return: list of (start, end) byte offsets. The header record is not included in any chunk.
+    """
+    with open(filePath, 'rb') as file:
+        for _ in range(startRow + 1):
+            readToRecordEnd(file, isInQuotes=False)
+        offsets = [file.tell()]
+        while True:
+            block = file.read(chunkSize)
+            if not block:
+                break
+            readToRecordEnd(file, isInQuotes=block.count(QUOTE_BYTE) % 2 == 1)
+            offsets.append(file.tell())
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def readToRecordEnd(file, isInQuotes):
+    """ Read lines from the current file position until the end of the current record
+    :param file: A file opened in binary mode
+    :param bool isInQuotes: True if the current file position is inside of a quoted field
+    """
+    while True:
+        line = file.readline()
+        if not line:
+            return
+        if line.count(QUOTE_BYTE) % 2 == 1:
+            isInQuotes = not isInQuotes
+        if not isInQuotes:
+            return
+
+
+def processCsvChunk(chunkConfig):
+    """ Read and process every record in a byte range of a CSV file. Used by worker processes so it only takes
+    arguments which can be pickled.
+    :param tuple chunkConfig: (filePath, start, end, headers, defaultDataTypes, noneStrings, rowDataType,
+    derivedColumns, columns, readFilterColumns, readFilterFn)
+    :return: list of processed rows, with None for rows filtered out by readFilterFn
+    """
+    (filePath, start, end, headers, defaultDataTypes, noneStrings, rowDataType, derivedColumns, columns,
+     readFilterColumns, readFilterFn) = chunkConfig
+    with open(filePath, 'rb') as file:
+        file.seek(start)
+        chunk = file.read(end - start)
+
+    # Decode the same way as a CSV file opened by FileImporter
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(chunk)))
+    _, processRow = getRowProcessor(headers, defaultDataTypes, noneStrings, rowDataType, derivedColumns, columns,
+                                    readFilterColumns, readFilterFn)
+    return [processRow(row) for row in reader]
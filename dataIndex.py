@@ -0,0 +1,68 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+from importer import *
+
+
+class HashIndex:
+
+    def __init__(self, values):
+        """An index of the row indexes for each distinct value in a column. Used for equality lookups.
+        :param iterable values: The column values in row order
+        """
+        self.rowIndexes = {}
+        for rowIdx, val in enumerate(values):
+            if val in self.rowIndexes:
+                self.rowIndexes[val].append(rowIdx)
+            else:
+                self.rowIndexes[val] = array('q', (rowIdx,))
+
+    def getRowIndexes(self, val):
+        """ Get the row indexes, in row order, where the column equals val
+        :return: array
+        """
+        return self.rowIndexes.get(val, array('q'))
+
+
+class SortedIndex:
+
+    def __init__(self, values):
+        """An index of row indexes sorted by column value. Used for range lookups on numeric and datetime columns.
+        None values are not included.
+        :param iterable values: The column values in row order
+        """
+        sortedValues = sorted(
+            ((val, rowIdx) for rowIdx, val in enumerate(values) if val is not None),
+            key=itemgetter(0)
+        )
+        self.values = [val for val, _ in sortedValues]
+        self.rowIndexes = array('q', (rowIdx for _, rowIdx in sortedValues))
+
+    def getRowIndexes(self, low=None, high=None, isLowInclusive=True, isHighInclusive=True):
+        """ Get the row indexes, in value order, where the column value is between low and high
+        :param low: The lowest value to include. If None, there is no lower bound.
+        :param high: The highest value to include. If None, there is no upper bound.
+        :return: array
+        """
+        if low is None:
+            start = 0
+        else:
+            start = bisect_left(self.values, low) if isLowInclusive else bisect_right(self.values, low)
+        if high is None:
+            end = len(self.values)
+        else:
+            end = bisect_right(self.values, high) if isHighInclusive else bisect_left(self.values, high)
+        return self.rowIndexes[start:end]
+
+
+def getDataIndex(indexType, values):
+    """ Get a new index of indexType for the column values
+    :param str indexType: INDEX_TYPE_HASH or INDEX_TYPE_SORTED
+    :param iterable values: The column values in row order
+    """
+    if indexType == INDEX_TYPE_HASH:
+        return HashIndex(values)
+    if indexType == INDEX_TYPE_SORTED:
+        return SortedIndex(values)
+    raise ValueError('Index type must be hash or sorted')
@@ -0,0 +1,99 @@
+from datetime import datetime
+from functools import lru_cache
+
+from importer import *
+
+FORMAT_ISO = 'iso'
+
+# Formats tried after ISO, in order of preference
+DATETIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y',
+    '%m/%d/%y',
+    '%B %d, %Y',
+    '%b %d, %Y',
+    '%d-%b-%Y',
+    '%Y%m%d',
+)
+
+
+class DateTimeParser:
+
+    def __init__(self, sampleSize=DATETIME_FORMAT_SAMPLE_SIZE, cacheSize=DATETIME_PARSE_CACHE_SIZE):
+        """A drop in replacement for safeDateTimeParse which is used for a single column. The first sampleSize
+        values are parsed with dateutil and used to detect the column's format. After that, values are parsed with
+        datetime.fromisoformat or datetime.strptime and only fall back to dateutil if they don't match the format.
+        A format is only used if it gave the same result as dateutil for every sampled value.
+
+        :param int sampleSize: The number of values used to detect the column's format
+        :param int cacheSize: The max number of parsed values kept in an LRU cache. Helps columns with many repeated
+        values (e.g. dates without times). Set to 0 to turn off caching.
+        """
+        self.sampleSize = sampleSize
+        self.sampleCount = 0
+        self.candidateFormats = (FORMAT_ISO,) + DATETIME_FORMATS
+        self.format = None
+        self.fastPathHits = 0
+        self.fallbacks = 0
+        self.cachedParse = lru_cache(maxsize=cacheSize)(self.parse) if cacheSize else None
+
+    def __call__(self, val):
+        if isinstance(val, datetime):
+            return val
+        if self.cachedParse:
+            return self.cachedParse(val)
+        return self.parse(val)
+
+    def parse(self, val):
+        if self.format:
+            try:
+                parsedVal = self.parseWithFormat(val, self.format)
+                self.fastPathHits += 1
+                return parsedVal
+            except (TypeError, ValueError):
+                pass
+
+        parsedVal = safeDateTimeParse(val)
+        self.fallbacks += 1
+        if self.sampleCount < self.sampleSize:
+            self.sampleFormat(val, parsedVal)
+        return parsedVal
+
+    def sampleFormat(self, val, parsedVal):
+        """ Remove candidate formats which don't give the same result as dateutil. Once enough values have been
+        sampled, the first remaining candidate becomes the column's format.
+        """
+        self.sampleCount += 1
+        self.candidateFormats = tuple(
+            dateTimeFormat for dateTimeFormat in self.candidateFormats
+            if self.isFormatMatch(val, parsedVal, dateTimeFormat)
+        )
+        if self.sampleCount == self.sampleSize and self.candidateFormats:
+            self.format = self.candidateFormats[0]
+
+    def isFormatMatch(self, val, parsedVal, dateTimeFormat):
+        try:
+            return self.parseWithFormat(val, dateTimeFormat) == parsedVal
+        except (TypeError, ValueError):
+            return False
+
+    def parseWithFormat(self, val, dateTimeFormat):
+        if dateTimeFormat == FORMAT_ISO:
+            return datetime.fromisoformat(val)
+        return datetime.strptime(val, dateTimeFormat)
+
+    def getStats(self):
+        """ Get counts of how each value was parsed
+        :return: dict
+        """
+        cacheInfo = self.cachedParse.cache_info() if self.cachedParse else None
+        return {
+            'format': self.format,
+            'fastPathHits': self.fastPathHits,
+            'fallbacks': self.fallbacks,
+            'cacheHits': cacheInfo.hits if cacheInfo else 0,
+            'cacheSize': cacheInfo.currsize if cacheInfo else 0
+        }
@@ -0,0 +1,201 @@
+import heapq
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from importer import *
+
+logger = logging.getLogger(__name__)
+
+
+class KeyState:
+
+    def __init__(self):
+        """The state kept for one key (e.g. one machine): events waiting in the reorder buffer, the latest event time
+        seen, the time of the last event released from the buffer, and the open session
+        """
+        self.buffer = []
+        self.maxTime = None
+        self.releasedTime = None
+        self.session = None
+
+
+class EventSessionizer:
+
+    def __init__(self, keyColumn, timeColumn, eventColumn, eventKeys, sessionColumns=(), reorderWindow=None,
+                 quarantineFn=None, headers=None):
+        """Turns a stream of events into sessions of one event of each type per key (e.g. machine broke -> mechanic
+        started repairing -> machine is fixed). Only the reorder buffer and open session of each key are kept, so a
+        continuous feed can be processed without holding or sorting its history.
+
+        Sessions which can't be completed are sent to the quarantine instead of being returned:
+            QUARANTINE_MISSING_EVENTS: An event type repeats before the session has every event, or the stream ends
+            QUARANTINE_OUT_OF_ORDER: The session has every event but their times aren't in the order of eventKeys
+            QUARANTINE_LATE_EVENT: An event arrives after later events of its key have left the reorder buffer
+            QUARANTINE_UNKNOWN_EVENT: The event isn't in eventKeys or has no time
+
+        :param str keyColumn: Column key of the value which identifies who the events belong to (e.g. 'machineId')
+        :param str timeColumn: Column key of the event time
+        :param str eventColumn: Column key of the event type
+        :param dict eventKeys: A key/value pair of event type and the session key its time is saved as, in the order the
+        events should happen. Example:
+            {'Machine broke': 'brokeDateTime', 'Machine is fixed': 'fixedDateTime'}
+        :param iterable sessionColumns: Column keys copied to the session from its first event (e.g. 'machineType')
+        :param timedelta reorderWindow: How far an event can be behind the latest event of its key and still be put
+        in order. Events are held for this long (in event time) before they're added to a session. If not provided,
+        the events of each key must be in order.
+        :param function quarantineFn: If provided, called with {'reason': , 'record': } for each quarantined session or
+        event. Otherwise they're saved in quarantinedRecords, which grows with the number of bad records.
+        :param list headers: Header values for each column. Required if records are not dictionaries.
+        """
+        self.keyColumn = keyColumn
+        self.timeColumn = timeColumn
+        self.eventColumn = eventColumn
+        self.eventKeys = eventKeys
+        self.sessionEventKeys = tuple(eventKeys.values())
+        self.sessionColumns = tuple(sessionColumns)
+        self.reorderWindow = reorderWindow
+        self.quarantineFn = quarantineFn
+        self.quarantinedRecords = []
+        self.keyStates = {}
+        self.eventCount = 0
+
+        headerIndexes = {header: idx for idx, header in enumerate(headers or ())}
+        self.getValue = lambda record, column: (
+            record[column] if isinstance(record, dict) else record[headerIndexes[column]]
+        )
+
+    def add(self, record):
+        """ Add an event
+        :return: list of sessions completed by the events released from the reorder buffer
+        """
+        eventTime = self.getValue(record, self.timeColumn)
+        if eventTime is None or self.getValue(record, self.eventColumn) not in self.eventKeys:
+            self.quarantine(record, QUARANTINE_UNKNOWN_EVENT)
+            return []
+
+        key = self.getValue(record, self.keyColumn)
+        keyState = self.keyStates.get(key)
+        if keyState is None:
+            keyState = KeyState()
+            self.keyStates[key] = keyState
+        if keyState.releasedTime is not None and eventTime < keyState.releasedTime:
+            self.quarantine(record, QUARANTINE_LATE_EVENT)
+            return []
+
+        # The event count keeps events with the same time in the order they arrived
+        heapq.heappush(keyState.buffer, (eventTime, self.eventCount, record))
+        self.eventCount += 1
+        if keyState.maxTime is None or eventTime > keyState.maxTime:
+            keyState.maxTime = eventTime
+
+        releaseTime = keyState.maxTime - self.reorderWindow if self.reorderWindow else keyState.maxTime
+        sessions = []
+        while keyState.buffer and keyState.buffer[0][0] <= releaseTime:
+            session = self.releaseEvent(key, keyState)
+            if session:
+                sessions.append(session)
+        return sessions
+
+    def releaseEvent(self, key, keyState):
+        """ Add the earliest buffered event of a key to its open session
+        :return: dict|None: The session if it's complete and in order
+        """
+        eventTime, _, record = heapq.heappop(keyState.buffer)
+        keyState.releasedTime = eventTime
+        eventKey = self.eventKeys[self.getValue(record, self.eventColumn)]
+
+        session = keyState.session
+        if session is not None and eventKey in session:
+            self.quarantine(session, QUARANTINE_MISSING_EVENTS)
+            session = None
+        if session is None:
+            session = {self.keyColumn: key}
+            for column in self.sessionColumns:
+                session[column] = self.getValue(record, column)
+            keyState.session = session
+        session[eventKey] = eventTime
+
+        if any(sessionEventKey not in session for sessionEventKey in self.sessionEventKeys):
+            return None
+        keyState.session = None
+        if not self.isInOrder(session):
+            self.quarantine(session, QUARANTINE_OUT_OF_ORDER)
+            return None
+        return session
+
+    def isInOrder(self, session):
+        eventTimes = [session[eventKey] for eventKey in self.sessionEventKeys]
+        return all(eventTime <= nextEventTime for eventTime, nextEventTime in zip(eventTimes, eventTimes[1:]))
+
+    def flush(self):
+        """ Release every buffered event and quarantine the sessions which are still open. Call once the stream ends.
+        :return: list of sessions completed by the released events
+        """
+        sessions = []
+        for key, keyState in self.keyStates.items():
+            while keyState.buffer:
+                session = self.releaseEvent(key, keyState)
+                if session:
+                    sessions.append(session)
+            if keyState.session is not None:
+                self.quarantine(keyState.session, QUARANTINE_MISSING_EVENTS)
+                keyState.session = None
+        return sessions
+
+    def iterSessions(self, records):
+        """ Yield the sessions from a stream of events, then flush once the stream ends
+        :return: generator
+        """
+        for record in records:
+            yield from self.add(record)
+        yield from self.flush()
+
+    def quarantine(self, record, reason):
+        logger.debug('Quarantined (%s): %s', reason, record)
+        quarantinedRecord = {'reason': reason, 'record': record}
+        if self.quarantineFn:
+            self.quarantineFn(quarantinedRecord)
+        else:
+            self.quarantinedRecords.append(quarantinedRecord)
+
+
+def sessionizePartition(partitionConfig):
+    """ Get the sessions and quarantined records of one partition of events. Used by worker processes so it only
+    takes arguments which can be pickled.
+    :param tuple partitionConfig: (records, EventSessionizer keyword arguments)
+    :return: tuple of (sessions, quarantined records)
+    """
+    records, sessionizerArgs = partitionConfig
+    sessionizer = EventSessionizer(**sessionizerArgs)
+    sessions = list(sessionizer.iterSessions(records))
+    return sessions, sessionizer.quarantinedRecords
+
+
+def getPartitionedSessions(records, workers, keyColumn, timeColumn, eventColumn, eventKeys, sessionColumns=(),
+                           reorderWindow=None, headers=None):
+    """ Sessionize events in worker processes. Events are partitioned by key so every event of a key is handled by
+    the same worker. Takes the same arguments as EventSessionizer.
+    :param int workers: The number of worker processes and partitions
+    :return: tuple of (sessions sorted by the time of their first event, quarantined records)
+    """
+    sessionizerArgs = {
+        'keyColumn': keyColumn, 'timeColumn': timeColumn, 'eventColumn': eventColumn, 'eventKeys': eventKeys,
+        'sessionColumns': sessionColumns, 'reorderWindow': reorderWindow, 'headers': headers
+    }
+    keyIdx = None if headers is None else list(headers).index(keyColumn)
+    partitions = [[] for _ in range(workers)]
+    for record in records:
+        key = record[keyColumn] if isinstance(record, dict) else record[keyIdx]
+        partitions[hash(key) % workers].append(record)
+
+    sessions = []
+    quarantinedRecords = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partitionConfigs = [(partition, sessionizerArgs) for partition in partitions]
+        for partitionSessions, partitionQuarantinedRecords in executor.map(sessionizePartition, partitionConfigs):
+            sessions.extend(partitionSessions)
+            quarantinedRecords.extend(partitionQuarantinedRecords)
+
+    firstEventKey = next(iter(eventKeys.values()))
+    sessions.sort(key=lambda session: session[firstEventKey])
+    return sessions, quarantinedRecords
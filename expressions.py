@@ -0,0 +1,270 @@
+import operator
+from datetime import datetime
+
+from importer.importCache import getDataTypeKey, getValueKey
+
+
+class Expression:
+    """A calculation over the columns of a row which is compiled once and evaluated for every row during import.
+    Expressions are built with column() and Python operators. If any value used in a calculation is None, the
+    result is None.
+    Example:
+        {'unitProfit': column('unitPrice') * (1 - column('discountPct')) - column('unitCost')}
+    """
+
+    def compile(self, headerIndexes):
+        """ Get a function which evaluates the expression for a list of row values
+        :param dict headerIndexes: A key/value pair of header and its index in the row values
+        :return: function
+        """
+        raise NotImplementedError
+
+    def getSourceColumns(self):
+        """ Get the headers of the columns used by the expression
+        :return: set
+        """
+        raise NotImplementedError
+
+    def getKey(self):
+        """ Get a string which identifies the expression across runs. Used in import cache keys. Raises a ValueError
+        if a function or constant can't be identified across runs (see importCache.getDataTypeKey).
+        :return: str
+        """
+        raise NotImplementedError
+
+    def __add__(self, other):
+        return OperatorExpression(operator.add, self, other)
+
+    def __radd__(self, other):
+        return OperatorExpression(operator.add, other, self)
+
+    def __sub__(self, other):
+        return OperatorExpression(operator.sub, self, other)
+
+    def __rsub__(self, other):
+        return OperatorExpression(operator.sub, other, self)
+
+    def __mul__(self, other):
+        return OperatorExpression(operator.mul, self, other)
+
+    def __rmul__(self, other):
+        return OperatorExpression(operator.mul, other, self)
+
+    def __truediv__(self, other):
+        return OperatorExpression(operator.truediv, self, other)
+
+    def __rtruediv__(self, other):
+        return OperatorExpression(operator.truediv, other, self)
+
+    def date(self):
+        """ Truncate a datetime to its date """
+        return FunctionExpression(datetime.date, self)
+
+    def totalMinutes(self):
+        """ Convert a timedelta (e.g. the difference of two datetime columns) to minutes """
+        return FunctionExpression(getTotalMinutes, self)
+
+
+class ColumnExpression(Expression):
+
+    def __init__(self, header):
+        self.header = header
+
+    def compile(self, headerIndexes):
+        if self.header not in headerIndexes:
+            raise ValueError(f'Unknown column: {self.header}')
+        return operator.itemgetter(headerIndexes[self.header])
+
+    def getSourceColumns(self):
+        return {self.header}
+
+    def getKey(self):
+        return repr(self)
+
+    def __repr__(self):
+        return f'column({self.header!r})'
+
+
+class ConstantExpression(Expression):
+
+    def __init__(self, val):
+        self.val = val
+
+    def compile(self, headerIndexes):
+        val = self.val
+        return lambda values: val
+
+    def getSourceColumns(self):
+        return set()
+
+    def getKey(self):
+        return getValueKey(self.val)
+
+    def __repr__(self):
+        return repr(self.val)
+
+
+class OperatorExpression(Expression):
+
+    def __init__(self, operatorFn, left, right):
+        self.operatorFn = operatorFn
+        self.left = getExpression(left)
+        self.right = getExpression(right)
+
+    def compile(self, headerIndexes):
+        operatorFn = self.operatorFn
+        # Constants are bound directly so they aren't evaluated for every row
+        if isinstance(self.right, ConstantExpression):
+            getLeft, right = self.left.compile(headerIndexes), self.right.val
+
+            def evaluate(values):
+                left = getLeft(values)
+                return None if left is None else operatorFn(left, right)
+        elif isinstance(self.left, ConstantExpression):
+            left, getRight = self.left.val, self.right.compile(headerIndexes)
+
+            def evaluate(values):
+                right = getRight(values)
+                return None if right is None else operatorFn(left, right)
+        else:
+            getLeft, getRight = self.left.compile(headerIndexes), self.right.compile(headerIndexes)
+
+            def evaluate(values):
+                left = getLeft(values)
+                right = getRight(values)
+                return None if left is None or right is None else operatorFn(left, right)
+        return evaluate
+
+    def getSourceColumns(self):
+        return self.left.getSourceColumns() | self.right.getSourceColumns()
+
+    def getKey(self):
+        return f'{self.operatorFn.__name__}({self.left.getKey()}, {self.right.getKey()})'
+
+    def __repr__(self):
+        return f'{self.operatorFn.__name__}({self.left!r}, {self.right!r})'
+
+
+class FunctionExpression(Expression):
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = tuple(getExpression(arg) for arg in args)
+
+    def compile(self, headerIndexes):
+        fn = self.fn
+        argFns = [arg.compile(headerIndexes) for arg in self.args]
+        if len(argFns) == 1:
+            getArg = argFns[0]
+
+            def evaluate(values):
+                arg = getArg(values)
+                return None if arg is None else fn(arg)
+        else:
+            def evaluate(values):
+                args = [getArg(values) for getArg in argFns]
+                return None if None in args else fn(*args)
+        return evaluate
+
+    def getSourceColumns(self):
+        sourceColumns = set()
+        for arg in self.args:
+            sourceColumns |= arg.getSourceColumns()
+        return sourceColumns
+
+    def getKey(self):
+        return f'{getDataTypeKey(self.fn)}({", ".join(arg.getKey() for arg in self.args)})'
+
+    def __repr__(self):
+        return f'{getattr(self.fn, "__qualname__", repr(self.fn))}({", ".join(repr(arg) for arg in self.args)})'
+
+
+def getTotalMinutes(timeDelta):
+    return timeDelta.total_seconds() / 60
+
+
+def getExpression(val):
+    return val if isinstance(val, Expression) else ConstantExpression(val)
+
+
+def column(header):
+    """ Get an expression for the value of a column
+    :param str header: The processed header of the column
+    :return: ColumnExpression
+    """
+    return ColumnExpression(header)
+
+
+def applyFunction(fn, *args):
+    """ Get an expression which calls fn with the value of each argument
+    Example:
+        applyFunction(getDateTimeDiff, column('processingEndTime'), column('processingStartTime'))
+    :param function fn: The function to call. Must be importable (e.g. not a lambda) if used with workers.
+    :param args: Expressions or constant values
+    :return: FunctionExpression
+    """
+    return FunctionExpression(fn, *args)
+
+
+def getRequiredHeaders(columns, derivedColumns=None):
+    """ Get every header needed to build the columns, including the sources of derived columns
+    :param list columns: Headers from the file or derivedColumns
+    :param dict derivedColumns: A key/value pair of new header and Expression
+    :return: set
+    """
+    derivedColumns = derivedColumns or {}
+    requiredHeaders = set()
+    remainingHeaders = list(columns)
+    while remainingHeaders:
+        header = remainingHeaders.pop()
+        if header in requiredHeaders:
+            continue
+        requiredHeaders.add(header)
+        if header in derivedColumns:
+            remainingHeaders.extend(derivedColumns[header].getSourceColumns())
+    return requiredHeaders
+
+
+def getDerivedRowFn(headers, derivedColumns=None, columns=None):
+    """ Get a function which adds derived values to a list of converted row values and drops columns that aren't
+    needed. Derived columns are evaluated in order so they can use derived columns defined before them.
+    :param list headers: Processed header values from the file
+    :param dict derivedColumns: A key/value pair of new header and Expression
+    :param list columns: If provided, only these headers (from the file or derivedColumns) are kept, in this order
+    :return: tuple of (output headers, function or None if the row values don't change)
+    """
+    derivedColumns = derivedColumns or {}
+    allHeaders = list(headers)
+    headerIndexes = {header: idx for idx, header in enumerate(allHeaders)}
+    derivedFns = []
+    for header, expression in derivedColumns.items():
+        derivedFns.append(expression.compile(headerIndexes))
+        headerIndexes[header] = len(allHeaders)
+        allHeaders.append(header)
+
+    if columns is None:
+        outputHeaders = allHeaders
+        getOutputValues = None
+    else:
+        missingColumns = [header for header in columns if header not in headerIndexes]
+        if missingColumns:
+            raise ValueError(f'Unknown columns: {missingColumns}')
+        outputHeaders = list(columns)
+        outputIndexes = [headerIndexes[header] for header in columns]
+        getOutputValues = lambda values: [values[idx] for idx in outputIndexes]
+
+    if not derivedFns and not getOutputValues:
+        return outputHeaders, None
+
+    headerCount = len(headers)
+
+    def deriveValues(values):
+        # Short rows (e.g. a blank line at the end of a CSV file) are padded with None like a row with empty cells so
+        # each derived value is added in its own column
+        if len(values) < headerCount:
+            values.extend([None] * (headerCount - len(values)))
+        for derivedFn in derivedFns:
+            values.append(derivedFn(values))
+        return getOutputValues(values) if getOutputValues else values
+
+    return outputHeaders, deriveValues
@@ -1,33 +1,146 @@
 import csv
+import glob
+import logging
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import date
+from itertools import chain, islice
+from operator import itemgetter
 from openpyxl import load_workbook, Workbook
 
 from importer import *
+from importer.columnarTable import ColumnarTable, getColumnFromValues
+from importer.csvChunks import getCsvChunkOffsets, processCsvChunk
+from importer.converters import getColumnConverter, getRowBuilder, getRowProcessor
+from importer.groupIndex import GroupIndex
+from importer.dataIndex import getDataIndex
+from importer.expressions import ConstantExpression
+from importer.importCache import ImportCache
+from importer.instrumentation import getPhase
+from importer.groupStatistics import GroupStatistics
+from importer.pivotTable import PivotTable
+
+logger = logging.getLogger(__name__)
+
+
+class DataStream:
+
+    def __init__(self, fileImporter, rowLimit=None, rowFilterFn=None):
+        """A lazy, re-iterable view of the processed records in a file. Each iteration reads the file
+        from the start and yields one processed row at a time so memory use does not grow with file size.
+
+        :param FileImporter fileImporter: The FileImporter used to read and process each row
+        :param int rowLimit: The number of rows to get from the import file
+        :param function rowFilterFn: A function which returns True if a row should be included
+        """
+        self.fileImporter = fileImporter
+        self.rowLimit = rowLimit
+        self.rowFilterFn = rowFilterFn
+
+    def __iter__(self):
+        return self.fileImporter.iterData(self.rowLimit, self.rowFilterFn)
 
 
 class FileImporter:
 
     def __init__(self, filePath, defaultHeaders=None, defaultDataTypes=None, rowDataType=ROW_TYPE_DICT,
-                 noneStrings=DEFAULT_NONE_STRINGS, rowLimit=None, rowFilterFn=None):
+                 noneStrings=DEFAULT_NONE_STRINGS, rowLimit=None, rowFilterFn=None, isStreaming=False,
+                 workers=None, sheet=None, cacheDir=None, indexes=None, watermark=None, derivedColumns=None,
+                 columns=None, readFilterColumns=None, readFilterFn=None, profiler=None, sourceColumn=None):
         """A class used to read, scrub, analyze, and write data from/to Excel and CSV
 
-        :param str filePath: Name of the file to read
+        :param str|list filePath: Name of the file to read. Can also be a list of files or a glob pattern (e.g.
+        'MachineBreakdownData_*.csv') to import files with the same headers as one dataset. Rows are in the order of
+        the list, or sorted file name order for a pattern. The files are read concurrently in threads, or in worker
+        processes if workers is provided.
         :param dict defaultHeaders: A key/value pair of header in raw file and the new name of header
         :param dict defaultDataTypes: A key/value pair of header and the function or data type to convert each value to
-        :param str rowDataType: A string indicating the data type that each row should be processed as
+        :param str rowDataType: A string indicating the data type that each row should be processed as. If
+        ROW_TYPE_COLUMNAR, self.data will be a ColumnarTable which stores each column in a typed array.
         :param iterable noneStrings: String values that should be converted to None
         :param int rowLimit: The number of rows to get from the import file
         :param function rowFilterFn: A function which returns True if a row should be included
+        :param bool isStreaming: If true, data will not be loaded into memory. self.data will be a DataStream
+        which reads and processes one row at a time each time it is iterated over.
+        :param int workers: If provided, a CSV file will be split into chunks which are converted in this many
+        worker processes. Every defaultDataTypes function must be importable by the workers (e.g. not a lambda).
+        When importing multiple files, CSV chunks and XLSX files from every file are shared by the workers.
+        :param str|int sheet: The name or index of the worksheet to read from an XLSX file. Defaults to the active sheet.
+        :param str cacheDir: If provided, converted data is cached in this directory. Later imports of the same
+        unchanged file with the same headers, data types, and none strings load from the cache instead of
+        converting the file again. Not used with rowLimit, isStreaming, watermark, or multiple files, or if a data
+        type, derived column, or filter function uses a value which can't be identified across runs (see
+        importCache.getDataTypeKey).
+        :param dict indexes: A key/value pair of header and INDEX_TYPE_HASH (for equality lookups) or INDEX_TYPE_SORTED
+        (for range lookups) used to build indexes once the data is loaded. See query. Not supported with isStreaming.
+        :param ImportWatermark watermark: If provided, files which haven't changed since an earlier run aren't read,
+        rows already imported from files which have grown are skipped before they are converted, and the watermark is
+        updated to the last row read. If there are no new rows the data is empty. Call watermark.save() once the new
+        data has been processed. Ignored if isStreaming is true. If provided, cacheDir isn't used and the new rows are
+        always read from the file.
+        :param dict derivedColumns: A key/value pair of new header and Expression (see importer.expressions) which is
+        evaluated for each row as it's converted, so derived values don't need a second pass over the data. Derived
+        columns can use columns from the file and derived columns defined before them.
+        Example:
+            {
+                'unitDiscountPrice': column('unitPrice') * (1 - column('discountPct')),
+                'unitProfit': column('unitDiscountPrice') - column('unitCost'),
+                'purchaseDate': column('purchaseDateTime').date()
+            }
+        :param list columns: If provided, only these headers (from the file or derivedColumns) are kept in each row,
+        in this order. Cells which aren't needed for these columns are never converted.
+        :param list readFilterColumns: Headers from the file used by readFilterFn. Required if readFilterFn is provided.
+        :param function readFilterFn: A function which takes a dict of the converted readFilterColumns values and
+        returns True if a row should be included. Unlike rowFilterFn, it runs before the rest of the row is
+        converted so rows which are filtered out are never fully parsed. Must be importable if used with workers.
+        :param Profiler profiler: If provided, the time spent opening, reading, converting, filtering, grouping,
+        joining, and writing is recorded in the profiler (see importer.instrumentation). Headers and the types of
+        the first row are logged with the logging module instead of printed.
+        :param str sourceColumn: If provided, a column with this header is added to each row with the name of the file
+        the row was read from
         """
+        self.filePaths = self.getFilePaths(filePath)
+        self.filePath = self.filePaths[0]
+        self.sheet = sheet
         self.defaultHeaders = defaultHeaders
         self.defaultDataTypes = defaultDataTypes
         self.rowDataType = rowDataType
-        self.noneStrings = noneStrings
+        self.noneStrings = frozenset(noneString.lower() for noneString in noneStrings)
+        self.workers = workers
+        self.watermark = watermark if not isStreaming else None
+        self.isTypesPrinted = False
+        self.importCache = None
+        self.cacheKey = None
+        self.dataIndexes = {}
+        self.isStreaming = isStreaming
+        self.sourceColumn = sourceColumn
+        self.derivedColumns = derivedColumns
+        # The source column is a constant derived column so it works with columns, workers, and the cache
+        self.derivedColumns = self.getFileDerivedColumns(self.filePath)
+        self.columns = columns
+        self.readFilterColumns = readFilterColumns
+        self.readFilterFn = readFilterFn
+        self.profiler = profiler
+
+        with getPhase(profiler, 'open'):
+            self.fileReader = self.getFileReader(self.filePath)
+        with getPhase(profiler, 'headers'):
+            self.fileHeaders = self.processHeaders(list(next(self.fileReader)))
+            if len(self.filePaths) > 1:
+                self.checkFileHeaders()
+            self.setColumnConverters()
+        logger.info('Headers: %s', self.headers)
+        if isStreaming:
+            self.data = DataStream(self, rowLimit, rowFilterFn)
+        elif cacheDir and not rowLimit and not watermark and len(self.filePaths) == 1:
+            self.data = self.getCachedData(cacheDir, rowFilterFn)
+        else:
+            self.data = self.getData(rowLimit, rowFilterFn)
 
-        self.fileReader = self.getFileReader(filePath)
-        self.headers = self.processHeaders(list(next(self.fileReader)))
-        print(f'Headers: {self.headers}')
-        self.data = self.getData(rowLimit, rowFilterFn)
+        if indexes:
+            self.setDataIndexes(indexes)
 
     ##### READ DATA #########
     def printRows(self, numRows):
@@ -38,71 +151,360 @@ class FileImporter:
 
     def getData(self, rowLimit, rowFilterFn):
         """ Get all row data from the file import and return a processed list of records
+        :return: list|ColumnarTable
+        """
+        if self.rowDataType == ROW_TYPE_COLUMNAR:
+            return self.getColumnarTable(self.iterData(rowLimit, rowFilterFn))
+        return list(self.iterData(rowLimit, rowFilterFn))
+
+    def getColumnarTable(self, processedRows):
+        table = ColumnarTable(self.headers, self.defaultDataTypes)
+        for processedRow in processedRows:
+            table.appendRow(processedRow.values() if isinstance(processedRow, dict) else processedRow)
+
+        # Derived columns don't have a data type so their storage is picked once every value is known
+        for header in self.derivedColumns or ():
+            if header in table.columns:
+                table.columns[header] = getColumnFromValues(list(table[header]))
+        return table
+
+    def getCachedData(self, cacheDir, rowFilterFn):
+        """ Get data from the import cache. If the file isn't cached yet, every row is converted and saved to the
+        cache before rowFilterFn is applied so the cache can be used with any filter.
+        :return: list|ColumnarTable
+        """
+        importCache = ImportCache(cacheDir)
+        try:
+            cacheKey = importCache.getKey(self.filePath, self.defaultHeaders, self.defaultDataTypes, self.noneStrings,
+                                          self.sheet, self.derivedColumns, self.columns, self.readFilterColumns,
+                                          self.readFilterFn)
+        except ValueError as error:
+            # Cached data could have been converted by a different version of a function that can't be identified
+            logger.info('Import cache not used: %s', error)
+            return self.getData(None, rowFilterFn)
+        if not rowFilterFn:
+            # Indexes can only be reused from the cache if they describe every row
+            self.importCache = importCache
+            self.cacheKey = cacheKey
+        with getPhase(self.profiler, 'cacheLoad'):
+            table = importCache.load(cacheKey)
+        if table:
+            self.closeFile()
+        else:
+            table = self.getColumnarTable(self.iterData(None, None))
+            with getPhase(self.profiler, 'cacheSave'):
+                importCache.save(cacheKey, table)
+
+        if self.rowDataType == ROW_TYPE_COLUMNAR:
+            if not rowFilterFn:
+                return table
+            return self.getColumnarTable(row for row in table.iterRows() if rowFilterFn(row))
+        rows = table.iterRows(self.rowDataType)
+        return [row for row in rows if rowFilterFn(row)] if rowFilterFn else list(rows)
+
+    def iterData(self, rowLimit, rowFilterFn):
+        """ Yield processed records one at a time. The file is re-opened if it has already been read
+        so the data can be iterated over more than once.
+        :return: generator
+        """
+        if self.profiler and rowFilterFn:
+            rowFilterFn = self.profiler.getTimedFn('filter', rowFilterFn)
+
+        fileRows = self.iterFileRows(rowLimit)
+        try:
+            rowCount = 0
+            for filePath, startRow, processedRows in fileRows:
+                if self.profiler:
+                    # Only the time spent reading and converting rows is recorded, not the time spent by the consumer
+                    processedRows = self.profiler.getTimedIterator('read', processedRows)
+                rowsRead = 0
+                for processedRow in processedRows:
+                    if rowLimit and rowCount == rowLimit:
+                        break
+                    rowsRead += 1
+                    # Rows filtered out by readFilterFn are None
+                    if processedRow is None:
+                        continue
+                    if not self.isTypesPrinted:
+                        self.printTypes(processedRow)
+                    if rowFilterFn and not rowFilterFn(processedRow):
+                        continue
+                    rowCount += 1
+                    yield processedRow
+
+                if self.watermark:
+                    self.watermark.setRowCount(filePath, startRow + rowsRead)
+                if rowLimit and rowCount == rowLimit:
+                    break
+                if self.profiler:
+                    self.profiler.addCounts('read', byteCount=os.path.getsize(filePath))
+        finally:
+            fileRows.close()
+
+    def iterFileRows(self, rowLimit):
+        """ Yield (filePath, startRow, processed rows) for each file in order. Files and rows already imported in
+        an earlier run (see watermark) are skipped before they are converted, so the processed rows start at startRow
+        and files which haven't changed aren't yielded.
+        :return: generator
+        """
+        fileStartRows = self.getFileStartRows()
+        if len(self.filePaths) > 1:
+            yield from self.iterMultiFileRows(fileStartRows, rowLimit)
+            return
+        if not fileStartRows:
+            self.closeFile()
+            return
+
+        # Each iteration reads from its own file so a DataStream can be iterated over by several loops at once. The
+        # first iteration takes over the file opened to read the headers.
+        if self.fileReader:
+            file, fileReader = self.file, self.fileReader
+            self.file = self.fileReader = None
+        else:
+            file, fileReader = self.openFile(self.filePath)
+            next(fileReader)  # Skip the headers which have already been processed
+
+        startRow = fileStartRows[0][1]
+        parallelRows = None
+        if self.workers and self.fileType == FILE_TYPE_CSV:
+            parallelRows = self.iterParallelRows(startRow)
+            processedRows = parallelRows
+        else:
+            processedRows = map(self.processRow, islice(fileReader, startRow, None))
+        try:
+            yield self.filePath, startRow, processedRows
+        finally:
+            file.close()
+            if parallelRows:
+                parallelRows.close()
+
+    def iterMultiFileRows(self, fileStartRows, rowLimit):
+        """ Yield (filePath, startRow, processed rows) for each file of a multi-file import. Every file is submitted
+        to a thread pool (or a process pool if self.workers is set) up front so reading and converting the files
+        overlaps, and the results are yielded in file order. Streaming imports and imports with a rowLimit read one
+        file at a time instead so only one file is held in memory.
+        :param list fileStartRows: (filePath, startRow) for each file to import. See getFileStartRows.
+        :return: generator
+        """
+        # The first file is only opened to read its headers
+        self.closeFile()
+        if not fileStartRows:
+            return
+        if self.isStreaming or rowLimit:
+            for filePath, startRow in fileStartRows:
+                fileRows = iterImportFileRows(self.getFileConfig(filePath, startRow))
+                try:
+                    yield filePath, startRow, fileRows
+                finally:
+                    fileRows.close()
+            return
+
+        if self.workers:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            # Threads overlap the time spent waiting on file reads. Conversion needs the workers for CPU parallelism.
+            executor = ThreadPoolExecutor(max_workers=min(len(fileStartRows), MAX_IMPORT_FILE_THREADS))
+        try:
+            fileFutures = []
+            for filePath, startRow in fileStartRows:
+                if self.workers and self.getFileType(filePath) == FILE_TYPE_CSV:
+                    futures = [executor.submit(processCsvChunk, chunkConfig)
+                               for chunkConfig in self.getCsvChunkConfigs(filePath, startRow)]
+                else:
+                    futures = [executor.submit(processImportFile, self.getFileConfig(filePath, startRow))]
+                fileFutures.append(futures)
+
+            for (filePath, startRow), futures in zip(fileStartRows, fileFutures):
+                yield filePath, startRow, chain.from_iterable(future.result() for future in futures)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def iterParallelRows(self, startRow=0):
+        """ Yield processed rows from a CSV file which is split into chunks and converted in worker processes.
+        Chunks are yielded in the same order as the file. Only PARALLEL_CSV_CHUNKS_PER_WORKER chunks for each worker
+        are submitted at a time, and another is submitted as each one is read.
+        :param int startRow: The number of rows to skip before the first chunk
+        :return: generator
+        """
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            chunkConfigs = iter(self.getCsvChunkConfigs(self.filePath, startRow))
+            futures = deque(
+                executor.submit(processCsvChunk, chunkConfig)
+                for chunkConfig in islice(chunkConfigs, self.workers * PARALLEL_CSV_CHUNKS_PER_WORKER)
+            )
+            while futures:
+                processedRows = futures.popleft().result()
+                for chunkConfig in islice(chunkConfigs, 1):
+                    futures.append(executor.submit(processCsvChunk, chunkConfig))
+                yield from processedRows
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def getCsvChunkConfigs(self, filePath, startRow=0):
+        """ Get the arguments of processCsvChunk for each chunk of a CSV file. The first startRow rows aren't
+        included in any chunk.
         :return: list
         """
-        data = []
-        for idx, row in enumerate(self.fileReader):
-            if rowLimit and len(data) == rowLimit:
-                break
-            processedRow = self.processRow(row)
-            if idx == 0:
-                headersAndVals = zip(self.headers, processedRow) if self.rowDataType != ROW_TYPE_DICT else processedRow.items()
-                for header, val in headersAndVals:
-                    print(f'{header} type is {type(val)}')
-            if rowFilterFn and not rowFilterFn(processedRow):
-                continue
-            data.append(processedRow)
+        return [
+            (filePath, start, end, self.fileHeaders, self.defaultDataTypes, self.noneStrings, self.rowDataType,
+             self.getFileDerivedColumns(filePath), self.columns, self.readFilterColumns, self.readFilterFn)
+            for start, end in getCsvChunkOffsets(filePath, PARALLEL_CSV_CHUNK_SIZE, startRow)
+        ]
 
-        # CSV file must be closed manually
-        if self.fileType == FILE_TYPE_CSV:
-            self.file.close()
+    def getFileConfig(self, filePath, startRow=0):
+        """ Get the arguments of processImportFile for one file of a multi-file import
+        :param int startRow: The number of rows to skip before they are converted
+        :return: tuple
+        """
+        return (filePath, self.defaultHeaders, self.defaultDataTypes, self.noneStrings, self.rowDataType, self.sheet,
+                self.getFileDerivedColumns(filePath), self.columns, self.readFilterColumns, self.readFilterFn,
+                startRow)
 
-        return data
+    def getFileDerivedColumns(self, filePath):
+        """ Get derivedColumns with the value of the source column (if any) set to the name of filePath
+        :return: dict
+        """
+        if not self.sourceColumn:
+            return self.derivedColumns
+        derivedColumns = dict(self.derivedColumns or {})
+        derivedColumns[self.sourceColumn] = ConstantExpression(os.path.basename(filePath))
+        return derivedColumns
+
+    def getFileStartRows(self):
+        """ Get (filePath, number of rows imported in an earlier run) for each file to import. Files which haven't
+        changed since they were imported (see watermark) are left out.
+        :return: list
+        """
+        if not self.watermark:
+            return [(filePath, 0) for filePath in self.filePaths]
+        return [
+            (filePath, self.watermark.getRowCount(filePath))
+            for filePath in self.watermark.getNewFilePaths(self.filePaths)
+        ]
+
+    def printTypes(self, processedRow):
+        self.isTypesPrinted = True
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        headersAndVals = processedRow.items() if isinstance(processedRow, dict) else zip(self.headers, processedRow)
+        for header, val in headersAndVals:
+            logger.info('%s type is %s', header, type(val))
+
+    def closeFile(self):
+        # CSV files and read-only workbooks must be closed manually
+        if self.file:
+            self.file.close()
+        self.file = self.fileReader = None
 
     def processRow(self, row):
         """ Process the row into the data type specified by FileImporter
-        :return: list|tuple|dict
-        """
-        processedRow = []
-        for header, val in zip(self.headers, row):
-            defaultDataType = self.defaultDataTypes.get(header) if self.defaultDataTypes else None
-            processedRow.append(self.processValue(val, defaultDataType))
-        if self.rowDataType == ROW_TYPE_LIST:
-            return processedRow
-        if self.rowDataType == ROW_TYPE_DICT:
-            return {header: val for header, val in zip(self.headers, processedRow)}
-        if self.rowDataType == ROW_TYPE_TUPLE:
-            return tuple(processedRow)
+        :return: list|tuple|dict|None (if the row is filtered out by readFilterFn)
+        """
+        return self.rowProcessor(row)
 
     def processValue(self, val, defaultDataType):
         """ Get a processed value. Handles None, null strings, and function conversions
         :param func|class defaultDataType: A function or class which converts the value into the appropriate format
         """
-        if val is None:
-            return val
-        if isinstance(val, str):
-            val = val.strip()
-            if val.lower() in self.noneStrings:
-                return None
-        if defaultDataType:
-            val = defaultDataType(val)
-        return val
+        return self.getColumnConverter(defaultDataType)(val)
+
+    def setColumnConverters(self):
+        """ Build the conversion plan once from the processed headers so each row can be run through
+        precompiled converters instead of looking up the data type for every value
+        """
+        self.dateTimeParsers = {}
+        readFilterFn = self.readFilterFn
+        if self.profiler and readFilterFn:
+            readFilterFn = self.profiler.getTimedFn('readFilter', readFilterFn)
+        self.headers, self.rowProcessor = getRowProcessor(
+            self.fileHeaders, self.defaultDataTypes, self.noneStrings, self.rowDataType, self.derivedColumns,
+            self.columns, self.readFilterColumns, readFilterFn, self.dateTimeParsers, self.profiler
+        )
+
+    def getDateTimeParseStats(self):
+        """ Get the detected format and counts of fast path, fallback, and cached parses for each
+        safeDateTimeParse column
+        :return: dict
+        """
+        return {header: parser.getStats() for header, parser in self.dateTimeParsers.items()}
+
+    def getColumnConverter(self, defaultDataType):
+        """ Get a function which converts a single raw value. Handles None, null strings, and function conversions
+        :param func|class defaultDataType: A function or class which converts the value into the appropriate format
+        """
+        return getColumnConverter(defaultDataType, self.noneStrings)
+
+    def getRowBuilder(self):
+        """ Get a function which turns a list of converted values into the row data type
+        """
+        return getRowBuilder(self.rowDataType, self.headers)
 
     def getFileReader(self, filePath):
         """ Get an iterator used to get each row in a CSV or XLSX file
         """
+        self.fileType = self.getFileType(filePath)
+        self.file, fileReader = self.openFile(filePath)
+        return fileReader
+
+    def openFile(self, filePath):
+        """ Open a CSV or XLSX file which is closed by the caller
+        :return: tuple of (file, iterator used to get each row)
+        """
+        if self.getFileType(filePath) == FILE_TYPE_CSV:
+            file = open(filePath)
+            return file, csv.reader(file)
+        # Read-only mode streams rows from the worksheet XML instead of loading every cell into memory
+        workbook = load_workbook(filePath, read_only=True, data_only=True)
+        return workbook, iterPaddedRows(self.getWorksheet(workbook).iter_rows(values_only=True))
+
+    def getFileType(self, filePath):
         if f'.{FILE_TYPE_CSV}' in filePath:
-            self.file = open(filePath)
-            self.fileType = FILE_TYPE_CSV
-            return csv.reader(self.file)
+            return FILE_TYPE_CSV
         elif f'.{FILE_TYPE_XLS}' in filePath:
-            self.file = load_workbook(filePath, data_only=True)
-            worksheet = self.file.active
-            self.fileType = FILE_TYPE_XLS
-            return worksheet.iter_rows(values_only=True)
+            return FILE_TYPE_XLS
         else:
             raise(ValueError('Unsupported file type'))
 
+    def getFilePaths(self, filePath):
+        """ Get the list of files to import from a file name, list of file names, or glob pattern
+        :return: list
+        """
+        if isinstance(filePath, (list, tuple)):
+            filePaths = list(filePath)
+        elif glob.has_magic(filePath):
+            # Sorted so rows are in the same order no matter what order the file system lists the files in
+            filePaths = sorted(glob.glob(filePath))
+        else:
+            filePaths = [filePath]
+        if not filePaths:
+            raise ValueError(f'No files match {filePath}')
+        return filePaths
+
+    def checkFileHeaders(self):
+        """ Raise a ValueError if any file of a multi-file import has different headers than the first file
+        """
+        for filePath in self.filePaths[1:]:
+            # Use a separate file so the first file stays open and the importer's own file state isn't changed
+            file, fileReader = self.openFile(filePath)
+            try:
+                fileHeaders = self.processHeaders(list(next(fileReader)))
+            finally:
+                file.close()
+            if fileHeaders != self.fileHeaders:
+                raise ValueError(
+                    f'Headers in {filePath} {fileHeaders} do not match the headers in {self.filePath} {self.fileHeaders}'
+                )
+
+    def getWorksheet(self, workbook):
+        """ Get the worksheet selected by self.sheet from an open workbook
+        """
+        if self.sheet is None:
+            return workbook.active
+        if isinstance(self.sheet, int):
+            return workbook.worksheets[self.sheet]
+        return workbook[self.sheet]
+
     def processHeaders(self, headers):
         """ Convert headers to formatted names
         """
@@ -121,49 +523,64 @@ class FileImporter:
         return newHeaders
 
     ##### WRITE DATA #########
-    def writeCsvFile(self, fileName, data=None, headers=None):
+    def writeCsvFile(self, fileName, data=None, headers=None, outputPath=None):
         """ Write data to a new CSV file
         :param str fileName: The name of the file to write to. The file extension should not be included.
         :param list data: If provided, will be used instead of the FileImporter's internal data property
         :param list headers: If provided, will be used instead of the FileImporter's internal header property
+        :param str outputPath: The directory to write to, ending with a separator. Defaults to DATA_FILE_OUTPUT_PATH.
         """
-        dataToWrite = data or self.data
-        headersToWrite = headers or self.headers
+        dataToWrite = data if data is not None else self.data
+        headersToWrite = headers if headers is not None else self.headers
 
-        with open(f'{DATA_FILE_OUTPUT_PATH}{fileName}_{date.today()}.csv', 'w') as csvFile:
+        filePath = f'{outputPath or DATA_FILE_OUTPUT_PATH}{fileName}_{date.today()}.csv'
+        with getPhase(self.profiler, 'write:csv'), open(filePath, 'w') as csvFile:
             csvWriter = csv.writer(csvFile)
             csvWriter.writerow(headersToWrite)
+            rowCount = 0
             for row in dataToWrite:
                 csvWriter.writerow(self.formatRow(row))
+                rowCount += 1
+        if self.profiler:
+            self.profiler.addCounts('write:csv', rowCount=rowCount, byteCount=os.path.getsize(filePath))
 
-    def writeExcelFile(self, fileName, sheetsConfig=None):
+    def writeExcelFile(self, fileName, sheetsConfig=None, outputPath=None):
         """ Write data to a new XLSX file and return the workbook
         :param str fileName: The name of the file to write to. The file extension should not be included.
         :param list sheetsConfig: [{'title': , 'data': , 'headers':},...] If provided, will be used instead
-        of the FileImporter's internal data property
+        of the FileImporter's internal data property. Sheet data can be any iterable of rows (e.g. a generator)
+        so rows don't need to be held in memory.
+        :param str outputPath: The directory to write to, ending with a separator. Defaults to DATA_FILE_OUTPUT_PATH.
         """
         if not sheetsConfig:
             return
 
-        workbook = Workbook()
+        # Write-only worksheets stream each row to disk as it is appended instead of keeping every cell in memory
+        workbook = Workbook(write_only=True)
 
-        for idx, config in enumerate(sheetsConfig):
-            # Create new worksheet
-            if idx == 0:
-                worksheet = workbook.active
-            else:
-                worksheet = workbook.create_sheet()
-            worksheet.title = config.get('title', None)
+        for config in sheetsConfig:
+            title = config.get('title', None)
+            with getPhase(self.profiler, f'write:{title}'):
+                worksheet = workbook.create_sheet(title=title)
 
-            # Add data to sheet
-            dataToWrite = config.get('data', None) or self.data
-            headersToWrite = config.get('headers', None) or self.headers
-            worksheet.append(headersToWrite)
-            for row in dataToWrite:
-                worksheet.append(self.formatRow(row))
+                # Add data to sheet
+                # An empty sheet (e.g. no quarantined records) is written with only its headers
+                dataToWrite = config['data'] if config.get('data') is not None else self.data
+                headersToWrite = config['headers'] if config.get('headers') is not None else self.headers
+                worksheet.append(headersToWrite)
+                rowCount = 0
+                for row in dataToWrite:
+                    worksheet.append(self.formatRow(row))
+                    rowCount += 1
+            if self.profiler:
+                self.profiler.addCounts(f'write:{title}', rowCount=rowCount)
 
         # Save and return workbook
-        workbook.save(f'{DATA_FILE_OUTPUT_PATH}{fileName}_{date.today()}.xlsx')
+        filePath = f'{outputPath or DATA_FILE_OUTPUT_PATH}{fileName}_{date.today()}.xlsx'
+        with getPhase(self.profiler, 'write:save'):
+            workbook.save(filePath)
+        if self.profiler:
+            self.profiler.addCounts('write:save', byteCount=os.path.getsize(filePath))
         return workbook
 
     def formatRow(self, row):
@@ -209,18 +626,183 @@ class FileImporter:
         for group in groupings:
             dataGroups[self.getGroupColumnKey(group)] = {}
 
-        for group in groupings:
-            currentGroup = dataGroups[self.getGroupColumnKey(group)]
+        groupKeyFns = [
+            (getDictGroupKey, getSequenceGroupKey, dataGroups[self.getGroupColumnKey(group)])
+            for group, (getDictGroupKey, getSequenceGroupKey) in zip(groupings, self.getGroupKeyFns(groupings, headers))
+        ]
+
+        # Fill every grouping in a single scan of the data
+        with getPhase(self.profiler, 'group'):
             for record in data:
-                if not filterFn or filterFn(record):
-                    groupKey = self.getGroupKey(record, group, headers)
+                if filterFn and not filterFn(record):
+                    continue
+                isDictRecord = isinstance(record, dict)
+                for getDictGroupKey, getSequenceGroupKey, currentGroup in groupKeyFns:
+                    groupKey = getDictGroupKey(record) if isDictRecord else getSequenceGroupKey(record)
                     if groupKey in currentGroup:
                         currentGroup[groupKey].append(record)
                     else:
                         currentGroup[groupKey] = [record]
+        if self.profiler and hasattr(data, '__len__'):
+            self.profiler.addCounts('group', rowCount=len(data))
 
         return dataGroups if not isFlat else list(dataGroups.values())
 
+    def getGroupIndexes(self, groupings, filterFn=None, data=None, headers=None):
+        """Get a compact GroupIndex for each grouping instead of lists of records. Each GroupIndex stores the
+        sorted group keys, an offsets array, and one array of row indexes into data. Takes the same groupings
+        as getGroupData.
+        Example:
+            input: [('sex',), ('occupation', ('age', <function to group>))]
+            output: {
+                ('sex',): <GroupIndex>,
+                ('occupation', 'age'): <GroupIndex>
+            }
+        :param list data: Optionally pass in data records. If not passed in, self.data will be used. Records must
+        be accessible by row index to use the GroupIndex later (e.g. a list or ColumnarTable).
+        :param list headers: Optionally pass in headers. If not passed in, self.headers will be used.
+        :return: dict
+        """
+        data = data or self.data
+        headers = headers or self.headers
+        groupKeyFns = self.getGroupKeyFns(groupings, headers)
+        groupRowIndexes = [{} for _ in groupings]
+
+        for rowIdx, record in enumerate(data):
+            if filterFn and not filterFn(record):
+                continue
+            isDictRecord = isinstance(record, dict)
+            for (getDictGroupKey, getSequenceGroupKey), rowIndexes in zip(groupKeyFns, groupRowIndexes):
+                groupKey = getDictGroupKey(record) if isDictRecord else getSequenceGroupKey(record)
+                if groupKey in rowIndexes:
+                    rowIndexes[groupKey].append(rowIdx)
+                else:
+                    rowIndexes[groupKey] = array('q', (rowIdx,))
+
+        return {
+            self.getGroupColumnKey(group): GroupIndex(rowIndexes)
+            for group, rowIndexes in zip(groupings, groupRowIndexes)
+        }
+
+    def getPivotTable(self, rowGroup, columnGroup, valueColumns, aggregation=GroupStatistics.SUM, filterFn=None,
+                      data=None, headers=None, rowLabels=None, columnLabels=None, fillValue=None):
+        """Get a PivotTable (crosstab) of the aggregated values for each pair of row and column group keys in a single
+        scan of the data. The groups take the same format as a grouping in getGroupData. Keys of groups with a single
+        column are unwrapped, e.g. 'Paint machine' instead of ('Paint machine',).
+        Example:
+            input: ('machineType',), ('brokeDate',), ['brokeToFixedMinutes']
+            output: <PivotTable> with a row for each machine type, a column for each date, and the sum of
+            brokeToFixedMinutes in each cell
+        :param tuple rowGroup: Column keys and/or (<columnKey>, <function>) tuples which make up the row labels
+        :param tuple columnGroup: Column keys and/or (<columnKey>, <function>) tuples which make up the column labels
+        :param list valueColumns: Column keys of the values to aggregate. The table has a matrix for each.
+        :param str aggregation: One of pivotTable.PIVOT_AGGREGATIONS
+        :param function filterFn: A function that returns a boolean value, true indicating that the record value should
+        be included
+        :param list data: Optionally pass in data records. If not passed in, self.data will be used.
+        :param list headers: Optionally pass in headers. If not passed in, self.headers will be used.
+        :param list rowLabels: If provided, the rows of the table in this order, including rows without data
+        :param list columnLabels: If provided, the columns of the table in this order, including columns without data
+        :param fillValue: The value of cells with no data
+        :return: PivotTable
+        """
+        data = data or self.data
+        headers = headers or self.headers
+        (getDictRowKey, getSequenceRowKey), (getDictColumnKey, getSequenceColumnKey) = self.getGroupKeyFns(
+            [rowGroup, columnGroup], headers
+        )
+        getDictValues = self.getGroupKeyFn(tuple(valueColumns))
+        getSequenceValues = self.getGroupKeyFn(tuple(valueColumns), {
+            header: idx for idx, header in enumerate(headers)
+        } if headers else {})
+        isRowUnwrapped = len(rowGroup) == 1
+        isColumnUnwrapped = len(columnGroup) == 1
+
+        def getCell(record):
+            if isinstance(record, dict):
+                rowKey, columnKey, values = getDictRowKey(record), getDictColumnKey(record), getDictValues(record)
+            else:
+                rowKey, columnKey, values = (
+                    getSequenceRowKey(record), getSequenceColumnKey(record), getSequenceValues(record)
+                )
+            return rowKey[0] if isRowUnwrapped else rowKey, columnKey[0] if isColumnUnwrapped else columnKey, values
+
+        records = data if not filterFn else (record for record in data if filterFn(record))
+        with getPhase(self.profiler, 'pivot'):
+            return PivotTable(records, getCell, valueColumns, aggregation=aggregation, rowLabels=rowLabels,
+                              columnLabels=columnLabels, fillValue=fillValue)
+
+    def getGroupKeyFns(self, groupings, headers):
+        """Get a pair of group key functions for each grouping. The first is used for dict records and the
+        second for list or tuple records. Grouping functions are memoized so each distinct value is only
+        formatted once.
+        """
+        memoizedFns = {}
+        headerIndexes = {header: idx for idx, header in enumerate(headers)} if headers else {}
+        groupKeyFns = []
+        for group in groupings:
+            memoizedGroup = self.getMemoizedGroup(group, memoizedFns)
+            groupKeyFns.append((self.getGroupKeyFn(memoizedGroup), self.getGroupKeyFn(memoizedGroup, headerIndexes)))
+        return groupKeyFns
+
+    def getMemoizedGroup(self, group, memoizedFns):
+        """Get a copy of the group where each grouping function is wrapped in a cache. Grouping functions must
+        return the same value every time they are called with the same input.
+        :param tuple group: Tuple of column keys and/or tuple with (<columnKey>, <function>)
+        :param dict memoizedFns: Cached functions that have already been created, keyed by the original function
+        """
+        memoizedGroup = []
+        for column in group:
+            if isinstance(column, tuple):
+                columnKey, groupingFunc = column
+                if groupingFunc not in memoizedFns:
+                    memoizedFns[groupingFunc] = self.getMemoizedFn(groupingFunc)
+                column = (columnKey, memoizedFns[groupingFunc])
+            memoizedGroup.append(column)
+        return tuple(memoizedGroup)
+
+    def getGroupKeyFn(self, group, headerIndexes=None):
+        """Get a function which returns the group key for a record. Used instead of getGroupKey when the same
+        group is applied to many records.
+        :param tuple group: Tuple of column keys and/or tuple with (<columnKey>, <function>)
+        :param dict headerIndexes: If provided, records are treated as lists or tuples and each column key is
+        looked up by its header index
+        """
+        columns = []
+        for column in group:
+            columnKey, groupingFunc = column if isinstance(column, tuple) else (column, None)
+            if headerIndexes is not None:
+                columnKey = headerIndexes.get(columnKey, columnKey)
+            columns.append((columnKey, groupingFunc))
+
+        if not any(groupingFunc for _, groupingFunc in columns):
+            getColumnValues = itemgetter(*(columnKey for columnKey, _ in columns))
+            if len(columns) == 1:
+                return lambda record: (getColumnValues(record),)
+            return getColumnValues
+
+        return lambda record: tuple([
+            groupingFunc(record[columnKey]) if groupingFunc else record[columnKey]
+            for columnKey, groupingFunc in columns
+        ])
+
+    def getMemoizedFn(self, fn):
+        cache = {}
+
+        def memoizedFn(val):
+            try:
+                return cache[val]
+            except KeyError:
+                groupVal = fn(val)
+                if len(cache) < GROUPING_FUNCTION_CACHE_SIZE:
+                    cache[val] = groupVal
+                return groupVal
+            except TypeError:
+                # Unhashable values can't be cached
+                return fn(val)
+
+        return memoizedFn
+
     def setGroupData(self, groupings):
         self.dataGroups = self.getGroupData(groupings)
 
@@ -255,3 +837,203 @@ class FileImporter:
                 val = record[column]
             groupKey.append(val)
         return tuple(groupKey)
+
+    def getJoinData(self, otherData, keys, joinType=JOIN_INNER, columns=None, otherKeys=None, data=None,
+                    headers=None, otherHeaders=None, maxUnmatchedKeys=MAX_UNMATCHED_JOIN_KEYS):
+        """Get a list of records joined with records from another dataset. See iterJoinData.
+        :return: list
+        """
+        with getPhase(self.profiler, 'join'):
+            joinData = list(self.iterJoinData(otherData, keys, joinType=joinType, columns=columns,
+                                              otherKeys=otherKeys, data=data, headers=headers,
+                                              otherHeaders=otherHeaders, maxUnmatchedKeys=maxUnmatchedKeys))
+        if self.profiler:
+            self.profiler.addCounts('join', rowCount=len(joinData))
+        return joinData
+
+    def iterJoinData(self, otherData, keys, joinType=JOIN_INNER, columns=None, otherKeys=None, data=None,
+                     headers=None, otherHeaders=None, maxUnmatchedKeys=MAX_UNMATCHED_JOIN_KEYS):
+        """Join records with records from another dataset. A hash index is built once from otherData, then
+        each record in data is matched against it one at a time. Keys in data with no match in otherData are
+        added to the set self.unmatchedJoinKeys as records are read instead of raising an error, and
+        self.unmatchedJoinCount is the number of records with no match.
+        :param iterable otherData: The records to look up matches in (e.g. customer records)
+        :param str|list keys: One or more column keys to join on
+        :param str joinType: JOIN_INNER returns merged records with a match, JOIN_LEFT returns every record merged
+        with its match or with None values, and JOIN_ANTI returns records (unchanged) which have no match
+        :param list columns: Columns from otherData to add to each record. Defaults to every column that isn't a key.
+        :param str|list otherKeys: Column keys in otherData if they are named differently than keys
+        :param iterable data: Optionally pass in data records. If not passed in, self.data will be used.
+        :param list headers: Optionally pass in headers. If not passed in, self.headers will be used.
+        :param list otherHeaders: Headers for otherData. Required if records in otherData are not dictionaries.
+        :param int maxUnmatchedKeys: The max number of distinct keys kept in self.unmatchedJoinKeys. If None, every
+        unmatched key is kept.
+        Example:
+            input: sales, 'customerKey', columns=['age']
+            output: [{'customerKey': 'a1', 'productName': 'Mountain socks', ..., 'age': 34}, ...]
+        :return: generator
+        """
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        otherKeys = keys if otherKeys is None else ([otherKeys] if isinstance(otherKeys, str) else list(otherKeys))
+        data = data or self.data
+        headers = headers or self.headers
+        joinIndex = self.getJoinIndex(otherData, otherKeys, otherHeaders)
+        if columns is None:
+            columns = self.getJoinColumns(joinIndex, otherKeys)
+        emptyMatch = {column: None for column in columns}
+        self.unmatchedJoinKeys = set()
+        self.unmatchedJoinCount = 0
+
+        getKey = itemgetter(*keys)
+        for record in data:
+            recordDict = record if isinstance(record, dict) else {header: val for header, val in zip(headers, record)}
+            joinKey = getKey(recordDict) if len(keys) > 1 else (getKey(recordDict),)
+            matches = joinIndex.get(joinKey)
+            if not matches:
+                self.unmatchedJoinCount += 1
+                if maxUnmatchedKeys is None or len(self.unmatchedJoinKeys) < maxUnmatchedKeys:
+                    self.unmatchedJoinKeys.add(joinKey)
+                if joinType == JOIN_ANTI:
+                    yield record
+                elif joinType == JOIN_LEFT:
+                    yield {**recordDict, **emptyMatch}
+                continue
+
+            if joinType == JOIN_ANTI:
+                continue
+            for match in matches:
+                yield {**recordDict, **{column: match[column] for column in columns}}
+
+    def getJoinIndex(self, otherData, otherKeys, otherHeaders=None):
+        """Get a hash index of records keyed by the values of otherKeys
+        :return: dict {(<key value>, ...): [<record>, ...]}
+        """
+        getKey = itemgetter(*otherKeys)
+        joinIndex = {}
+        for record in otherData:
+            if not isinstance(record, dict):
+                record = {header: val for header, val in zip(otherHeaders, record)}
+            joinKey = getKey(record) if len(otherKeys) > 1 else (getKey(record),)
+            if joinKey in joinIndex:
+                joinIndex[joinKey].append(record)
+            else:
+                joinIndex[joinKey] = [record]
+        return joinIndex
+
+    def getJoinColumns(self, joinIndex, otherKeys):
+        """Get every column in the indexed records that isn't a key
+        """
+        for matches in joinIndex.values():
+            return [header for header in matches[0] if header not in otherKeys]
+        return []
+
+    def setDataIndexes(self, indexes):
+        """Build (or load from the import cache) an index for each column so query can look up records without
+        scanning the data. If self.data is replaced, this must be called again.
+        :param dict indexes: A key/value pair of header and INDEX_TYPE_HASH or INDEX_TYPE_SORTED
+        """
+        if self.isStreaming:
+            # Streamed data isn't kept, so there are no records for the row indexes to point to
+            raise ValueError('Indexes are not supported when isStreaming is True')
+        self.dataIndexes = {}
+        for column, indexType in indexes.items():
+            self.getDataIndex(column, indexType)
+
+    def getDataIndex(self, column, indexType):
+        """Get the index for a column. The index is built the first time it is used.
+        :return: HashIndex|SortedIndex
+        """
+        dataIndex = self.dataIndexes.get((column, indexType))
+        if dataIndex:
+            return dataIndex
+
+        if self.importCache:
+            dataIndex = self.importCache.loadIndex(self.cacheKey, column, indexType)
+        if not dataIndex:
+            dataIndex = getDataIndex(indexType, self.getColumnValues(column))
+            if self.importCache:
+                self.importCache.saveIndex(self.cacheKey, column, indexType, dataIndex)
+        self.dataIndexes[(column, indexType)] = dataIndex
+        return dataIndex
+
+    def getColumnValues(self, column):
+        """Get every value of a column in row order
+        :return: iterable
+        """
+        if isinstance(self.data, ColumnarTable):
+            return self.data[column]
+        headerIdx = self.headers.index(column) if column in self.headers else None
+        return (record[column] if isinstance(record, dict) else record[headerIdx] for record in self.data)
+
+    def query(self, equals=None, ranges=None):
+        """Get records which match every condition using column indexes instead of scanning the data. Columns
+        without an index get one built the first time they are queried.
+        :param dict equals: A key/value pair of header and the value the column must equal (uses a hash index)
+        :param dict ranges: A key/value pair of header and a tuple of (low, high). Values from low to high
+        (inclusive) are included. Either value can be None for an open range (uses a sorted index).
+        Example:
+            input: equals={'machineId': 475}, ranges={'eventDateTime': (datetime(2020, 12, 20), None)}
+            output: [<record1>, <record2>, ...]
+        :return: list of records in row order
+        """
+        if self.isStreaming:
+            raise ValueError('query is not supported when isStreaming is True')
+        rowIndexGroups = [
+            self.getDataIndex(column, INDEX_TYPE_HASH).getRowIndexes(val) for column, val in (equals or {}).items()
+        ]
+        rowIndexGroups += [
+            self.getDataIndex(column, INDEX_TYPE_SORTED).getRowIndexes(low, high)
+            for column, (low, high) in (ranges or {}).items()
+        ]
+        if not rowIndexGroups:
+            return list(self.data)
+
+        rowIndexGroups.sort(key=len)
+        rowIndexes = set(rowIndexGroups[0])
+        for otherRowIndexes in rowIndexGroups[1:]:
+            rowIndexes.intersection_update(otherRowIndexes)
+
+        if isinstance(self.data, ColumnarTable):
+            return [self.data.getRow(rowIdx) for rowIdx in sorted(rowIndexes)]
+        return [self.data[rowIdx] for rowIdx in sorted(rowIndexes)]
+
+
+def iterPaddedRows(rows):
+    """ Yield worksheet rows padded with None to the width of the first (header) row. Read-only worksheets which
+    don't store their size leave out the empty cells at the end of each row, which a normal worksheet includes.
+    :return: generator
+    """
+    width = None
+    for row in rows:
+        if width is None:
+            width = len(row)
+        elif len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        yield row
+
+
+def iterImportFileRows(fileConfig):
+    """ Yield the processed rows of one file of a multi-file import, with None for rows filtered out by readFilterFn
+    :param tuple fileConfig: (filePath, defaultHeaders, defaultDataTypes, noneStrings, rowDataType, sheet,
+    derivedColumns, columns, readFilterColumns, readFilterFn, startRow). The first startRow rows are skipped without
+    being converted.
+    :return: generator
+    """
+    (filePath, defaultHeaders, defaultDataTypes, noneStrings, rowDataType, sheet, derivedColumns, columns,
+     readFilterColumns, readFilterFn, startRow) = fileConfig
+    fileImporter = FileImporter(filePath, defaultHeaders, defaultDataTypes, rowDataType, noneStrings,
+                                isStreaming=True, sheet=sheet, derivedColumns=derivedColumns, columns=columns,
+                                readFilterColumns=readFilterColumns, readFilterFn=readFilterFn)
+    try:
+        yield from map(fileImporter.processRow, islice(fileImporter.fileReader, startRow, None))
+    finally:
+        fileImporter.closeFile()
+
+
+def processImportFile(fileConfig):
+    """ Get the processed rows of one file of a multi-file import. Used by worker threads and processes so it only
+    takes arguments which can be pickled.
+    :param tuple fileConfig: See iterImportFileRows
+    :return: list of processed rows, with None for rows filtered out by readFilterFn
+    """
+    return list(iterImportFileRows(fileConfig))
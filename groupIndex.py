@@ -0,0 +1,72 @@
+from array import array
+
+from importer.columnarTable import ColumnarTable
+
+
+class GroupIndex:
+
+    def __init__(self, groupRowIndexes):
+        """Compact (CSR style) index of the rows in each group. Row indexes for every group are stored in one
+        contiguous array, ordered by group key. offsets[i] and offsets[i + 1] mark where the row indexes for
+        groupKeys[i] start and end.
+
+        :param dict groupRowIndexes: A key/value pair of group key and an iterable of row indexes in the group
+        Example:
+            input: {('Female',): [0, 2, 3], ('Male',): [1, 4]}
+            groupKeys: [('Female',), ('Male',)]
+            offsets: array('q', [0, 3, 5])
+            rowIndexes: array('q', [0, 2, 3, 1, 4])
+        """
+        try:
+            self.groupKeys = sorted(groupRowIndexes)
+        except TypeError:
+            # Group keys with values that can't be compared (e.g. None and str) stay in the order they were found
+            self.groupKeys = list(groupRowIndexes)
+
+        self.offsets = array('q', [0])
+        self.rowIndexes = array('q')
+        for groupKey in self.groupKeys:
+            self.rowIndexes.extend(groupRowIndexes[groupKey])
+            self.offsets.append(len(self.rowIndexes))
+        self.groupPositions = {groupKey: idx for idx, groupKey in enumerate(self.groupKeys)}
+
+    def __len__(self):
+        return len(self.groupKeys)
+
+    def __iter__(self):
+        return iter(self.groupKeys)
+
+    def __contains__(self, groupKey):
+        return groupKey in self.groupPositions
+
+    def getRowIndexes(self, groupKey):
+        """ Get the row indexes for a group. The return value is a view of the index so no data is copied.
+        :return: memoryview
+        """
+        groupPosition = self.groupPositions[groupKey]
+        return memoryview(self.rowIndexes)[self.offsets[groupPosition]:self.offsets[groupPosition + 1]]
+
+    def getGroupSize(self, groupKey):
+        groupPosition = self.groupPositions[groupKey]
+        return self.offsets[groupPosition + 1] - self.offsets[groupPosition]
+
+    def items(self):
+        for groupKey in self.groupKeys:
+            yield groupKey, self.getRowIndexes(groupKey)
+
+    def getGroupRecords(self, groupKey, data):
+        """ Yield each record in a group
+        :param list|ColumnarTable data: The data used to create the index
+        :return: generator
+        """
+        rowIndexes = self.getRowIndexes(groupKey)
+        if isinstance(data, ColumnarTable):
+            return data.iterRows(rowIndexes=rowIndexes)
+        return (data[rowIdx] for rowIdx in rowIndexes)
+
+    def getGroupData(self, data):
+        """ Get records for every group in the same format as the values from FileImporter.getGroupData
+        :param list|ColumnarTable data: The data used to create the index
+        :return: dict
+        """
+        return {groupKey: list(self.getGroupRecords(groupKey, data)) for groupKey in self.groupKeys}
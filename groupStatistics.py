@@ -1,7 +1,13 @@
+import pickle
 from copy import deepcopy
 from datetime import date, datetime
+from math import sqrt
 from statistics import stdev
 
+from importer import *
+from importer.instrumentation import getPhase
+from importer.sketches import UniqueValueSketch, getUniqueTracker
+
 
 def stringifyGroup(grouping, groupKey):
     """ Get a concatenated string of all pairs of grouping and groupKey variables
@@ -19,11 +25,34 @@ def stringifyGroup(grouping, groupKey):
     return ', '.join(groupedVals)
 
 
+def getRequiredStatistics(statistics):
+    """ Add the statistics needed to calculate each requested statistic
+    :param dict statistics: A key/value pair of column key and an iterable of GroupStatistics statistic names
+    Example:
+        input: {'totalProfit': [GroupStatistics.STD_DEVIATION]}
+        returns (dict): {'totalProfit': frozenset({'stdDeviation', 'mean', 'sum', 'countNotNull', 'count'})}
+    """
+    requiredStatistics = {}
+    for columnKey, columnStatistics in statistics.items():
+        columnRequiredStatistics = {GroupStatistics.COUNT}
+        remainingStatistics = list(columnStatistics)
+        while remainingStatistics:
+            statistic = remainingStatistics.pop()
+            if statistic not in GroupStatistics.ALL_STATISTICS:
+                raise ValueError(f'Unknown statistic: {statistic}')
+            if statistic not in columnRequiredStatistics:
+                columnRequiredStatistics.add(statistic)
+                remainingStatistics.extend(GroupStatistics.STATISTIC_DEPENDENCIES.get(statistic, ()))
+        requiredStatistics[columnKey] = frozenset(columnRequiredStatistics)
+    return requiredStatistics
+
+
 class GroupStatistics:
 
     # Aggregate level calculations
     MEAN = 'mean'
     PCT_UNIQUE = 'pctUnique'
+    DISTINCT_COUNT = 'distinctCount'
     STD_DEVIATION = 'stdDeviation'
 
     # Record level calcultions
@@ -34,19 +63,50 @@ class GroupStatistics:
     COUNT_NOT_NULL = 'countNotNull'
     COUNT_UNIQUE = 'countUnique'
 
-    def __init__(self, groupData, headers=None):
+    # In the order they appear in calculatedStatistics
+    ALL_STATISTICS = (MEAN, PCT_UNIQUE, DISTINCT_COUNT, STD_DEVIATION, MAX, MIN, SUM, COUNT, COUNT_NOT_NULL, COUNT_UNIQUE)
+    # Calculated when no statistics are requested. distinctCount is only included if it's requested.
+    DEFAULT_STATISTICS = (MEAN, PCT_UNIQUE, STD_DEVIATION, MAX, MIN, SUM, COUNT, COUNT_NOT_NULL, COUNT_UNIQUE)
+    STATISTIC_DEPENDENCIES = {
+        MEAN: (SUM, COUNT_NOT_NULL),
+        STD_DEVIATION: (MEAN,),
+        PCT_UNIQUE: (COUNT_UNIQUE, COUNT),
+        DISTINCT_COUNT: (COUNT_UNIQUE,)
+    }
+
+    def __init__(self, groupData, headers=None, uniqueModes=None, statistics=None):
+        """
+        :param list groupData: Data records for a single group
+        :param list headers: Header values for each column. Required if records are not dictionaries.
+        :param dict uniqueModes: A key/value pair of column key and UNIQUE_MODE_EXACT, UNIQUE_MODE_APPROXIMATE or
+        UNIQUE_MODE_NONE. Columns which aren't included use UNIQUE_MODE_EXACT. Approximate columns use a fixed
+        amount of memory: distinctCount has a standard error of about 1.6% and countUnique/pctUnique only include
+        the TOP_K_SIZE most frequent values, with counts that are too high by at most count / TOP_K_SIZE. Columns
+        with UNIQUE_MODE_NONE have None for distinctCount, countUnique and pctUnique.
+        Example:
+            {'customerKey': UNIQUE_MODE_APPROXIMATE, 'purchaseDateTime': UNIQUE_MODE_NONE}
+        :param dict statistics: A key/value pair of column key and the statistics to calculate for it. If provided,
+        only these columns are read and only the listed statistics (plus the ones they're calculated from, e.g.
+        stdDeviation needs mean) are calculated. By default every statistic except distinctCount is calculated for
+        every column.
+        Example:
+            {'totalProfit': [GroupStatistics.SUM, GroupStatistics.MEAN]}
+        """
+        self.uniqueModes = uniqueModes or {}
+        self.requiredStatistics = getRequiredStatistics(statistics) if statistics is not None else None
         self.groupData = groupData if isinstance(groupData[0], dict) else {key: val for key, val in zip(headers, groupData)}
         self.setStartingStats()
 
+        columnKeys = list(self.calculatedStatistics)
         for record in self.groupData:
-            for columnKey, value in record.items():
-                self.calculateRecordStats(columnKey, value)
+            for columnKey in columnKeys:
+                self.calculateRecordStats(columnKey, record[columnKey])
 
         for stats in self.calculatedStatistics.values():
             self.calculateAggStats(stats)
 
         for columnKey, stats in self.calculatedStatistics.items():
-            if stats[self.MEAN]:
+            if self.STD_DEVIATION in stats and stats[self.MEAN]:
                 columnData = [record[columnKey] for record in self.groupData if record[columnKey] is not None]
                 stats[self.STD_DEVIATION] = stdev(columnData)
 
@@ -54,6 +114,7 @@ class GroupStatistics:
         statsTemplateDict = {
             self.MEAN: None,
             self.PCT_UNIQUE: {},
+            self.DISTINCT_COUNT: None,
             self.STD_DEVIATION: None,
             self.MAX: None,
             self.MIN: None,
@@ -64,21 +125,43 @@ class GroupStatistics:
         }
         self.calculatedStatistics = {}
 
-        for columnKey, value in self.groupData[0].items():
-            self.calculatedStatistics[columnKey] = deepcopy(statsTemplateDict)
+        columnKeys = self.groupData[0].keys() if self.requiredStatistics is None else self.requiredStatistics
+        for columnKey in columnKeys:
+            if self.requiredStatistics is None:
+                stats = {
+                    statistic: deepcopy(startingVal) for statistic, startingVal in statsTemplateDict.items()
+                    if statistic in self.DEFAULT_STATISTICS
+                }
+            else:
+                stats = {
+                    statistic: deepcopy(startingVal) for statistic, startingVal in statsTemplateDict.items()
+                    if statistic in self.requiredStatistics[columnKey]
+                }
+            if self.COUNT_UNIQUE in stats:
+                stats[self.COUNT_UNIQUE] = getUniqueTracker(self.uniqueModes.get(columnKey, UNIQUE_MODE_EXACT))
+            self.calculatedStatistics[columnKey] = stats
 
     def calculateRecordStats(self, columnKey, value):
         stats = self.calculatedStatistics[columnKey]
         self.calculateCount(stats)
-        self.calculateCountNotNull(stats, value)
-        self.calculateCountUnique(stats, value)
-        self.calculateSum(stats, value)
-        self.calculateMin(stats, value)
-        self.calculateMax(stats, value)
+        if self.COUNT_NOT_NULL in stats:
+            self.calculateCountNotNull(stats, value)
+        if self.COUNT_UNIQUE in stats:
+            self.calculateCountUnique(stats, value)
+        if self.SUM in stats:
+            self.calculateSum(stats, value)
+        if self.MIN in stats:
+            self.calculateMin(stats, value)
+        if self.MAX in stats:
+            self.calculateMax(stats, value)
 
     def calculateAggStats(self, stats):
-        self.calculateMean(stats)
-        self.calculatePctUnique(stats)
+        if self.MEAN in stats:
+            self.calculateMean(stats)
+        if self.COUNT_UNIQUE in stats:
+            self.calculateDistinctCount(stats)
+        if self.PCT_UNIQUE in stats:
+            self.calculatePctUnique(stats)
 
     def calculateCount(self, stats):
         stats[self.COUNT] += 1
@@ -89,7 +172,11 @@ class GroupStatistics:
 
     def calculateCountUnique(self, stats, value):
         uniqueItems = stats[self.COUNT_UNIQUE]
-        if value in uniqueItems:
+        if uniqueItems is None:
+            return
+        if isinstance(uniqueItems, UniqueValueSketch):
+            uniqueItems.add(value)
+        elif value in uniqueItems:
             uniqueItems[value] += 1
         else:
             uniqueItems[value] = 1
@@ -122,6 +209,349 @@ class GroupStatistics:
         except ZeroDivisionError:
             pass
 
+    def calculateDistinctCount(self, stats):
+        uniqueItems = stats[self.COUNT_UNIQUE]
+        if isinstance(uniqueItems, UniqueValueSketch):
+            distinctCount = uniqueItems.getDistinctCount()
+            stats[self.COUNT_UNIQUE] = uniqueItems.getTopCounts()
+        else:
+            distinctCount = len(uniqueItems) if uniqueItems is not None else None
+        if self.DISTINCT_COUNT in stats:
+            stats[self.DISTINCT_COUNT] = distinctCount
+
     def calculatePctUnique(self, stats):
+        if stats[self.COUNT_UNIQUE] is None:
+            stats[self.PCT_UNIQUE] = None
+            return
         for uniqueVal, count in stats[self.COUNT_UNIQUE].items():
-            stats[self.PCT_UNIQUE][uniqueVal] = (count / stats[self.COUNT]) * 100
\ No newline at end of file
+            stats[self.PCT_UNIQUE][uniqueVal] = (count / stats[self.COUNT]) * 100
+
+
+class GroupedStatistics:
+
+    # Indexes of the running values kept for each column of each group
+    COUNT_IDX = 0
+    COUNT_NOT_NULL_IDX = 1
+    SUM_IDX = 2
+    MIN_IDX = 3
+    MAX_IDX = 4
+    NUMERIC_COUNT_IDX = 5
+    NUMERIC_MEAN_IDX = 6
+    NUMERIC_M2_IDX = 7
+    COUNT_UNIQUE_IDX = 8
+
+    def __init__(self, data=None, grouping=None, headers=None, filterFn=None, groupIndex=None, groupAccumulators=None,
+                 uniqueModes=None, statistics=None, profiler=None):
+        """Calculate statistics for every group in a single pass over the data. The statistics for each
+        group have the same shape as GroupStatistics.calculatedStatistics. Standard deviation is calculated
+        with Welford's streaming algorithm so the data doesn't need to be read a second time.
+
+        :param iterable data: Data records for every group
+        :param tuple grouping: Column keys and/or tuples of (<columnKey>, <function>) used to group the data.
+        Uses the same format as a single grouping in FileImporter.getGroupData.
+        :param list headers: Header values for each column. Required if records are not dictionaries.
+        :param function filterFn: A function that returns a boolean value, true indicating that the record value should
+        be included
+        :param GroupIndex groupIndex: If provided, groups will be read from the index (e.g. from
+        FileImporter.getGroupIndexes) instead of being calculated from grouping
+        :param dict groupAccumulators: Running values from an earlier calculation (see saveState and
+        loadGroupedStatistics). New data is added on top of them.
+        :param dict uniqueModes: How unique values are tracked for each column. Uses the same format as
+        GroupStatistics.
+        :param dict statistics: The statistics to calculate for each column. Uses the same format as GroupStatistics.
+        Only the listed columns are read and only the running values they need are updated.
+        :param Profiler profiler: If provided, the time spent adding data ('aggregate') and calculating statistics
+        ('statistics') is recorded. With isDetailTimed, each column is also timed as 'aggregate:<columnKey>'.
+        Example:
+            input: data, ('sex', ('age', <function to group>))
+            calculatedStatistics: {
+                ('Female', '30-40'): {'avgPurchaseAmount': {'mean': 245.2, 'sum': ..., ...}, ...},
+                ('Male', '30-40'): {...},
+                ...
+            }
+        """
+        self.grouping = grouping
+        self.profiler = profiler
+        self.uniqueModes = uniqueModes or {}
+        self.requiredStatistics = getRequiredStatistics(statistics) if statistics is not None else None
+        self.groupAccumulators = groupAccumulators or {}
+        if data is not None:
+            self.addData(data, headers, filterFn, groupIndex)
+        else:
+            self.setCalculatedStatistics()
+
+    def addData(self, data, headers=None, filterFn=None, groupIndex=None):
+        """ Add records to the running values and update calculatedStatistics. Used to add new data (e.g. a new
+        day's file) without reading data that has already been added.
+        """
+        groupAccumulators = self.groupAccumulators
+        columnAccumulateFns = None
+        rowCount = 0
+        with getPhase(self.profiler, 'aggregate'):
+            for groupKey, record in self.iterGroupRecords(data, headers, filterFn, groupIndex):
+                if columnAccumulateFns is None:
+                    columnKeys = record if self.requiredStatistics is None else self.requiredStatistics
+                    columnAccumulateFns = [(columnKey, self.getAccumulateFn(columnKey)) for columnKey in columnKeys]
+                accumulators = groupAccumulators.get(groupKey)
+                if accumulators is None:
+                    accumulators = {
+                        columnKey: self.getStartingAccumulator(columnKey) for columnKey, _ in columnAccumulateFns
+                    }
+                    groupAccumulators[groupKey] = accumulators
+                for columnKey, accumulateFn in columnAccumulateFns:
+                    accumulateFn(accumulators[columnKey], record[columnKey])
+                rowCount += 1
+        if self.profiler:
+            self.profiler.addCounts('aggregate', rowCount=rowCount)
+
+        self.setCalculatedStatistics()
+
+    def setCalculatedStatistics(self):
+        with getPhase(self.profiler, 'statistics'):
+            self.calculatedStatistics = {
+                groupKey: {
+                    columnKey: self.getStats(accumulator, self.getColumnStatistics(columnKey))
+                    for columnKey, accumulator in accumulators.items()
+                }
+                for groupKey, accumulators in self.groupAccumulators.items()
+            }
+
+    def getColumnStatistics(self, columnKey):
+        if self.requiredStatistics is None:
+            return GroupStatistics.DEFAULT_STATISTICS
+        return self.requiredStatistics.get(columnKey, GroupStatistics.DEFAULT_STATISTICS)
+
+    def getStartingAccumulator(self, columnKey):
+        uniqueItems = None
+        if GroupStatistics.COUNT_UNIQUE in self.getColumnStatistics(columnKey):
+            uniqueItems = getUniqueTracker(self.uniqueModes.get(columnKey, UNIQUE_MODE_EXACT))
+        return [0, 0, None, None, None, 0, 0.0, 0.0, uniqueItems]
+
+    def merge(self, other):
+        """ Combine the running values from another GroupedStatistics (e.g. calculated from a different file) into
+        this one and update calculatedStatistics. The result is the same as calculating statistics for both
+        datasets at once.
+        :param GroupedStatistics other: Statistics calculated with the same grouping
+        """
+        for groupKey, otherAccumulators in other.groupAccumulators.items():
+            accumulators = self.groupAccumulators.setdefault(groupKey, {})
+            for columnKey, otherAccumulator in otherAccumulators.items():
+                accumulator = accumulators.get(columnKey)
+                if accumulator is None:
+                    accumulator = accumulators[columnKey] = self.getStartingAccumulator(columnKey)
+                self.mergeAccumulator(accumulator, otherAccumulator)
+
+        self.setCalculatedStatistics()
+
+    def mergeAccumulator(self, accumulator, otherAccumulator):
+        accumulator[self.COUNT_IDX] += otherAccumulator[self.COUNT_IDX]
+        accumulator[self.COUNT_NOT_NULL_IDX] += otherAccumulator[self.COUNT_NOT_NULL_IDX]
+
+        otherSum = otherAccumulator[self.SUM_IDX]
+        if otherSum is not None:
+            currentSum = accumulator[self.SUM_IDX]
+            accumulator[self.SUM_IDX] = otherSum if currentSum is None else currentSum + otherSum
+
+        otherMin = otherAccumulator[self.MIN_IDX]
+        if otherMin is not None and (accumulator[self.MIN_IDX] is None or otherMin < accumulator[self.MIN_IDX]):
+            accumulator[self.MIN_IDX] = otherMin
+        otherMax = otherAccumulator[self.MAX_IDX]
+        if otherMax is not None and (accumulator[self.MAX_IDX] is None or otherMax > accumulator[self.MAX_IDX]):
+            accumulator[self.MAX_IDX] = otherMax
+
+        # Chan et al. parallel variance: combine the count, mean and M2 of both sets of values
+        count = accumulator[self.NUMERIC_COUNT_IDX]
+        otherCount = otherAccumulator[self.NUMERIC_COUNT_IDX]
+        if otherCount:
+            totalCount = count + otherCount
+            delta = otherAccumulator[self.NUMERIC_MEAN_IDX] - accumulator[self.NUMERIC_MEAN_IDX]
+            accumulator[self.NUMERIC_MEAN_IDX] += delta * otherCount / totalCount
+            accumulator[self.NUMERIC_M2_IDX] += otherAccumulator[self.NUMERIC_M2_IDX] + delta * delta * count * otherCount / totalCount
+            accumulator[self.NUMERIC_COUNT_IDX] = totalCount
+
+        uniqueItems = accumulator[self.COUNT_UNIQUE_IDX]
+        otherUniqueItems = otherAccumulator[self.COUNT_UNIQUE_IDX]
+        if uniqueItems is None or otherUniqueItems is None:
+            # Unique values can't be known if either side didn't track them
+            accumulator[self.COUNT_UNIQUE_IDX] = None
+        elif isinstance(uniqueItems, UniqueValueSketch):
+            if not isinstance(otherUniqueItems, UniqueValueSketch):
+                otherUniqueItems = self.getSketch(otherUniqueItems)
+            uniqueItems.merge(otherUniqueItems)
+        elif isinstance(otherUniqueItems, UniqueValueSketch):
+            accumulator[self.COUNT_UNIQUE_IDX] = self.getSketch(uniqueItems)
+            accumulator[self.COUNT_UNIQUE_IDX].merge(otherUniqueItems)
+        else:
+            for value, uniqueCount in otherUniqueItems.items():
+                uniqueItems[value] = uniqueItems.get(value, 0) + uniqueCount
+
+    def getSketch(self, uniqueItems):
+        """ Convert exact unique counts to a UniqueValueSketch so they can be merged with approximate counts
+        """
+        sketch = UniqueValueSketch()
+        for value, uniqueCount in uniqueItems.items():
+            sketch.distinctValues.add(value)
+            sketch.topValues.add(value, uniqueCount)
+        return sketch
+
+    def saveState(self, filePath):
+        """ Save the running values so they can be loaded with loadGroupedStatistics and added to later
+        :param str filePath: Name of the file to write to
+        """
+        state = {
+            'groupAccumulators': self.groupAccumulators,
+            'requiredStatistics': self.requiredStatistics,
+            'uniqueModes': self.uniqueModes
+        }
+        with open(filePath, 'wb') as stateFile:
+            pickle.dump(state, stateFile)
+
+    def iterGroupRecords(self, data, headers, filterFn, groupIndex):
+        """ Yield a tuple of (groupKey, record) for every record that should be included in the statistics
+        """
+        if groupIndex is not None:
+            for groupKey in groupIndex:
+                for record in groupIndex.getGroupRecords(groupKey, data):
+                    if not isinstance(record, dict):
+                        record = {header: val for header, val in zip(headers, record)}
+                    if not filterFn or filterFn(record):
+                        yield groupKey, record
+            return
+
+        for record in data:
+            if not isinstance(record, dict):
+                record = {header: val for header, val in zip(headers, record)}
+            if filterFn and not filterFn(record):
+                continue
+            yield self.getGroupKey(record), record
+
+    def getGroupKey(self, record):
+        groupKey = []
+        for column in self.grouping:
+            if isinstance(column, tuple):
+                columnKey, groupingFunc = column
+                groupKey.append(groupingFunc(record[columnKey]))
+            else:
+                groupKey.append(record[column])
+        return tuple(groupKey)
+
+    def getAccumulateFn(self, columnKey):
+        """ Get a function which adds a value to a column's running values. Only the running values needed for the
+        column's statistics are updated.
+        :return: function
+        """
+        columnStatistics = self.getColumnStatistics(columnKey)
+        isUniqueTracked = GroupStatistics.COUNT_UNIQUE in columnStatistics
+        isSummed = GroupStatistics.SUM in columnStatistics
+        isVarianceTracked = GroupStatistics.STD_DEVIATION in columnStatistics
+        isMinMaxTracked = GroupStatistics.MIN in columnStatistics or GroupStatistics.MAX in columnStatistics
+        isNumericTracked = isSummed or isVarianceTracked
+        COUNT_IDX, COUNT_NOT_NULL_IDX, SUM_IDX, MIN_IDX, MAX_IDX = (
+            self.COUNT_IDX, self.COUNT_NOT_NULL_IDX, self.SUM_IDX, self.MIN_IDX, self.MAX_IDX
+        )
+        NUMERIC_COUNT_IDX, NUMERIC_MEAN_IDX, NUMERIC_M2_IDX, COUNT_UNIQUE_IDX = (
+            self.NUMERIC_COUNT_IDX, self.NUMERIC_MEAN_IDX, self.NUMERIC_M2_IDX, self.COUNT_UNIQUE_IDX
+        )
+
+        def accumulate(accumulator, value):
+            accumulator[COUNT_IDX] += 1
+            if isUniqueTracked:
+                uniqueItems = accumulator[COUNT_UNIQUE_IDX]
+                if uniqueItems.__class__ is dict:
+                    uniqueItems[value] = uniqueItems.get(value, 0) + 1
+                elif uniqueItems is not None:
+                    uniqueItems.add(value)
+            if value is None:
+                return
+            accumulator[COUNT_NOT_NULL_IDX] += 1
+
+            isNumeric = isinstance(value, (int, float))
+            if isNumeric and isNumericTracked:
+                currentSum = accumulator[SUM_IDX]
+                accumulator[SUM_IDX] = value if currentSum is None else currentSum + value
+
+                if isVarianceTracked:
+                    # Welford's algorithm for a numerically stable running variance
+                    accumulator[NUMERIC_COUNT_IDX] += 1
+                    delta = value - accumulator[NUMERIC_MEAN_IDX]
+                    accumulator[NUMERIC_MEAN_IDX] += delta / accumulator[NUMERIC_COUNT_IDX]
+                    accumulator[NUMERIC_M2_IDX] += delta * (value - accumulator[NUMERIC_MEAN_IDX])
+
+            if isMinMaxTracked and (isNumeric or isinstance(value, (date, datetime))):
+                currentMin = accumulator[MIN_IDX]
+                if currentMin is None or value < currentMin:
+                    accumulator[MIN_IDX] = value
+                currentMax = accumulator[MAX_IDX]
+                if currentMax is None or value > currentMax:
+                    accumulator[MAX_IDX] = value
+
+        if self.profiler and self.profiler.isDetailTimed:
+            return self.profiler.getTimedFn(f'aggregate:{columnKey}', accumulate)
+        return accumulate
+
+    def getStats(self, accumulator, columnStatistics=GroupStatistics.DEFAULT_STATISTICS):
+        """ Convert the running values for a column into the GroupStatistics.calculatedStatistics format
+        :param iterable columnStatistics: The statistics to include
+        """
+        count = accumulator[self.COUNT_IDX]
+        countNotNull = accumulator[self.COUNT_NOT_NULL_IDX]
+        columnSum = accumulator[self.SUM_IDX]
+        numericCount = accumulator[self.NUMERIC_COUNT_IDX]
+        uniqueItems = accumulator[self.COUNT_UNIQUE_IDX]
+
+        if isinstance(uniqueItems, UniqueValueSketch):
+            distinctCount = uniqueItems.getDistinctCount()
+            uniqueItems = uniqueItems.getTopCounts()
+        else:
+            distinctCount = len(uniqueItems) if uniqueItems is not None else None
+
+        mean = columnSum / countNotNull if columnSum is not None and countNotNull else None
+        stats = {}
+        for statistic in GroupStatistics.ALL_STATISTICS:
+            if statistic not in columnStatistics:
+                continue
+            if statistic == GroupStatistics.MEAN:
+                stats[statistic] = mean
+            elif statistic == GroupStatistics.PCT_UNIQUE:
+                stats[statistic] = {
+                    uniqueVal: (uniqueCount / count) * 100 for uniqueVal, uniqueCount in uniqueItems.items()
+                } if uniqueItems is not None else None
+            elif statistic == GroupStatistics.DISTINCT_COUNT:
+                stats[statistic] = distinctCount
+            elif statistic == GroupStatistics.STD_DEVIATION:
+                stats[statistic] = None
+                if mean and numericCount > 1:
+                    stats[statistic] = sqrt(accumulator[self.NUMERIC_M2_IDX] / (numericCount - 1))
+            elif statistic == GroupStatistics.MAX:
+                stats[statistic] = accumulator[self.MAX_IDX]
+            elif statistic == GroupStatistics.MIN:
+                stats[statistic] = accumulator[self.MIN_IDX]
+            elif statistic == GroupStatistics.SUM:
+                stats[statistic] = columnSum
+            elif statistic == GroupStatistics.COUNT:
+                stats[statistic] = count
+            elif statistic == GroupStatistics.COUNT_NOT_NULL:
+                stats[statistic] = countNotNull
+            elif statistic == GroupStatistics.COUNT_UNIQUE:
+                stats[statistic] = uniqueItems
+        return stats
+
+
+def loadGroupedStatistics(filePath, grouping=None, uniqueModes=None):
+    """ Load GroupedStatistics from a file written by GroupedStatistics.saveState
+    :param str filePath: Name of the file to read
+    :param tuple grouping: The grouping used to calculate the saved statistics. Required to add new data.
+    :param dict uniqueModes: How unique values are tracked for columns added by new data. Defaults to the unique
+    modes the statistics were saved with.
+    :return: GroupedStatistics
+    """
+    with open(filePath, 'rb') as stateFile:
+        state = pickle.load(stateFile)
+    groupedStatistics = GroupedStatistics(
+        grouping=grouping, groupAccumulators=state['groupAccumulators'],
+        uniqueModes={**state['uniqueModes'], **(uniqueModes or {})}
+    )
+    # The same columns and statistics are calculated for new data as for the saved data
+    groupedStatistics.requiredStatistics = state['requiredStatistics']
+    groupedStatistics.setCalculatedStatistics()
+    return groupedStatistics
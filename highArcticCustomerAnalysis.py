@@ -1,5 +1,6 @@
 from dataAnalysis import getAgeGroup
 from importer import *
+from importer.expressions import column
 from importer.fileImport import FileImporter
 from importer.groupStatistics import GroupStatistics
 
@@ -11,25 +12,28 @@ defaultDataTypes = {
     'discountPct': float
 }
 
-fileImporter = FileImporter(f'{DATA_FILE_PATH}SalesData_HighArcticWool_2020.csv', defaultDataTypes=defaultDataTypes)
-salesData = fileImporter.data
+derivedColumns = {
+    'unitDiscountPrice': column('unitPrice') * (1 - column('discountPct')),
+    'unitProfit': column('unitDiscountPrice') - column('unitCost'),
+    'totalPrice': column('unitPrice') * column('quantity'),
+    'totalProfit': column('unitProfit') * column('quantity')
+}
+
+fileImporter = FileImporter(f'{DATA_FILE_PATH}SalesData_HighArcticWool_2020.csv', defaultDataTypes=defaultDataTypes,
+                            derivedColumns=derivedColumns)
 customerData = FileImporter(f'{DATA_FILE_PATH}CustomerData_HighArcticWool_2020.csv', defaultDataTypes={'age': int}).data
-customerData = {record['customerKey']: record for record in customerData}
-
-# Copy and extend 'customerKey', and 'age' column onto salesData
-for sale in salesData:
-    customer = customerData.get(sale['customerKey'], None)
-    if not customer:
-        raise ValueError('Customer doesn\'t exist')
-    sale['age'] = customer['age']
-    sale['unitDiscountPrice'] = sale['unitPrice'] * (1 - sale['discountPct'])
-    sale['unitProfit'] = sale['unitDiscountPrice'] - sale['unitCost']
-    sale['totalPrice'] = sale['unitPrice'] * sale['quantity']
-    sale['totalProfit'] = sale['unitProfit'] * sale['quantity']
+
+# Copy the customer 'age' column onto salesData
+salesData = fileImporter.getJoinData(customerData, 'customerKey', columns=['age'])
+if fileImporter.unmatchedJoinKeys:
+    raise ValueError(f'Customers don\'t exist: {fileImporter.unmatchedJoinKeys}')
 
 ageGroupSalesData = fileImporter.getGroupData([(('age', getAgeGroup),)], data=salesData, isFlat=True)[0]
 
-ageGroupSalesStatistics = {groupKey: GroupStatistics(group) for groupKey, group in ageGroupSalesData.items()}
+profitStatistics = {'totalProfit': [GroupStatistics.SUM, GroupStatistics.MEAN]}
+ageGroupSalesStatistics = {
+    groupKey: GroupStatistics(group, statistics=profitStatistics) for groupKey, group in ageGroupSalesData.items()
+}
 
 headers = ['ageGroup', 'totalProfit', 'avgProfit']
 records = []
@@ -1,7 +1,7 @@
 from dataAnalysis import DATE_AGG_QUARTERS, DATE_AGG_MONTHS, getDateAgg
 from importer import *
+from importer.expressions import column
 from importer.fileImport import FileImporter
-from importer.groupStatistics import GroupStatistics
 
 defaultDataTypes = {
     'purchaseDateTime': safeDateTimeParse,
@@ -11,51 +11,44 @@ defaultDataTypes = {
     'discountPct': float
 }
 
-fileImporter = FileImporter(f'{DATA_FILE_PATH}SalesData_HighArcticWool_2020.csv', defaultDataTypes=defaultDataTypes)
+derivedColumns = {
+    'unitDiscountPrice': column('unitPrice') * (1 - column('discountPct')),
+    'unitProfit': column('unitDiscountPrice') - column('unitCost'),
+    'totalPrice': column('unitDiscountPrice') * column('quantity'),
+    'totalProfit': column('unitProfit') * column('quantity')
+}
 
-processedData = fileImporter.data
-for record in processedData:
-    record['unitDiscountPrice'] = record['unitPrice'] * (1 - record['discountPct'])
-    record['unitProfit'] = record['unitDiscountPrice'] - record['unitCost']
-    record['totalPrice'] = record['unitDiscountPrice'] * record['quantity']
-    record['totalProfit'] = record['unitProfit'] * record['quantity']
+fileImporter = FileImporter(f'{DATA_FILE_PATH}SalesData_HighArcticWool_2020.csv', defaultDataTypes=defaultDataTypes,
+                            rowDataType=ROW_TYPE_COLUMNAR, derivedColumns=derivedColumns)
 
-purchaseDateGroup = fileImporter.getGroupData([(('purchaseDateTime', getDateAgg), 'productName')], data=processedData, isFlat=True)
+processedData = fileImporter.data
 
 getMonth = lambda record: getDateAgg(record, dateAgg=DATE_AGG_MONTHS)
 getQuarter = lambda record: getDateAgg(record, dateAgg=DATE_AGG_QUARTERS)
 
-purchaseMonthGroup = fileImporter.getGroupData([(('purchaseDateTime', getMonth), 'productName')], data=processedData, isFlat=True)
-purchaseQuarterGroup = fileImporter.getGroupData([(('purchaseDateTime', getQuarter), 'productName')], data=processedData, isFlat=True)
-
-seasonalityGroupStatistics = {
-    'date': {groupKey: GroupStatistics(group) for groupKey, group in purchaseDateGroup[0].items()},
-    'month': {groupKey: GroupStatistics(group) for groupKey, group in purchaseMonthGroup[0].items()},
-    'quarter': {groupKey: GroupStatistics(group) for groupKey, group in purchaseQuarterGroup[0].items()}
-}
-
 metrics = ['totalPrice', 'totalProfit', 'quantity']
 productLines = ['Mountain socks', 'Storm surge jacket', 'Aspen long sleeve shirt', 'Pine short sleeve shirt']
 headers = ['dateCategory'] + metrics
 
-seasonalityProductGroups = {}
-for product in productLines:
-    for seasonalityGroup in seasonalityGroupStatistics:
-        seasonalityProductGroups[(product, seasonalityGroup)] = []
-
-for (product, seasonalityGroup), records in seasonalityProductGroups.items():
-    groupStatistics = seasonalityGroupStatistics[seasonalityGroup]
-    for (dateAgg, specificProduct), statistics in groupStatistics.items():
-        if product == specificProduct:
-            newRecord = [dateAgg]
-            calculatedStats = statistics.calculatedStatistics
-            for metric in metrics:
-                newRecord.append(calculatedStats[metric]['sum'])
-            records.append(newRecord)
+# Sum each metric for every date category and product in one pass over the data per seasonality
+seasonalityPivots = {
+    seasonalityGroup: fileImporter.getPivotTable((('purchaseDateTime', dateAggFn),), ('productName',), metrics,
+                                                 data=processedData, columnLabels=productLines)
+    for seasonalityGroup, dateAggFn in (('date', getDateAgg), ('month', getMonth), ('quarter', getQuarter))
+}
 
+# Date categories without any sales of the product are left out
 sheetsConfig = [
-    {'data': records, 'headers': headers, 'title': f'{product}-{seasonalityGroup}'}
-    for (product, seasonalityGroup), records in seasonalityProductGroups.items()
+    {
+        'data': [
+            [dateAgg] + [pivot.getValue(dateAgg, product, metric) for metric in metrics]
+            for dateAgg in pivot.rowLabels if pivot.hasData(dateAgg, product)
+        ],
+        'headers': headers,
+        'title': f'{product}-{seasonalityGroup}'
+    }
+    for product in productLines
+    for seasonalityGroup, pivot in seasonalityPivots.items()
 ]
 
 fileImporter.writeExcelFile('highArcticSeasonalityAnalysis', sheetsConfig=sheetsConfig)
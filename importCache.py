@@ -0,0 +1,309 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+from array import array
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import partial
+from re import Pattern
+from types import BuiltinFunctionType, CodeType, FunctionType, MethodDescriptorType, ModuleType
+
+from importer import *
+from importer.columnarTable import Column, ColumnarTable, DateTimeColumn, NumericColumn, StringColumn
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+COLUMN_KIND_NUMERIC = 'numeric'
+COLUMN_KIND_DATETIME = 'datetime'
+COLUMN_KIND_STRING = 'string'
+COLUMN_KIND_OBJECT = 'object'
+
+
+# Values which are identified by their type and repr
+PLAIN_VALUE_TYPES = (type(None), bool, int, float, complex, str, bytes, date, datetime, time, timedelta, Decimal)
+# Values which are identified by their module and name
+NAMED_VALUE_TYPES = (type, ModuleType, BuiltinFunctionType, MethodDescriptorType)
+
+
+def getDataTypeKey(dataType):
+    """ Get a string which identifies a data type function across runs. Functions are identified by a hash of their
+    byte code, constants, default arguments, closure values, and the plain data (numbers, strings, etc.) they read from
+    global variables, so changing a function's body or any value it uses invalidates the cache. Global functions,
+    classes, and modules used by a function are identified by name.
+    Raises a ValueError if the data type uses a value which can't be identified across runs (e.g. an instance of a
+    class), since imports that use it can't be cached reliably.
+    :return: str|None
+    """
+    if dataType is None:
+        return None
+    return getValueKey(dataType)
+
+
+def getValueKey(val, seenFunctionIds=frozenset()):
+    """ Get a string which identifies a value used by a data type function (e.g. a constant or closure value)
+    :param frozenset seenFunctionIds: Ids of the functions already being identified, so recursive functions end
+    :return: str
+    """
+    if isinstance(val, PLAIN_VALUE_TYPES):
+        return f'{type(val).__name__}:{val!r}'
+    if isinstance(val, (tuple, list)):
+        return f'{type(val).__name__}({",".join(getValueKey(item, seenFunctionIds) for item in val)})'
+    if isinstance(val, (set, frozenset)):
+        return f'{type(val).__name__}({",".join(sorted(getValueKey(item, seenFunctionIds) for item in val))})'
+    if isinstance(val, dict):
+        return 'dict({})'.format(','.join(sorted(
+            f'{getValueKey(key, seenFunctionIds)}:{getValueKey(item, seenFunctionIds)}' for key, item in val.items()
+        )))
+    if isinstance(val, FunctionType):
+        return getFunctionKey(val, seenFunctionIds)
+    if isinstance(val, CodeType):
+        return getCodeKey(val, seenFunctionIds)
+    if isinstance(val, partial):
+        return (f'partial({getValueKey(val.func, seenFunctionIds)},{getValueKey(val.args, seenFunctionIds)},'
+                f'{getValueKey(val.keywords, seenFunctionIds)})')
+    if isinstance(val, Pattern):
+        return f'Pattern({val.pattern!r},{val.flags})'
+    if isinstance(val, NAMED_VALUE_TYPES):
+        return getNameKey(val)
+    raise ValueError(f'{val!r} can\'t be identified across runs')
+
+
+def getNameKey(val):
+    if isinstance(val, ModuleType):
+        return val.__name__
+    module = getattr(val, '__module__', None) or getattr(getattr(val, '__objclass__', None), '__module__', '')
+    return f'{module}.{getattr(val, "__qualname__", val.__name__)}'
+
+
+def getCodeKey(code, seenFunctionIds):
+    """ Get a string which identifies a code object by its byte code, the names it uses, and its constants. Nested
+    functions (e.g. a lambda inside the function) are code object constants.
+    """
+    return (f'{hashlib.md5(code.co_code).hexdigest()}{code.co_names}'
+            f'({",".join(getValueKey(const, seenFunctionIds) for const in code.co_consts)})')
+
+
+def getGlobalNames(code):
+    """ Get the names used by a code object and the code objects nested in it """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= getGlobalNames(const)
+    return names
+
+
+def getFunctionKey(fn, seenFunctionIds):
+    if id(fn) in seenFunctionIds:
+        return getNameKey(fn)
+    seenFunctionIds = seenFunctionIds | {id(fn)}
+
+    keyParts = [
+        getNameKey(fn),
+        getCodeKey(fn.__code__, seenFunctionIds),
+        getValueKey(fn.__defaults__, seenFunctionIds),
+        getValueKey(fn.__kwdefaults__, seenFunctionIds)
+    ]
+    for cell in fn.__closure__ or ():
+        try:
+            cellContents = cell.cell_contents
+        except ValueError:
+            # The variable hasn't been assigned yet
+            keyParts.append('emptyCell')
+            continue
+        keyParts.append(getValueKey(cellContents, seenFunctionIds))
+    for name in sorted(getGlobalNames(fn.__code__)):
+        if name not in fn.__globals__:
+            continue
+        globalVal = fn.__globals__[name]
+        if isinstance(globalVal, (FunctionType, partial) + NAMED_VALUE_TYPES):
+            keyParts.append(f'{name}={getNameKey(globalVal.func if isinstance(globalVal, partial) else globalVal)}')
+        else:
+            keyParts.append(f'{name}={getValueKey(globalVal, seenFunctionIds)}')
+    return f'{getNameKey(fn)}:{hashlib.md5("|".join(keyParts).encode()).hexdigest()}'
+
+
+class ImportCache:
+
+    def __init__(self, cacheDir, maxBytes=IMPORT_CACHE_MAX_BYTES):
+        """An on-disk cache of converted imports. Each entry is a directory with one binary file per column and a
+        manifest. Numeric and datetime columns are raw arrays, and strings are stored as an array of codes plus the
+        list of distinct values, so loading an entry doesn't need to parse or convert anything.
+
+        :param str cacheDir: The directory where cache entries are stored
+        :param int maxBytes: When the cache is bigger than this, the least recently used entries are removed
+        """
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        os.makedirs(cacheDir, exist_ok=True)
+
+    def getKey(self, filePath, defaultHeaders=None, defaultDataTypes=None, noneStrings=None, sheet=None,
+               derivedColumns=None, columns=None, readFilterColumns=None, readFilterFn=None):
+        """ Get the cache key for a source file and import configuration. Changing the file (size or modified time)
+        or any of the configuration gives a different key. Raises a ValueError if a data type, derived column, or
+        filter function can't be identified across runs (see getDataTypeKey).
+        :return: str
+        """
+        fileStats = os.stat(filePath)
+        keyParts = {
+            'filePath': os.path.abspath(filePath),
+            'size': fileStats.st_size,
+            'modifiedTime': fileStats.st_mtime_ns,
+            'defaultHeaders': sorted((str(key), value) for key, value in (defaultHeaders or {}).items()),
+            'defaultDataTypes': sorted(
+                (header, getDataTypeKey(dataType)) for header, dataType in (defaultDataTypes or {}).items()
+            ),
+            'noneStrings': sorted(noneStrings or ()),
+            'sheet': sheet,
+            'derivedColumns': [
+                (header, expression.getKey()) for header, expression in (derivedColumns or {}).items()
+            ],
+            'columns': columns,
+            'readFilterColumns': sorted(readFilterColumns or ()),
+            'readFilterFn': getDataTypeKey(readFilterFn)
+        }
+        return hashlib.sha256(json.dumps(keyParts, default=str).encode()).hexdigest()
+
+    def getEntryDir(self, key):
+        return os.path.join(self.cacheDir, key)
+
+    def load(self, key):
+        """ Get the cached ColumnarTable for a key
+        :return: ColumnarTable|None
+        """
+        entryDir = self.getEntryDir(key)
+        manifestPath = os.path.join(entryDir, MANIFEST_FILE_NAME)
+        if not os.path.exists(manifestPath):
+            return None
+        with open(manifestPath) as manifestFile:
+            manifest = json.load(manifestFile)
+
+        table = ColumnarTable(manifest['headers'])
+        table.rowCount = manifest['rowCount']
+        isSwapped = manifest['byteOrder'] != sys.byteorder
+        for columnIdx, (header, columnConfig) in enumerate(zip(manifest['headers'], manifest['columns'])):
+            table.columns[header] = self.loadColumn(entryDir, columnIdx, columnConfig, isSwapped)
+
+        # Update the modified time so eviction removes the least recently used entries first
+        os.utime(manifestPath)
+        return table
+
+    def loadColumn(self, entryDir, columnIdx, columnConfig, isSwapped):
+        columnPath = os.path.join(entryDir, f'column{columnIdx}')
+        kind = columnConfig['kind']
+        if kind == COLUMN_KIND_OBJECT:
+            with open(f'{columnPath}.pkl', 'rb') as columnFile:
+                return Column(pickle.load(columnFile))
+
+        if kind == COLUMN_KIND_STRING:
+            column = StringColumn()
+            column.codes = self.loadArray(f'{columnPath}.codes', column.codes.typecode, isSwapped)
+            with open(f'{columnPath}.json') as categoriesFile:
+                column.categories = json.load(categoriesFile)
+            column.categoryCodes = {category: code for code, category in enumerate(column.categories)}
+            return column
+
+        column = DateTimeColumn() if kind == COLUMN_KIND_DATETIME else NumericColumn(columnConfig['typecode'])
+        column.values = self.loadArray(f'{columnPath}.values', column.typecode, isSwapped)
+        with open(f'{columnPath}.nulls', 'rb') as nullsFile:
+            column.nulls = bytearray(nullsFile.read())
+        return column
+
+    def loadArray(self, arrayPath, typecode, isSwapped):
+        values = array(typecode)
+        with open(arrayPath, 'rb') as arrayFile:
+            values.frombytes(arrayFile.read())
+        if isSwapped:
+            values.byteswap()
+        return values
+
+    def save(self, key, table):
+        """ Save a ColumnarTable to the cache and remove old entries if the cache is too big
+        :param str key: Key from getKey
+        :param ColumnarTable table: The converted data
+        """
+        entryDir = self.getEntryDir(key)
+        tempDir = f'{entryDir}.tmp'
+        shutil.rmtree(tempDir, ignore_errors=True)
+        os.makedirs(tempDir)
+
+        columnConfigs = [
+            self.saveColumn(os.path.join(tempDir, f'column{columnIdx}'), table[header])
+            for columnIdx, header in enumerate(table.headers)
+        ]
+        manifest = {
+            'headers': table.headers,
+            'rowCount': len(table),
+            'byteOrder': sys.byteorder,
+            'columns': columnConfigs
+        }
+        with open(os.path.join(tempDir, MANIFEST_FILE_NAME), 'w') as manifestFile:
+            json.dump(manifest, manifestFile)
+
+        # Replace any existing entry only once the new one is complete
+        shutil.rmtree(entryDir, ignore_errors=True)
+        os.rename(tempDir, entryDir)
+        self.evict()
+
+    def saveColumn(self, columnPath, column):
+        if isinstance(column, StringColumn):
+            with open(f'{columnPath}.codes', 'wb') as codesFile:
+                column.codes.tofile(codesFile)
+            with open(f'{columnPath}.json', 'w') as categoriesFile:
+                json.dump(column.categories, categoriesFile)
+            return {'kind': COLUMN_KIND_STRING}
+
+        if isinstance(column, NumericColumn):
+            with open(f'{columnPath}.values', 'wb') as valuesFile:
+                column.values.tofile(valuesFile)
+            with open(f'{columnPath}.nulls', 'wb') as nullsFile:
+                nullsFile.write(column.nulls)
+            kind = COLUMN_KIND_DATETIME if isinstance(column, DateTimeColumn) else COLUMN_KIND_NUMERIC
+            return {'kind': kind, 'typecode': column.typecode}
+
+        with open(f'{columnPath}.pkl', 'wb') as columnFile:
+            pickle.dump(list(column), columnFile)
+        return {'kind': COLUMN_KIND_OBJECT}
+
+    def getIndexPath(self, key, column, indexType):
+        columnHash = hashlib.md5(str(column).encode()).hexdigest()
+        return os.path.join(self.getEntryDir(key), f'index_{columnHash}_{indexType}.pkl')
+
+    def loadIndex(self, key, column, indexType):
+        """ Get a saved HashIndex or SortedIndex for a column of a cached import
+        :return: HashIndex|SortedIndex|None
+        """
+        indexPath = self.getIndexPath(key, column, indexType)
+        if not os.path.exists(indexPath):
+            return None
+        with open(indexPath, 'rb') as indexFile:
+            return pickle.load(indexFile)
+
+    def saveIndex(self, key, column, indexType, dataIndex):
+        """ Save an index next to a cached import so it doesn't need to be built again
+        """
+        if not os.path.isdir(self.getEntryDir(key)):
+            return
+        with open(self.getIndexPath(key, column, indexType), 'wb') as indexFile:
+            pickle.dump(dataIndex, indexFile)
+
+    def getEntrySize(self, entryDir):
+        return sum(entry.stat().st_size for entry in os.scandir(entryDir) if entry.is_file())
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache is no bigger than maxBytes
+        """
+        entries = []
+        for entry in os.scandir(self.cacheDir):
+            manifestPath = os.path.join(entry.path, MANIFEST_FILE_NAME)
+            if entry.is_dir() and os.path.exists(manifestPath):
+                entries.append((os.stat(manifestPath).st_mtime, entry.path, self.getEntrySize(entry.path)))
+
+        totalBytes = sum(entrySize for _, _, entrySize in entries)
+        for _, entryDir, entrySize in sorted(entries):
+            if totalBytes <= self.maxBytes:
+                break
+            shutil.rmtree(entryDir, ignore_errors=True)
+            totalBytes -= entrySize
@@ -0,0 +1,77 @@
+import json
+import os
+from hashlib import sha1
+
+from importer import *
+
+
+class ImportWatermark:
+
+    def __init__(self, filePath):
+        """Keeps track of how many rows have already been imported from each source file so later imports only
+        read new files and rows appended since the last run.
+
+        :param str filePath: Name of the JSON file used to store the watermark. It is created on save if it
+        doesn't exist.
+        """
+        self.filePath = filePath
+        self.sourceFiles = {}
+        if os.path.exists(filePath):
+            with open(filePath) as watermarkFile:
+                self.sourceFiles = json.load(watermarkFile)
+
+    def getRowCount(self, sourcePath):
+        """ Get the number of data rows already imported from a source file. A file which has changed since it was
+        last imported only keeps its row count if rows were appended to it: it must be larger and still have the
+        same bytes at the end of the part that was imported. Otherwise it has been replaced, so every row is new.
+        :return: int
+        """
+        sourceFile = self.sourceFiles.get(os.path.abspath(sourcePath))
+        if not sourceFile:
+            return 0
+        if self.isImported(sourcePath):
+            return sourceFile['rowCount']
+        if os.path.getsize(sourcePath) <= sourceFile['size']:
+            return 0
+        if getCheckHash(sourcePath, sourceFile['size']) != sourceFile.get('checkHash'):
+            return 0
+        return sourceFile['rowCount']
+
+    def setRowCount(self, sourcePath, rowCount):
+        fileStats = os.stat(sourcePath)
+        self.sourceFiles[os.path.abspath(sourcePath)] = {
+            'rowCount': rowCount,
+            'size': fileStats.st_size,
+            'modifiedTime': fileStats.st_mtime_ns,
+            'checkHash': getCheckHash(sourcePath, fileStats.st_size)
+        }
+
+    def isImported(self, sourcePath):
+        """ Check if a source file has been imported and hasn't changed since
+        """
+        sourceFile = self.sourceFiles.get(os.path.abspath(sourcePath))
+        if not sourceFile:
+            return False
+        fileStats = os.stat(sourcePath)
+        return fileStats.st_size == sourceFile['size'] and fileStats.st_mtime_ns == sourceFile['modifiedTime']
+
+    def getNewFilePaths(self, sourcePaths):
+        """ Get the source files which are new or have changed since they were last imported
+        :return: list
+        """
+        return [sourcePath for sourcePath in sourcePaths if not self.isImported(sourcePath)]
+
+    def save(self):
+        tempPath = f'{self.filePath}.tmp'
+        with open(tempPath, 'w') as watermarkFile:
+            json.dump(self.sourceFiles, watermarkFile, indent=2)
+        os.replace(tempPath, self.filePath)
+
+
+def getCheckHash(sourcePath, size):
+    """ Get a hash of the WATERMARK_CHECK_SIZE bytes before size in a file
+    :return: str
+    """
+    with open(sourcePath, 'rb') as sourceFile:
+        sourceFile.seek(max(size - WATERMARK_CHECK_SIZE, 0))
+        return sha1(sourceFile.read(min(size, WATERMARK_CHECK_SIZE))).hexdigest()
@@ -0,0 +1,173 @@
+import json
+import logging
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerHook:
+    """Base class for objects which are notified as Profiler phases start and end. Override either method."""
+
+    def onPhaseStart(self, name):
+        pass
+
+    def onPhaseEnd(self, name, phaseStats):
+        """
+        :param str name: The name of the phase
+        :param dict phaseStats: The running totals for the phase, in the same format as Profiler.getReport
+        """
+        pass
+
+
+class LoggingProfilerHook(ProfilerHook):
+
+    def __init__(self, level=logging.INFO):
+        """Logs the time taken by each phase
+        :param int level: The logging level used for each message
+        """
+        self.level = level
+
+    def onPhaseEnd(self, name, phaseStats):
+        logger.log(self.level, 'Phase %s: %.4fs total over %d calls', name, phaseStats['seconds'], phaseStats['calls'])
+
+
+class Profiler:
+
+    def __init__(self, hooks=None, isMemoryTracked=False, isDetailTimed=False):
+        """Collects the time, row and byte counts, and peak memory of each phase of an import, analysis, or write.
+        Pass a profiler to FileImporter or GroupedStatistics to record their phases.
+
+        :param list hooks: ProfilerHook objects notified when each phase starts and ends
+        :param bool isMemoryTracked: If true, tracemalloc is used to record the peak memory of each phase. Tracing
+        memory slows down python code significantly so it's off by default.
+        :param bool isDetailTimed: If true, each column conversion, filter call, and column aggregation is timed as
+        its own phase (e.g. 'convert:age'). This adds a timer call to every value so it's off by default.
+        """
+        self.hooks = hooks or []
+        self.isMemoryTracked = isMemoryTracked
+        self.isDetailTimed = isDetailTimed
+        self.phases = {}
+        self.activePhases = []
+        self.peakMemoryBytes = 0
+        if isMemoryTracked and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def getPhaseStats(self, name):
+        phaseStats = self.phases.get(name)
+        if phaseStats is None:
+            phaseStats = {'seconds': 0.0, 'calls': 0, 'rows': 0, 'bytes': 0}
+            self.phases[name] = phaseStats
+        return phaseStats
+
+    @contextmanager
+    def phase(self, name):
+        """ Time a block of code. Phases can be nested, e.g. 'read' contains 'convert'.
+        Example:
+            with profiler.phase('group'):
+                ...
+        """
+        phaseStats = self.getPhaseStats(name)
+        if self.isMemoryTracked:
+            # Only phases timed with a context manager have a start and end where memory can be measured
+            phaseStats.setdefault('peakMemoryBytes', 0)
+        for hook in self.hooks:
+            hook.onPhaseStart(name)
+        self.updatePeakMemory()
+        self.activePhases.append(phaseStats)
+        start = perf_counter()
+        try:
+            yield phaseStats
+        finally:
+            phaseStats['seconds'] += perf_counter() - start
+            phaseStats['calls'] += 1
+            self.updatePeakMemory()
+            self.activePhases.pop()
+            for hook in self.hooks:
+                hook.onPhaseEnd(name, phaseStats)
+
+    def updatePeakMemory(self):
+        """ Add the peak memory since the last update to every active phase, then start measuring a new peak """
+        if not self.isMemoryTracked:
+            return
+        _, peakMemoryBytes = tracemalloc.get_traced_memory()
+        self.peakMemoryBytes = max(self.peakMemoryBytes, peakMemoryBytes)
+        for phaseStats in self.activePhases:
+            phaseStats['peakMemoryBytes'] = max(phaseStats['peakMemoryBytes'], peakMemoryBytes)
+        tracemalloc.reset_peak()
+
+    def addCounts(self, name, rowCount=0, byteCount=0):
+        """ Add to the number of rows and bytes handled by a phase. Used to calculate rows and bytes per second.
+        """
+        phaseStats = self.getPhaseStats(name)
+        phaseStats['rows'] += rowCount
+        phaseStats['bytes'] += byteCount
+
+    def getTimedFn(self, name, fn):
+        """ Get a function which calls fn and adds the time taken to the phase. Each call counts as one row. Hooks
+        aren't notified so the overhead stays small.
+        :return: function
+        """
+        phaseStats = self.getPhaseStats(name)
+
+        def timedFn(*args):
+            start = perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                phaseStats['seconds'] += perf_counter() - start
+                phaseStats['calls'] += 1
+                phaseStats['rows'] += 1
+
+        return timedFn
+
+    def getTimedIterator(self, name, iterator):
+        """ Yield each item from iterator and add the time spent getting it (not the time spent by the consumer) to
+        the phase
+        :return: generator
+        """
+        phaseStats = self.getPhaseStats(name)
+        iterator = iter(iterator)
+        phaseStats['calls'] += 1
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                phaseStats['seconds'] += perf_counter() - start
+                return
+            phaseStats['seconds'] += perf_counter() - start
+            phaseStats['rows'] += 1
+            yield item
+
+    def getReport(self):
+        """ Get the totals for every phase with rows and bytes per second
+        :return: dict
+        """
+        self.updatePeakMemory()
+        phases = {}
+        for name, phaseStats in self.phases.items():
+            seconds = phaseStats['seconds']
+            phases[name] = dict(
+                phaseStats,
+                rowsPerSecond=phaseStats['rows'] / seconds if seconds and phaseStats['rows'] else None,
+                bytesPerSecond=phaseStats['bytes'] / seconds if seconds and phaseStats['bytes'] else None
+            )
+        report = {'phases': phases}
+        if self.isMemoryTracked:
+            report['peakMemoryBytes'] = self.peakMemoryBytes
+        return report
+
+    def writeReport(self, filePath):
+        """ Write the report from getReport to a JSON file
+        :param str filePath: Name of the file to write to
+        """
+        with open(filePath, 'w') as reportFile:
+            json.dump(self.getReport(), reportFile, indent=2)
+
+
+def getPhase(profiler, name):
+    """ Get profiler.phase(name), or a context manager which does nothing if there is no profiler
+    """
+    return profiler.phase(name) if profiler else nullcontext()
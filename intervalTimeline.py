@@ -0,0 +1,256 @@
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from importer import *
+
+RESOLUTION_DELTAS = {
+    TIME_RESOLUTION_MINUTE: timedelta(minutes=1),
+    TIME_RESOLUTION_HOUR: timedelta(hours=1),
+    TIME_RESOLUTION_DAY: timedelta(days=1)
+}
+
+# Events at the same time are applied in this order so a part which finishes as another starts isn't counted twice
+EVENT_END = 0
+EVENT_READY = 1
+EVENT_START = 2
+
+
+def getResolutionDelta(resolution):
+    """ Get the timedelta of a TIME_RESOLUTION_* value. A timedelta which evenly divides a day (e.g. 15 minutes) can
+    also be used.
+    :return: timedelta
+    """
+    resolutionDelta = RESOLUTION_DELTAS.get(resolution, resolution)
+    if not isinstance(resolutionDelta, timedelta) or timedelta(days=1) % resolutionDelta:
+        raise ValueError(f'Unsupported time resolution: {resolution}')
+    return resolutionDelta
+
+
+def floorDateTime(val, resolutionDelta):
+    """ Round a datetime down to the start of its bucket, e.g. 14:37 -> 14:00 for an hour resolution """
+    dayStart = datetime.combine(val.date(), datetime.min.time(), val.tzinfo)
+    return dayStart + ((val - dayStart) // resolutionDelta) * resolutionDelta
+
+
+class GroupTimeline:
+
+    def __init__(self):
+        """The counts of a single group as a step function. Each change point has the time and the counts from that
+        time until the next change point. Counts are 0 before the first change point.
+        """
+        self.times = []
+        self.wipCounts = array('l')
+        self.busyCounts = array('l')
+        self.queueCounts = array('l')
+        self.resourceKeys = set()
+        self.wipCount = 0
+        self.busyCount = 0
+        self.queueCount = 0
+
+    def addChange(self, time, wipDelta, busyDelta, queueDelta):
+        self.wipCount += wipDelta
+        self.busyCount += busyDelta
+        self.queueCount += queueDelta
+        # Several events at the same time are a single change point
+        if self.times and self.times[-1] == time:
+            self.wipCounts[-1] = self.wipCount
+            self.busyCounts[-1] = self.busyCount
+            self.queueCounts[-1] = self.queueCount
+        else:
+            self.times.append(time)
+            self.wipCounts.append(self.wipCount)
+            self.busyCounts.append(self.busyCount)
+            self.queueCounts.append(self.queueCount)
+
+    def getCountsAt(self, time):
+        """ Get the work in process, busy resources, and queued items at a time
+        :return: dict
+        """
+        idx = bisect_right(self.times, time) - 1
+        if idx < 0:
+            return {'wip': 0, 'busy': 0, 'queue': 0}
+        return {'wip': self.wipCounts[idx], 'busy': self.busyCounts[idx], 'queue': self.queueCounts[idx]}
+
+    def getBucketStats(self, resolutionDelta, start=None, end=None):
+        """ Get time weighted statistics for each bucket from start to end with a single pass over the change points
+        :param timedelta resolutionDelta: The length of each bucket
+        :param datetime start: Defaults to the first change point
+        :param datetime end: Defaults to the last change point
+        :return: list of dicts
+        """
+        times = self.times
+        resourceCount = len(self.resourceKeys)
+        bucketStart = floorDateTime(start or times[0], resolutionDelta)
+        end = end or times[-1]
+        bucketMinutes = resolutionDelta.total_seconds() / 60
+
+        # The change point in effect at the start of the bucket
+        idx = bisect_right(times, bucketStart) - 1
+        wipCount, busyCount, queueCount = (
+            (self.wipCounts[idx], self.busyCounts[idx], self.queueCounts[idx]) if idx >= 0 else (0, 0, 0)
+        )
+        buckets = []
+        while bucketStart < end:
+            bucketEnd = bucketStart + resolutionDelta
+            segmentStart = bucketStart
+            wipMinutes = busyMinutes = queueMinutes = 0
+            wipMax, queueMax = wipCount, queueCount
+            while idx + 1 < len(times) and times[idx + 1] < bucketEnd:
+                idx += 1
+                segmentMinutes = (times[idx] - segmentStart).total_seconds() / 60
+                wipMinutes += wipCount * segmentMinutes
+                busyMinutes += busyCount * segmentMinutes
+                queueMinutes += queueCount * segmentMinutes
+                wipCount, busyCount, queueCount = self.wipCounts[idx], self.busyCounts[idx], self.queueCounts[idx]
+                wipMax = max(wipMax, wipCount)
+                queueMax = max(queueMax, queueCount)
+                segmentStart = times[idx]
+            segmentMinutes = (bucketEnd - segmentStart).total_seconds() / 60
+            wipMinutes += wipCount * segmentMinutes
+            busyMinutes += busyCount * segmentMinutes
+            queueMinutes += queueCount * segmentMinutes
+
+            buckets.append({
+                'bucketStart': bucketStart,
+                'wipAvg': wipMinutes / bucketMinutes,
+                'wipMax': wipMax,
+                'busyMinutes': busyMinutes,
+                'idleMinutes': resourceCount * bucketMinutes - busyMinutes,
+                'utilization': busyMinutes / (resourceCount * bucketMinutes) if resourceCount else None,
+                'queueAvg': queueMinutes / bucketMinutes,
+                'queueMax': queueMax
+            })
+            bucketStart = bucketEnd
+        return buckets
+
+
+class IntervalTimeline:
+
+    def __init__(self, data, startColumn, endColumn, resourceColumns, groupings=None, readyColumn=None, headers=None):
+        """Work in process, utilization, and queue depth over time from records with a start and end time (e.g.
+        parts processed on machines). Every start, end, and ready time is sorted once and swept in a single pass which
+        builds a step function of the counts for every group of every grouping. Counts at any time and statistics at
+        any time resolution are then read from the step functions without reading the data again.
+
+        :param iterable data: Records with a start and end time. Records without both, or which don't end after
+        they start, are skipped.
+        :param str startColumn: Column key of the time the record starts being processed
+        :param str endColumn: Column key of the time the record stops being processed
+        :param tuple resourceColumns: Column keys which identify a single resource (e.g. ('machineId',)). A resource is
+        busy while it is processing at least one record.
+        :param list groupings: Tuples of column keys to count by, e.g. [('machineId', 'machineType'), ('machineType',)].
+        Each group should contain whole resources. Defaults to [resourceColumns].
+        :param str readyColumn: If provided, column key of the time a record is ready to be processed. Records are in
+        the queue from this time until the start time.
+        :param list headers: Header values for each column. Required if records are not dictionaries.
+        Example:
+            timeline = IntervalTimeline(data, 'processingStartTime', 'processingEndTime', ('machineId',),
+                                        [('machineId', 'machineType'), ('machineType',)])
+            timeline.getBucketStats(TIME_RESOLUTION_HOUR, ('machineType',))
+            output: {('Car machine',): [{'bucketStart': datetime(2020, 12, 16, 0, 0), 'wipAvg': 3.4, ...}, ...], ...}
+        """
+        self.resourceColumns = tuple(resourceColumns)
+        self.groupings = [tuple(grouping) for grouping in groupings] if groupings else [self.resourceColumns]
+        self.timelines = {grouping: {} for grouping in self.groupings}
+        self.setTimelines(data, startColumn, endColumn, readyColumn, headers)
+
+    def setTimelines(self, data, startColumn, endColumn, readyColumn, headers):
+        headerIndexes = {header: idx for idx, header in enumerate(headers or ())}
+
+        def getKeyFn(columns):
+            return lambda record: tuple(
+                record[column] if isinstance(record, dict) else record[headerIndexes[column]] for column in columns
+            )
+
+        getValue = getKeyFn((startColumn, endColumn, readyColumn) if readyColumn else (startColumn, endColumn))
+        getResourceKey = getKeyFn(self.resourceColumns)
+        groupKeyFns = [getKeyFn(grouping) for grouping in self.groupings]
+
+        events = []
+        recordKeys = []
+        for record in data:
+            times = getValue(record)
+            startTime, endTime = times[0], times[1]
+            if startTime is None or endTime is None or endTime <= startTime:
+                continue
+            recordIdx = len(recordKeys)
+            resourceKey = getResourceKey(record)
+            groupTimelines = []
+            for grouping, getGroupKey in zip(self.groupings, groupKeyFns):
+                groupKey = getGroupKey(record)
+                groupTimeline = self.timelines[grouping].get(groupKey)
+                if groupTimeline is None:
+                    groupTimeline = GroupTimeline()
+                    self.timelines[grouping][groupKey] = groupTimeline
+                groupTimeline.resourceKeys.add(resourceKey)
+                groupTimelines.append(groupTimeline)
+            recordKeys.append((resourceKey, groupTimelines))
+
+            events.append((startTime, EVENT_START, recordIdx))
+            events.append((endTime, EVENT_END, recordIdx))
+            readyTime = times[2] if readyColumn else None
+            if readyTime is not None and readyTime <= startTime:
+                events.append((readyTime, EVENT_READY, recordIdx))
+
+        events.sort()
+        resourceWipCounts = {}
+        queuedRecordIdxs = set()
+        for time, eventType, recordIdx in events:
+            resourceKey, groupTimelines = recordKeys[recordIdx]
+            if eventType == EVENT_READY:
+                queuedRecordIdxs.add(recordIdx)
+                wipDelta, busyDelta, queueDelta = 0, 0, 1
+            elif eventType == EVENT_START:
+                resourceWipCount = resourceWipCounts.get(resourceKey, 0) + 1
+                resourceWipCounts[resourceKey] = resourceWipCount
+                queueDelta = 0
+                if recordIdx in queuedRecordIdxs:
+                    queuedRecordIdxs.remove(recordIdx)
+                    queueDelta = -1
+                wipDelta, busyDelta = 1, 1 if resourceWipCount == 1 else 0
+            else:
+                resourceWipCount = resourceWipCounts[resourceKey] - 1
+                resourceWipCounts[resourceKey] = resourceWipCount
+                wipDelta, busyDelta, queueDelta = -1, -1 if resourceWipCount == 0 else 0, 0
+            for groupTimeline in groupTimelines:
+                groupTimeline.addChange(time, wipDelta, busyDelta, queueDelta)
+
+    def getGroupTimelines(self, grouping=None):
+        grouping = tuple(grouping) if grouping else self.groupings[0]
+        if grouping not in self.timelines:
+            raise ValueError(f'Unknown grouping: {grouping}')
+        return self.timelines[grouping]
+
+    def getCountsAt(self, time, grouping=None):
+        """ Get the work in process, busy resources, and queued records of each group at a time
+        :param datetime time: The time of the snapshot
+        :param tuple grouping: One of the groupings. Defaults to the first grouping.
+        :return: dict
+            Example: {(489, 'Car machine'): {'wip': 2, 'busy': 1, 'queue': 0}, ...}
+        """
+        return {
+            groupKey: groupTimeline.getCountsAt(time)
+            for groupKey, groupTimeline in self.getGroupTimelines(grouping).items()
+        }
+
+    def getBucketStats(self, resolution=TIME_RESOLUTION_HOUR, grouping=None, start=None, end=None):
+        """ Get time weighted statistics of each group for every bucket of time
+        Stats for each bucket:
+            bucketStart: The start time of the bucket
+            wipAvg, wipMax: Average and max number of records being processed
+            busyMinutes, idleMinutes: Resource minutes spent processing or waiting for at least one record
+            utilization: busyMinutes as a fraction of the resource minutes in the bucket
+            queueAvg, queueMax: Average and max number of records which are ready but not started
+        :param str|timedelta resolution: TIME_RESOLUTION_MINUTE, TIME_RESOLUTION_HOUR, TIME_RESOLUTION_DAY, or a
+        timedelta which evenly divides a day
+        :param tuple grouping: One of the groupings. Defaults to the first grouping.
+        :param datetime start: If provided, buckets start here instead of at each group's first event
+        :param datetime end: If provided, buckets end here instead of at each group's last event
+        :return: dict of group key and list of bucket stats
+        """
+        resolutionDelta = getResolutionDelta(resolution)
+        return {
+            groupKey: groupTimeline.getBucketStats(resolutionDelta, start, end)
+            for groupKey, groupTimeline in self.getGroupTimelines(grouping).items()
+        }
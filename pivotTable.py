@@ -0,0 +1,201 @@
+from importer.columnarTable import getColumnFromValues
+from importer.groupStatistics import GroupStatistics
+
+PIVOT_AGGREGATIONS = (
+    GroupStatistics.SUM, GroupStatistics.MEAN, GroupStatistics.MIN, GroupStatistics.MAX, GroupStatistics.COUNT,
+    GroupStatistics.COUNT_NOT_NULL
+)
+
+COUNT_IDX = 0
+COUNT_NOT_NULL_IDX = 1
+SUM_IDX = 2
+MIN_IDX = 3
+MAX_IDX = 4
+
+
+def getSortedLabels(labels):
+    """ Sort labels if they can be compared with each other, otherwise keep them in the order they were found """
+    try:
+        return sorted(labels)
+    except TypeError:
+        return list(labels)
+
+
+def getAccumulatedValue(accumulator, aggregation):
+    """ Get the aggregated value of one cell from its running values. Uses the same rules as GroupStatistics: sum and
+    mean only include numbers, and mean divides by the number of values which aren't None.
+    """
+    if aggregation == GroupStatistics.COUNT:
+        return accumulator[COUNT_IDX]
+    if aggregation == GroupStatistics.COUNT_NOT_NULL:
+        return accumulator[COUNT_NOT_NULL_IDX]
+    if aggregation == GroupStatistics.SUM:
+        return accumulator[SUM_IDX]
+    if aggregation == GroupStatistics.MEAN:
+        if accumulator[SUM_IDX] is None or not accumulator[COUNT_NOT_NULL_IDX]:
+            return None
+        return accumulator[SUM_IDX] / accumulator[COUNT_NOT_NULL_IDX]
+    if aggregation == GroupStatistics.MIN:
+        return accumulator[MIN_IDX]
+    return accumulator[MAX_IDX]
+
+
+def accumulate(accumulator, value):
+    accumulator[COUNT_IDX] += 1
+    if value is None:
+        return
+    accumulator[COUNT_NOT_NULL_IDX] += 1
+    if isinstance(value, (int, float)):
+        currentSum = accumulator[SUM_IDX]
+        accumulator[SUM_IDX] = value if currentSum is None else currentSum + value
+    try:
+        if accumulator[MIN_IDX] is None or value < accumulator[MIN_IDX]:
+            accumulator[MIN_IDX] = value
+        if accumulator[MAX_IDX] is None or value > accumulator[MAX_IDX]:
+            accumulator[MAX_IDX] = value
+    except TypeError:
+        # Values which can't be compared with the others (e.g. a string in a number column) have no min or max
+        pass
+
+
+class PivotTable:
+
+    def __init__(self, records, getCell, valueColumns, aggregation=GroupStatistics.SUM, rowLabels=None,
+                 columnLabels=None, fillValue=None):
+        """A crosstab of row keys x column keys with one aggregated value per cell for each value column. The data is
+        read once and each value column is stored as a dense row-major matrix in a typed array (see
+        columnarTable.getColumnFromValues). Use FileImporter.getPivotTable to build one from groupings.
+
+        :param iterable records: Data records
+        :param function getCell: A function which takes a record and returns (rowLabel, columnLabel, values) where
+        values has one value for each value column
+        :param list valueColumns: Column keys of the aggregated values
+        :param str aggregation: One of PIVOT_AGGREGATIONS (GroupStatistics.SUM, MEAN, MIN, MAX, COUNT, COUNT_NOT_NULL)
+        :param list rowLabels: If provided, the rows of the table in this order. Rows without data are filled with
+        fillValue and records with other row labels are left out. Defaults to every row label in the data, sorted.
+        :param list columnLabels: Same as rowLabels for the columns
+        :param fillValue: The value of cells with no data (or no value, e.g. the sum of a column of strings)
+        """
+        if aggregation not in PIVOT_AGGREGATIONS:
+            raise ValueError(f'Unsupported aggregation: {aggregation}')
+        self.valueColumns = list(valueColumns)
+        self.aggregation = aggregation
+        self.fillValue = fillValue
+        self.setMatrices(records, getCell, rowLabels, columnLabels)
+
+    def setMatrices(self, records, getCell, rowLabels, columnLabels):
+        isRowFixed = rowLabels is not None
+        isColumnFixed = columnLabels is not None
+        rowIdxs = {label: idx for idx, label in enumerate(rowLabels or ())}
+        columnIdxs = {label: idx for idx, label in enumerate(columnLabels or ())}
+        valueCount = len(self.valueColumns)
+
+        # Labels which aren't known up front are numbered as they're found and sorted once every cell is filled
+        cellAccumulators = {}
+        for record in records:
+            rowLabel, columnLabel, values = getCell(record)
+            rowIdx = rowIdxs.get(rowLabel)
+            if rowIdx is None:
+                if isRowFixed:
+                    continue
+                rowIdx = len(rowIdxs)
+                rowIdxs[rowLabel] = rowIdx
+            columnIdx = columnIdxs.get(columnLabel)
+            if columnIdx is None:
+                if isColumnFixed:
+                    continue
+                columnIdx = len(columnIdxs)
+                columnIdxs[columnLabel] = columnIdx
+
+            accumulators = cellAccumulators.get((rowIdx, columnIdx))
+            if accumulators is None:
+                accumulators = [[0, 0, None, None, None] for _ in range(valueCount)]
+                cellAccumulators[(rowIdx, columnIdx)] = accumulators
+            for accumulator, value in zip(accumulators, values):
+                accumulate(accumulator, value)
+
+        self.rowLabels = list(rowLabels) if isRowFixed else getSortedLabels(rowIdxs)
+        self.columnLabels = list(columnLabels) if isColumnFixed else getSortedLabels(columnIdxs)
+        # Positions of each found label in the output order
+        rowPositions = {rowIdxs[label]: position for position, label in enumerate(self.rowLabels)}
+        columnPositions = {columnIdxs[label]: position for position, label in enumerate(self.columnLabels)}
+        self.rowIdxs = {label: position for position, label in enumerate(self.rowLabels)}
+        self.columnIdxs = {label: position for position, label in enumerate(self.columnLabels)}
+
+        columnCount = len(self.columnLabels)
+        cellCount = len(self.rowLabels) * columnCount
+        self.filledCells = bytearray(cellCount)
+        matrixValues = [[None] * cellCount for _ in range(valueCount)]
+        for (rowIdx, columnIdx), accumulators in cellAccumulators.items():
+            cellIdx = rowPositions[rowIdx] * columnCount + columnPositions[columnIdx]
+            self.filledCells[cellIdx] = 1
+            for values, accumulator in zip(matrixValues, accumulators):
+                values[cellIdx] = getAccumulatedValue(accumulator, self.aggregation)
+        self.matrices = {
+            valueColumn: getColumnFromValues(values) for valueColumn, values in zip(self.valueColumns, matrixValues)
+        }
+
+    def getCellIdx(self, rowLabel, columnLabel):
+        return self.rowIdxs[rowLabel] * len(self.columnLabels) + self.columnIdxs[columnLabel]
+
+    def getMatrix(self, valueColumn=None):
+        return self.matrices[valueColumn if valueColumn is not None else self.valueColumns[0]]
+
+    def hasData(self, rowLabel, columnLabel):
+        """ Return True if at least one record was aggregated into the cell """
+        return bool(self.filledCells[self.getCellIdx(rowLabel, columnLabel)])
+
+    def getValue(self, rowLabel, columnLabel, valueColumn=None):
+        """ Get the aggregated value of a cell
+        :param valueColumn: Defaults to the first value column
+        """
+        value = self.getMatrix(valueColumn)[self.getCellIdx(rowLabel, columnLabel)]
+        return self.fillValue if value is None else value
+
+    def getRow(self, rowLabel, valueColumn=None):
+        """ Get the value of every column for one row
+        :return: list
+        """
+        matrix = self.getMatrix(valueColumn)
+        start = self.rowIdxs[rowLabel] * len(self.columnLabels)
+        fillValue = self.fillValue
+        return [
+            fillValue if value is None else value
+            for value in (matrix[cellIdx] for cellIdx in range(start, start + len(self.columnLabels)))
+        ]
+
+    def getRows(self, valueColumn=None):
+        """ Get each row with its row label as the first value. A row label with several columns (a tuple) is spread
+        across the first values. Matches the headers from getHeaders.
+        :return: list
+        """
+        return [
+            (list(rowLabel) if isinstance(rowLabel, tuple) else [rowLabel]) + self.getRow(rowLabel, valueColumn)
+            for rowLabel in self.rowLabels
+        ]
+
+    def getHeaders(self, rowHeaders=None):
+        """ Get the headers for getRows. Column labels with several columns (tuples) are joined with ' - '.
+        :param list rowHeaders: The headers of the row label columns. Defaults to None for each.
+        :return: list
+        """
+        if rowHeaders is None:
+            firstRowLabel = self.rowLabels[0] if self.rowLabels else None
+            rowHeaders = [None] * (len(firstRowLabel) if isinstance(firstRowLabel, tuple) else 1)
+        return list(rowHeaders) + [
+            ' - '.join(str(label) for label in columnLabel) if isinstance(columnLabel, tuple) else columnLabel
+            for columnLabel in self.columnLabels
+        ]
+
+    def getSheetsConfig(self, rowHeaders=None, titles=None):
+        """ Get one sheet for each value column which can be passed to FileImporter.writeExcelFile
+        :param list rowHeaders: The headers of the row label columns
+        :param dict titles: A key/value pair of value column and sheet title. Defaults to the value column.
+        :return: list
+        """
+        titles = titles or {}
+        return [
+            {'data': self.getRows(valueColumn), 'headers': self.getHeaders(rowHeaders),
+             'title': titles.get(valueColumn, valueColumn)}
+            for valueColumn in self.valueColumns
+        ]
@@ -1,7 +1,11 @@
+from datetime import datetime, time, timedelta
+
 from dataAnalysis import getDateTimeDiff, TIME_AGG_MINUTES
 from importer import *
+from importer.expressions import applyFunction, column
 from importer.fileImport import FileImporter
-from importer.groupStatistics import GroupStatistics, stringifyGroup
+from importer.groupStatistics import GroupedStatistics, GroupStatistics, stringifyGroup
+from importer.intervalTimeline import IntervalTimeline
 
 defaultDataTypes = {
     'partId': int,
@@ -17,18 +21,24 @@ defaultHeaders = {
     'subPartReadyTime': 'inputPartReadyTime'
 }
 
-fileImporter = FileImporter(f'{DATA_FILE_PATH}CarProcessingData_20201216_20201229.csv',
-                            defaultHeaders=defaultHeaders, defaultDataTypes=defaultDataTypes)
+derivedColumns = {
+    'processingMinutes': applyFunction(getDateTimeDiff, column('processingEndTime'), column('processingStartTime')),
+    'processingStartDate': column('processingStartTime').date()
+}
+
+# Every daily feed file is imported as one dataset
+fileImporter = FileImporter(f'{DATA_FILE_PATH}CarProcessingData_*_*.csv',
+                            defaultHeaders=defaultHeaders, defaultDataTypes=defaultDataTypes,
+                            derivedColumns=derivedColumns)
 
-newDataHeaders = ['partId', 'partName', 'machineId', 'machineType', 'processingStartTime', 'processingEndTime']
+newDataHeaders = ['partId', 'partName', 'machineId', 'machineType', 'processingStartTime', 'processingEndTime',
+                  'processingMinutes', 'processingStartDate']
 
 aggregatedCarData = {}
 for record in fileImporter.data:
     newRecord = aggregatedCarData.get(record['partId'], None)
     if not newRecord:
         newRecord = {header: record[header] for header in newDataHeaders}
-        newRecord['processingMinutes'] = getDateTimeDiff(record['processingEndTime'], record['processingStartTime'])
-        newRecord['processingStartDate'] = record['processingStartTime'].date()
         newRecord['inputPartIds'] = []
         newRecord['readyProcessingStartTime'] = None
         if record['inputPartId']:
@@ -46,51 +56,57 @@ for record in aggregatedCarData.values():
     record['inputPartIds'] = tuple(record['inputPartIds'])
 
 fileImporter.data = list(aggregatedCarData.values())
-carPartDataGroups = fileImporter.getGroupData([('partName', 'processingStartDate')])[('partName',
-                                                                                         'processingStartDate')]
-
-
-carPartDateGroups = {groupKey: GroupStatistics(group) for groupKey, group in carPartDataGroups.items()}
+timeMetrics = (GroupStatistics.MIN, GroupStatistics.MAX, GroupStatistics.MEAN, GroupStatistics.STD_DEVIATION)
+carPartDateGroups = GroupedStatistics(fileImporter.data, ('partName', 'processingStartDate'),
+                                      statistics={'processingMinutes': timeMetrics, 'waitTimeMinutes': timeMetrics}
+                                      ).calculatedStatistics
 
 headers = ['partName', 'processingStartDate', 'processingTimeMin', 'processingTimeMax', 'processingTimeAvg',
            'processingTimeStdDev', 'waitTimeMin', 'waitTimeMax', 'waitTimeAvg', 'waitTimeStdDev']
 
 carPartDateOutputData =[]
-for groupKey, groupStats in carPartDateGroups.items():
+for groupKey, stats in carPartDateGroups.items():
     newRecord = []
     newRecord.append(groupKey[0])
     newRecord.append(groupKey[1])
 
-    stats = groupStats.calculatedStatistics
     processingTimeStats = stats['processingMinutes']
     waitTimeStats = stats['waitTimeMinutes']
     for timeStats in (processingTimeStats, waitTimeStats):
-        for metric in (groupStats.MIN, groupStats.MAX, groupStats.MEAN, groupStats.STD_DEVIATION):
+        for metric in timeMetrics:
             newRecord.append(timeStats[metric])
     carPartDateOutputData.append(newRecord)
 
-def isPartInProcess(record):
-    if not record['processingStartTime'] or not record['processingEndTime']:
-        return False
-    targetDateTime = record['processingStartTime'].replace(hour=23, minute=0, second=0, microsecond=0)
-    return record['processingStartTime'] <= targetDateTime and record['processingEndTime'] >= targetDateTime
-
-machineDataGroups = fileImporter.getGroupData([('machineId', 'machineType', 'processingStartDate')],
-                                                  filterFn=isPartInProcess)[('machineId', 'machineType',
-                                                                             'processingStartDate')]
+# Parts on each machine at 23:00 of every day, including parts which started on an earlier day
+SNAPSHOT_HOUR = 23
+machineGrouping = ('machineId', 'machineType')
+machineTypeGrouping = ('machineType',)
+machineTimeline = IntervalTimeline(fileImporter.data, 'processingStartTime', 'processingEndTime', ('machineId',),
+                                   [machineGrouping, machineTypeGrouping], readyColumn='readyProcessingStartTime')
+processingDates = [record['processingStartDate'] for record in fileImporter.data if record['processingStartDate']]
 partsProcessingHeaders = ['machineName', 'date', 'partsInProcess']
 partsInProcessRecords = []
-for groupKey, partsList in machineDataGroups.items():
-    newRecord = []
-    newRecord.append(f'{groupKey[1]} ({groupKey[0]})')
-    newRecord.append(groupKey[2])
-    newRecord.append(len(partsList))
-    partsInProcessRecords.append(newRecord)
-
+for dayOffset in range((max(processingDates) - min(processingDates)).days + 1):
+    snapshotDate = min(processingDates) + timedelta(days=dayOffset)
+    snapshotTime = datetime.combine(snapshotDate, time(hour=SNAPSHOT_HOUR))
+    for groupKey, counts in machineTimeline.getCountsAt(snapshotTime, machineGrouping).items():
+        if counts['wip']:
+            partsInProcessRecords.append([f'{groupKey[1]} ({groupKey[0]})', snapshotDate, counts['wip']])
+
+machineUtilizationHeaders = ['machineType', 'date', 'utilization', 'busyMinutes', 'idleMinutes', 'partsInProcessAvg',
+                             'partsInProcessMax', 'partsWaitingAvg', 'partsWaitingMax']
+machineUtilizationRecords = []
+for groupKey, buckets in machineTimeline.getBucketStats(TIME_RESOLUTION_DAY, machineTypeGrouping).items():
+    for bucket in buckets:
+        machineUtilizationRecords.append([
+            groupKey[0], bucket['bucketStart'].date(), bucket['utilization'], bucket['busyMinutes'],
+            bucket['idleMinutes'], bucket['wipAvg'], bucket['wipMax'], bucket['queueAvg'], bucket['queueMax']
+        ])
 
 sheetsConfig = [
     {'data': carPartDateOutputData, 'headers': headers, 'title': 'partProcessAnalysis'},
-    {'data': partsInProcessRecords, 'headers': partsProcessingHeaders, 'title': 'machineThroughput'}
+    {'data': partsInProcessRecords, 'headers': partsProcessingHeaders, 'title': 'machineThroughput'},
+    {'data': machineUtilizationRecords, 'headers': machineUtilizationHeaders, 'title': 'machineUtilization'}
 ]
 
 fileImporter.writeExcelFile('carPartProcessingAnalysis', sheetsConfig=sheetsConfig)
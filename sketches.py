@@ -0,0 +1,122 @@
+import hashlib
+from math import log
+
+from importer import *
+
+
+def getStableHash(value):
+    """ Get a 64 bit hash which is the same in every process. Python's hash() is randomized for strings, which would
+    stop sketches saved in one run from being merged with sketches from another run.
+    """
+    return int.from_bytes(hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+
+    def __init__(self, precision=HYPERLOGLOG_PRECISION):
+        """Approximate count of distinct values using a fixed amount of memory (2 ** precision bytes). The
+        standard error of the count is about 1.04 / sqrt(2 ** precision), e.g. 1.6% for a precision of 12.
+
+        :param int precision: The number of hash bits used to pick a register
+        """
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        valueHash = getStableHash(value)
+        registerIdx = valueHash >> (64 - self.precision)
+        remainingBits = 64 - self.precision
+        remainder = valueHash & ((1 << remainingBits) - 1)
+        rank = remainingBits - remainder.bit_length() + 1
+        if rank > self.registers[registerIdx]:
+            self.registers[registerIdx] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('HyperLogLog sketches must have the same precision to be merged')
+        self.registers = bytearray(max(register, otherRegister)
+                                   for register, otherRegister in zip(self.registers, other.registers))
+
+    def getCount(self):
+        registerCount = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / registerCount)
+        estimate = alpha * registerCount * registerCount / sum(2.0 ** -register for register in self.registers)
+        emptyRegisters = self.registers.count(0)
+        if estimate <= 2.5 * registerCount and emptyRegisters:
+            # Linear counting is more accurate for small counts
+            estimate = registerCount * log(registerCount / emptyRegisters)
+        return round(estimate)
+
+
+class SpaceSaving:
+
+    def __init__(self, size=TOP_K_SIZE):
+        """Approximate counts of the most frequent values using a fixed number of counters (the Space-Saving
+        algorithm). Any value which appears more than n / size times is kept, and each count is too high by at
+        most n / size, where n is the number of values added.
+
+        :param int size: The number of counters (the k in top-k)
+        """
+        self.size = size
+        self.counts = {}
+
+    def add(self, value, count=1):
+        if value in self.counts:
+            self.counts[value] += count
+        elif len(self.counts) < self.size:
+            self.counts[value] = count
+        else:
+            # Replace the smallest counter. The new value may have appeared up to that many times before.
+            minValue = min(self.counts, key=self.counts.get)
+            self.counts[value] = self.counts.pop(minValue) + count
+
+    def merge(self, other):
+        combinedCounts = dict(self.counts)
+        for value, count in other.counts.items():
+            combinedCounts[value] = combinedCounts.get(value, 0) + count
+        topCounts = sorted(combinedCounts.items(), key=lambda valueCount: valueCount[1], reverse=True)
+        self.counts = dict(topCounts[:self.size])
+
+    def getTopCounts(self):
+        """ Get the approximate count of each tracked value, highest count first
+        :return: dict
+        """
+        return dict(sorted(self.counts.items(), key=lambda valueCount: valueCount[1], reverse=True))
+
+
+class UniqueValueSketch:
+
+    def __init__(self):
+        """Approximate replacement for the exact {value: count} dict used for COUNT_UNIQUE. Tracks the number of
+        distinct values with a HyperLogLog and the most frequent values with Space-Saving.
+        """
+        self.distinctValues = HyperLogLog()
+        self.topValues = SpaceSaving()
+
+    def add(self, value):
+        self.distinctValues.add(value)
+        self.topValues.add(value)
+
+    def merge(self, other):
+        self.distinctValues.merge(other.distinctValues)
+        self.topValues.merge(other.topValues)
+
+    def getDistinctCount(self):
+        return self.distinctValues.getCount()
+
+    def getTopCounts(self):
+        return self.topValues.getTopCounts()
+
+
+def getUniqueTracker(uniqueMode):
+    """ Get the object used to track unique values for a column
+    :param str uniqueMode: UNIQUE_MODE_EXACT, UNIQUE_MODE_APPROXIMATE, or UNIQUE_MODE_NONE
+    :return: dict|UniqueValueSketch|None
+    """
+    if uniqueMode == UNIQUE_MODE_EXACT:
+        return {}
+    if uniqueMode == UNIQUE_MODE_APPROXIMATE:
+        return UniqueValueSketch()
+    if uniqueMode == UNIQUE_MODE_NONE:
+        return None
+    raise ValueError('Unique mode must be exact, approximate, or none')
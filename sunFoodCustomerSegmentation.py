@@ -1,11 +1,11 @@
 from dataAnalysis import getAgeGroup
 from importer import *
 from importer.fileImport import FileImporter
-from importer.groupStatistics import GroupStatistics, stringifyGroup
+from importer.groupStatistics import GroupedStatistics, GroupStatistics, stringifyGroup
 
 originalCustomerDataFileName = 'SunFoodShop_customers.csv'
 
-def getSunFoodFileImporter(fileName, rowFilterFn=None):
+def getSunFoodFileImporter(fileName, rowFilterFn=None, columns=None, readFilterColumns=None, readFilterFn=None):
     defaultDataTypes = {
         'isMarried': int,
         'isEmployed': int,
@@ -16,53 +16,45 @@ def getSunFoodFileImporter(fileName, rowFilterFn=None):
         'avgPurchaseAmount': float
     }
 
-    return FileImporter(f'{DATA_FILE_PATH}{fileName}', defaultDataTypes=defaultDataTypes, rowFilterFn=rowFilterFn)
+    return FileImporter(f'{DATA_FILE_PATH}{fileName}', defaultDataTypes=defaultDataTypes, rowFilterFn=rowFilterFn,
+                        columns=columns, readFilterColumns=readFilterColumns, readFilterFn=readFilterFn)
 
 fileImporter = getSunFoodFileImporter(originalCustomerDataFileName)
 
 def getBabySegmentData(fileImporter):
-    groupedData = fileImporter.getGroupData([('hasNewBaby',),])
-
-    hasNewBabySegments = groupedData[('hasNewBaby',)]
-    babySegmentsStats = {groupKey: GroupStatistics(group) for groupKey, group in hasNewBabySegments.items()}
+    babySegmentsStats = GroupedStatistics(fileImporter.data, ('hasNewBaby',)).calculatedStatistics
     babyAnalysisData = []
 
-    for groupKey, groupStats in babySegmentsStats.items():
-        stats = groupStats.calculatedStatistics
+    for groupKey, stats in babySegmentsStats.items():
         newRecord = []
         newRecord.append(stringifyGroup(('hasNewBaby',), groupKey))  # Implement the stringifyGroup function
-        newRecord.append((stats['customerKey'][groupStats.COUNT] / len(fileImporter.data)) * 100)
-        newRecord.append(stats['customerKey'][groupStats.COUNT])
-        newRecord.append(round(stats['avgPurchaseAmount'][groupStats.MEAN], 2))
-        newRecord.append(round(stats['avgPurchaseAmount'][groupStats.MAX], 2))
-        newRecord.append(round(stats['avgPurchaseAmount'][groupStats.MIN], 2))
-        newRecord.append(stats['isEmployed'][groupStats.MEAN] * 100)
-        newRecord.append(stats['age'][groupStats.MEAN])
-        newRecord.append(round(stats['annualIncome'][groupStats.MEAN], 2))
+        newRecord.append((stats['customerKey'][GroupStatistics.COUNT] / len(fileImporter.data)) * 100)
+        newRecord.append(stats['customerKey'][GroupStatistics.COUNT])
+        newRecord.append(round(stats['avgPurchaseAmount'][GroupStatistics.MEAN], 2))
+        newRecord.append(round(stats['avgPurchaseAmount'][GroupStatistics.MAX], 2))
+        newRecord.append(round(stats['avgPurchaseAmount'][GroupStatistics.MIN], 2))
+        newRecord.append(stats['isEmployed'][GroupStatistics.MEAN] * 100)
+        newRecord.append(stats['age'][GroupStatistics.MEAN])
+        newRecord.append(round(stats['annualIncome'][GroupStatistics.MEAN], 2))
         babyAnalysisData.append(newRecord)
 
     return babyAnalysisData
 
 babyAnalysisData = getBabySegmentData(fileImporter)
 
-groupedData = fileImporter.getGroupData([
-    ('hasNewBaby',),
-    ('sex', ('age', getAgeGroup)),
-])
 groupedSegmentStats = {}
-for groupedDataKey, groupedSegments in groupedData.items():
-    groupedSegmentStats[groupedDataKey] = {groupKey: GroupStatistics(group) for groupKey, group in groupedSegments.items()}
+for grouping in (('hasNewBaby',), ('sex', ('age', getAgeGroup))):
+    groupedSegmentStats[fileImporter.getGroupColumnKey(grouping)] = GroupedStatistics(fileImporter.data, grouping).calculatedStatistics
 
 segmentationHeaders = ['group', 'customerCount', 'avgPurchasePrice']
 segmentationAnalysisData = []
 
 for groupedDataKey, segmentStats in groupedSegmentStats.items():
-    for groupKey, groupStats in segmentStats.items():
+    for groupKey, stats in segmentStats.items():
         newRecord = []
-        stats = groupStats.calculatedStatistics
         newRecord.append(stringifyGroup(groupedDataKey, groupKey))
-        newRecord.append(stats['customerKey'][groupStats.COUNT])
-        newRecord.append(round(stats['avgPurchaseAmount'][groupStats.MEAN], 2))
+        newRecord.append(stats['customerKey'][GroupStatistics.COUNT])
+        newRecord.append(round(stats['avgPurchaseAmount'][GroupStatistics.MEAN], 2))
         segmentationAnalysisData.append(newRecord)
 
 babySegmentHeaders = ['group', 'groupPct', 'count', 'avgPurchasePrice', 'maxPurchasePrice', 'minPurchasePrice', 'pctEmployed', 'avgAge', 'avgAnnualIncome']
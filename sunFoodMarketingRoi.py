@@ -1,4 +1,6 @@
 from dataAnalysis.sunFoodCustomerSegmentation import getBabySegmentData, getSunFoodFileImporter, originalCustomerDataFileName
+from importer import *
+from importer.cohortSimulation import getPerturbedScenarios, getRoiDistribution, simulateCohorts, simulateScenarios
 
 # 6 month advertising campaign
 # 12 months purchasing baby items
@@ -11,6 +13,13 @@ BABY_CUSTOMER_ACQUISITION_RATES = [0.4, 0.5, 0.5, 0.6, 0.8, 0.8, 0.5]
 BABY_CUSTOMER_ATTRITION_RATES = [0, 0.08, 0.08, 0.08, 0.04, 0.04, 0.04, 0.04, 0.02, 0.02, 0.02, 0.02]
 BABY_CUSTOMER_SPEND_MONTHS = 12
 BABY_CUSTOMER_AD_COST = 10000
+# Monte Carlo variations of the campaign used to get a range of ROI instead of a single estimate
+ROI_SIMULATION_COUNT = 10000
+ROI_SIMULATION_RATE_VARIATION = 0.15
+ROI_SIMULATION_SPEND_VARIATION = 0.1
+ROI_SIMULATION_SEED = 2021
+# The only customer columns used by the ROI analysis
+ROI_CUSTOMER_COLUMNS = ['customerKey', 'hasNewBaby', 'avgPurchaseAmount']
 
 """
 Marketing campaign example customer revenue
@@ -29,44 +38,38 @@ Update this function to return a tuple with (customers, customerSpend)
 Hint: Make use of most of the code from lines 34-37
 """
 def getCustomersAndSpend(fileName, rowFilterFn):
-    fileImporter = getSunFoodFileImporter(fileName, rowFilterFn=rowFilterFn)
+    # The filter only needs hasNewBaby so it runs before the rest of each row is converted
+    fileImporter = getSunFoodFileImporter(fileName, columns=ROI_CUSTOMER_COLUMNS, readFilterColumns=['hasNewBaby'],
+                                          readFilterFn=rowFilterFn)
     customersWithBaby = fileImporter.data
     customerSpend = sum([customer['avgPurchaseAmount'] for customer in customersWithBaby])
     return customersWithBaby, customerSpend, fileImporter
 
-prePromoBabyCustomers, prePromoTotalSpend, fileImporter = getCustomersAndSpend(originalCustomerDataFileName, lambda row: bool(row['hasNewBaby']))
-prePromoCustomerKeys = [customer['customerKey'] for customer in prePromoBabyCustomers]
+def hasNewBaby(row):
+    return bool(row['hasNewBaby'])
+
+prePromoBabyCustomers, prePromoTotalSpend, fileImporter = getCustomersAndSpend(originalCustomerDataFileName, hasNewBaby)
 
 """
-Update this function to return True if a customer has a new baby and
-the customerKey is not in the pre promo customer keys (meaning this is a new customer)
+New promo customers have a new baby and a customerKey which is not in the pre promo customers.
+An anti join keeps only the April baby customers with no matching pre promo customerKey.
 """
-def isNewPromoCustomer(row):
-    return row['hasNewBaby'] and row['customerKey'] not in prePromoCustomerKeys
-
-aprilBabyCustomers, aprilTotalSpend, _ = getCustomersAndSpend('SunFoodShop_MarketingPromo_2021_Apr.csv', isNewPromoCustomer)
+_, _, aprilFileImporter = getCustomersAndSpend('SunFoodShop_MarketingPromo_2021_Apr.csv', hasNewBaby)
+aprilBabyCustomers = aprilFileImporter.getJoinData(prePromoBabyCustomers, 'customerKey', joinType=JOIN_ANTI)
+aprilTotalSpend = sum([customer['avgPurchaseAmount'] for customer in aprilBabyCustomers])
+
+def getBabyScenario(baseCustomerCount, expectedMonthlySpend):
+    return {
+        'acquisitionRates': BABY_CUSTOMER_ACQUISITION_RATES,
+        'attritionRates': BABY_CUSTOMER_ATTRITION_RATES[:BABY_CUSTOMER_SPEND_MONTHS],
+        'baseCustomerCount': baseCustomerCount,
+        'monthlySpend': expectedMonthlySpend,
+        'adCost': BABY_CUSTOMER_AD_COST
+    }
 
 def getMarketingStats(baseCustomerCount, expectedMonthlySpend):
-    totalMonthlyRevenue = []
-    totalMonthlyCustomers = []
-    for monthOffset, customerAcquisitionRate in enumerate(BABY_CUSTOMER_ACQUISITION_RATES):
-        newCustomers = round(baseCustomerCount * customerAcquisitionRate)
-        for month in range(12):
-            currentMonth = monthOffset + month
-            monthlyRevenue = newCustomers * expectedMonthlySpend
-            try:
-                totalMonthlyRevenue[currentMonth] += monthlyRevenue
-            except IndexError:
-                totalMonthlyRevenue.append(monthlyRevenue)
-
-            attritionRate = BABY_CUSTOMER_ATTRITION_RATES[month]
-            newCustomers = round(newCustomers * (1 - attritionRate))
-            try:
-                totalMonthlyCustomers[currentMonth] += newCustomers
-            except IndexError:
-                totalMonthlyCustomers.append(newCustomers)
-
-    return totalMonthlyRevenue, totalMonthlyCustomers
+    results = simulateCohorts([getBabyScenario(baseCustomerCount, expectedMonthlySpend)])
+    return results['monthlyRevenue'][0], results['monthlyCustomers'][0]
 
 totalMonthlyBabyRev, totalMonthlyBabyCustomers = getMarketingStats(len(prePromoBabyCustomers), prePromoTotalSpend / len(prePromoBabyCustomers))
 roiHeaders = ['metric'] + [f'Month {idx + 1}' for idx in range(len(totalMonthlyBabyRev))] + ['Total']
@@ -81,6 +84,16 @@ expectedTotalRev = sum(totalMonthlyBabyRev)
 nominalRoi = expectedTotalRev - BABY_CUSTOMER_AD_COST
 roiData.append([BABY_CUSTOMER_AD_COST, expectedTotalRev, nominalRoi, (nominalRoi / BABY_CUSTOMER_AD_COST) * 100])
 
+babyScenario = getBabyScenario(len(prePromoBabyCustomers), prePromoTotalSpend / len(prePromoBabyCustomers))
+simulatedScenarios = getPerturbedScenarios(babyScenario, ROI_SIMULATION_COUNT, ROI_SIMULATION_RATE_VARIATION,
+                                           ROI_SIMULATION_SPEND_VARIATION, seed=ROI_SIMULATION_SEED)
+roiDistribution = getRoiDistribution(simulateScenarios(simulatedScenarios))
+roiDistributionHeaders = ['metric', 'mean'] + [f'P{percentile}' for percentile in ROI_PERCENTILES]
+roiDistributionData = [
+    [metricName, roiDistribution[metric]['mean']] + [roiDistribution[metric][percentile] for percentile in ROI_PERCENTILES]
+    for metricName, metric in (('Roi (nominal)', 'nominalRoi'), ('Roi (pct)', 'roiPct'))
+]
+
 actualVsExpectedHeaders = ['metric', 'actual', 'expected', 'diff']
 actualVsExpectedData = []
 """
@@ -93,6 +106,7 @@ actualVsExpectedData.append(['revenue', aprilTotalSpend, totalMonthlyBabyRev[3],
 
 sheetsConfig = [
     {'data': roiData, 'headers': roiHeaders, 'title': 'marketingBabyRoi'},
+    {'data': roiDistributionData, 'headers': roiDistributionHeaders, 'title': 'marketingBabyRoiRange'},
     {'data': actualVsExpectedData, 'headers': actualVsExpectedHeaders, 'title': 'month4ActualVsExpected'}
 ]
 fileImporter.writeExcelFile('sunFoodMarketingRoiActual', sheetsConfig=sheetsConfig)
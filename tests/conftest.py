@@ -0,0 +1,32 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+# The repository is the importer package itself, so register it under that name no matter what the checkout is called
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if 'importer' not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        'importer', os.path.join(PACKAGE_DIR, '__init__.py'), submodule_search_locations=[PACKAGE_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['importer'] = module
+    spec.loader.exec_module(module)
+
+
+@pytest.fixture
+def getDataFilePath():
+    """ Get the path of a sample data file in the repository """
+    return lambda fileName: os.path.join(PACKAGE_DIR, fileName)
+
+
+@pytest.fixture
+def writeCsv(tmp_path):
+    """ Write text to a CSV file in a temporary directory and return its path """
+    def writeCsvFile(text, fileName='data.csv'):
+        filePath = tmp_path / fileName
+        filePath.write_text(text)
+        return str(filePath)
+
+    return writeCsvFile
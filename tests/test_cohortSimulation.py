@@ -0,0 +1,65 @@
+from importer.cohortSimulation import (
+    getPerturbedScenarios, getRoiDistribution, getScenarioGrid, simulateCohorts, simulateScenarios
+)
+
+ACQUISITION_RATES = [0.4, 0.5, 0.5, 0.6, 0.8, 0.8, 0.5]
+ATTRITION_RATES = [0, 0.08, 0.08, 0.08, 0.04, 0.04, 0.04, 0.04, 0.02, 0.02, 0.02, 0.02]
+BASE_SCENARIO = {
+    'acquisitionRates': ACQUISITION_RATES, 'attritionRates': ATTRITION_RATES, 'baseCustomerCount': 1213,
+    'monthlySpend': 45.37, 'adCost': 10000
+}
+
+
+def getMarketingStats(baseCustomerCount, expectedMonthlySpend, acquisitionRates, attritionRates):
+    """ The month by month loop which sunFoodMarketingRoi used before simulateCohorts """
+    totalMonthlyRevenue = []
+    totalMonthlyCustomers = []
+    for monthOffset, customerAcquisitionRate in enumerate(acquisitionRates):
+        newCustomers = round(baseCustomerCount * customerAcquisitionRate)
+        for month in range(len(attritionRates)):
+            currentMonth = monthOffset + month
+            monthlyRevenue = newCustomers * expectedMonthlySpend
+            try:
+                totalMonthlyRevenue[currentMonth] += monthlyRevenue
+            except IndexError:
+                totalMonthlyRevenue.append(monthlyRevenue)
+
+            newCustomers = round(newCustomers * (1 - attritionRates[month]))
+            try:
+                totalMonthlyCustomers[currentMonth] += newCustomers
+            except IndexError:
+                totalMonthlyCustomers.append(newCustomers)
+
+    return totalMonthlyRevenue, totalMonthlyCustomers
+
+
+def testSimulationMatchesTheMonthlyLoop():
+    scenarios = getPerturbedScenarios(BASE_SCENARIO, 50, seed=1)
+    # A scenario with a different number of months is simulated in its own batch
+    scenarios.append(dict(BASE_SCENARIO, acquisitionRates=[0.3, 0.2], attritionRates=[0.1, 0.5, 0.9]))
+    results = simulateCohorts(scenarios)
+    for scenarioIdx, scenario in enumerate(scenarios):
+        monthlyRevenue, monthlyCustomers = getMarketingStats(
+            scenario['baseCustomerCount'], scenario['monthlySpend'], scenario['acquisitionRates'],
+            scenario['attritionRates']
+        )
+        assert results['monthlyRevenue'][scenarioIdx] == monthlyRevenue
+        assert results['monthlyCustomers'][scenarioIdx] == monthlyCustomers
+        assert results['totalRevenue'][scenarioIdx] == sum(monthlyRevenue)
+        nominalRoi = sum(monthlyRevenue) - scenario['adCost']
+        assert results['nominalRoi'][scenarioIdx] == nominalRoi
+        assert results['roiPct'][scenarioIdx] == (nominalRoi / scenario['adCost']) * 100
+
+
+def testScenarioSweepsAndChunks():
+    scenarios = getScenarioGrid(BASE_SCENARIO, {'monthlySpend': [40, 50], 'adCost': [5000, 10000, 15000]})
+    assert [(scenario['monthlySpend'], scenario['adCost']) for scenario in scenarios] == [
+        (40, 5000), (40, 10000), (40, 15000), (50, 5000), (50, 10000), (50, 15000)
+    ]
+    assert simulateScenarios(scenarios, workers=2, chunkSize=4) == simulateCohorts(scenarios)
+
+    distribution = getRoiDistribution(simulateCohorts(scenarios), percentiles=(0, 50, 100))
+    nominalRois = sorted(simulateCohorts(scenarios)['nominalRoi'])
+    assert distribution['nominalRoi'][0] == nominalRois[0]
+    assert distribution['nominalRoi'][100] == nominalRois[-1]
+    assert distribution['nominalRoi'][50] == (nominalRois[2] + nominalRois[3]) / 2
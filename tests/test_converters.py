@@ -0,0 +1,59 @@
+import pytest
+
+from importer import *
+from importer.fileImport import FileImporter
+
+CSV_TEXT = 'a,b,c\n1,x,2\n3,y\n\n'
+
+
+def testColumnsWithShortRows(writeCsv):
+    fileImporter = FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'a': int, 'c': int}, columns=['c', 'a'])
+    assert fileImporter.data == [{'c': 2, 'a': 1}, {'c': None, 'a': 3}, {'c': None, 'a': None}]
+
+
+def testReadFilterWithShortRows(writeCsv):
+    fileImporter = FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'a': int, 'c': int},
+                                readFilterColumns=['c'], readFilterFn=lambda row: row['c'] is None)
+    assert fileImporter.data == [{'a': 3, 'b': 'y', 'c': None}, {'a': None, 'b': None, 'c': None}]
+
+    fileImporter = FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'a': int, 'c': int}, rowDataType=ROW_TYPE_LIST,
+                                readFilterColumns=['a'], readFilterFn=lambda row: row['a'] is not None)
+    assert fileImporter.data == [[1, 'x', 2], [3, 'y', None]]
+
+
+def testReadFilterRequiresColumns(writeCsv):
+    with pytest.raises(ValueError):
+        FileImporter(writeCsv(CSV_TEXT), readFilterFn=lambda row: row['c'] is None)
+
+
+def getBaselineRow(headers, row, defaultDataTypes, noneStrings, rowDataType):
+    """ The value by value conversion which FileImporter.processRow did before the converter plan """
+    processedRow = []
+    for header, val in zip(headers, row):
+        defaultDataType = defaultDataTypes.get(header)
+        if isinstance(val, str):
+            val = val.strip()
+            if val.lower() in noneStrings:
+                val = None
+        if val is not None and defaultDataType:
+            val = defaultDataType(val)
+        processedRow.append(val)
+    if rowDataType == ROW_TYPE_LIST:
+        return processedRow
+    if rowDataType == ROW_TYPE_DICT:
+        return dict(zip(headers, processedRow))
+    return tuple(processedRow)
+
+
+@pytest.mark.parametrize('rowDataType', [ROW_TYPE_DICT, ROW_TYPE_LIST, ROW_TYPE_TUPLE])
+def testConverterPlanMatchesValueByValueConversion(writeCsv, rowDataType):
+    csvText = 'id,amount,name,score\n1, 2.5 ,Ann,NULL\n2,N/A, Bob ,7\n3,missing,,  na \n'
+    defaultDataTypes = {'id': int, 'amount': float, 'score': int}
+    noneStrings = ('Null', 'n/a', 'MISSING', 'na')
+    fileImporter = FileImporter(writeCsv(csvText), defaultDataTypes=defaultDataTypes, rowDataType=rowDataType,
+                                noneStrings=noneStrings)
+    rows = [line.split(',') for line in csvText.splitlines()[1:]]
+    lowerNoneStrings = {noneString.lower() for noneString in noneStrings}
+    assert fileImporter.data == [
+        getBaselineRow(fileImporter.headers, row, defaultDataTypes, lowerNoneStrings, rowDataType) for row in rows
+    ]
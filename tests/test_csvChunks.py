@@ -0,0 +1,76 @@
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from importer import *
+from importer import fileImport
+from importer.csvChunks import getCsvChunkOffsets
+from importer.fileImport import FileImporter
+
+HEADERS = ['id', 'note', 'amount']
+
+
+def getCsvText(rowCount):
+    lines = [','.join(HEADERS)]
+    for idx in range(rowCount):
+        # Quoted fields with newlines and escaped quotes make some lines end inside of a record
+        note = f'"line one\nline ""two"" {idx}\n"' if idx % 3 == 0 else f'note {idx}'
+        lines.append(f'{idx},{note},{idx * 1.5}')
+    return '\n'.join(lines) + '\n'
+
+
+def getChunkRows(filePath, chunkSize):
+    rows = []
+    with open(filePath, 'rb') as csvFile:
+        for start, end in getCsvChunkOffsets(filePath, chunkSize):
+            csvFile.seek(start)
+            rows.extend(csv.reader(io.TextIOWrapper(io.BytesIO(csvFile.read(end - start)))))
+    return rows
+
+
+def testChunksMatchASerialRead(writeCsv):
+    filePath = writeCsv(getCsvText(200))
+    with open(filePath) as csvFile:
+        serialRows = list(csv.reader(csvFile))[1:]
+    for chunkSize in (1, 7, 64, 1000, 100000):
+        offsets = getCsvChunkOffsets(filePath, chunkSize)
+        assert all(end > start for start, end in offsets)
+        assert getChunkRows(filePath, chunkSize) == serialRows
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """ Runs chunks in threads and records the most chunks which were submitted but not read yet """
+    maxPendingCount = 0
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.pendingCount = 0
+
+    def submit(self, fn, *args):
+        self.pendingCount += 1
+        CountingExecutor.maxPendingCount = max(CountingExecutor.maxPendingCount, self.pendingCount)
+        future = super().submit(fn, *args)
+        return CountingFuture(self, future)
+
+
+class CountingFuture:
+
+    def __init__(self, executor, future):
+        self.executor = executor
+        self.future = future
+
+    def result(self):
+        self.executor.pendingCount -= 1
+        return self.future.result()
+
+
+def testParallelImportMatchesASerialImport(writeCsv, monkeypatch):
+    monkeypatch.setattr(fileImport, 'PARALLEL_CSV_CHUNK_SIZE', 50)
+    monkeypatch.setattr(fileImport, 'ProcessPoolExecutor', CountingExecutor)
+    filePath = writeCsv(getCsvText(200))
+    dataTypes = {'id': int, 'amount': float}
+    serialData = FileImporter(filePath, defaultDataTypes=dataTypes).data
+    parallelData = FileImporter(filePath, defaultDataTypes=dataTypes, workers=2).data
+    assert parallelData == serialData
+    assert len(getCsvChunkOffsets(filePath, 50)) > 10
+    assert CountingExecutor.maxPendingCount <= 2 * PARALLEL_CSV_CHUNKS_PER_WORKER
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from importer import *
+from importer.dataIndex import HashIndex, SortedIndex
+from importer.fileImport import FileImporter
+
+
+def getCsvText(rowCount):
+    rand = random.Random(7)
+    lines = ['machineId,hours,note']
+    for _ in range(rowCount):
+        hours = 'null' if rand.random() < 0.1 else str(rand.randint(0, 50))
+        lines.append(f'{rand.randint(1, 5)},{hours},n{rand.randint(1, 3)}')
+    return '\n'.join(lines) + '\n'
+
+
+def testIndexesMatchALinearScan():
+    values = [3, None, 1, 3, 2, None, 5, 1]
+    hashIndex = HashIndex(values)
+    sortedIndex = SortedIndex(values)
+    for val in (1, 3, 4, None):
+        assert list(hashIndex.getRowIndexes(val)) == [rowIdx for rowIdx, value in enumerate(values) if value == val]
+    assert sorted(sortedIndex.getRowIndexes(2, 3)) == [0, 3, 4]
+    assert sorted(sortedIndex.getRowIndexes(None, 1)) == [2, 7]
+    assert sorted(sortedIndex.getRowIndexes(3, None)) == [0, 3, 6]
+    assert sorted(sortedIndex.getRowIndexes(2, 3, isLowInclusive=False, isHighInclusive=False)) == []
+
+
+@pytest.mark.parametrize('rowDataType', [ROW_TYPE_DICT, ROW_TYPE_LIST, ROW_TYPE_COLUMNAR])
+def testQueryMatchesALinearScan(writeCsv, rowDataType):
+    dataTypes = {'machineId': int, 'hours': int}
+    fileImporter = FileImporter(writeCsv(getCsvText(300)), defaultDataTypes=dataTypes, rowDataType=rowDataType,
+                                indexes={'machineId': INDEX_TYPE_HASH})
+    records = list(FileImporter(writeCsv(getCsvText(300)), defaultDataTypes=dataTypes).data)
+    getRecord = (lambda record: dict(zip(fileImporter.headers, record))) if rowDataType == ROW_TYPE_LIST else dict
+
+    conditions = [
+        ({'machineId': 2}, None, lambda record: record['machineId'] == 2),
+        (None, {'hours': (10, 20)}, lambda record: record['hours'] is not None and 10 <= record['hours'] <= 20),
+        ({'machineId': 4, 'note': 'n1'}, {'hours': (None, 25)},
+         lambda record: record['machineId'] == 4 and record['note'] == 'n1' and record['hours'] is not None
+         and record['hours'] <= 25),
+        ({'machineId': 9}, None, lambda record: False)
+    ]
+    for equals, ranges, isMatch in conditions:
+        queriedRecords = [getRecord(record) for record in fileImporter.query(equals=equals, ranges=ranges)]
+        assert queriedRecords == [record for record in records if isMatch(record)]
+
+
+def testStreamingImportsCannotBeQueried(writeCsv):
+    filePath = writeCsv(getCsvText(10))
+    fileImporter = FileImporter(filePath, isStreaming=True)
+    with pytest.raises(ValueError):
+        fileImporter.query(equals={'machineId': '1'})
+    with pytest.raises(ValueError):
+        FileImporter(filePath, isStreaming=True, indexes={'machineId': INDEX_TYPE_HASH})
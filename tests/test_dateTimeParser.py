@@ -0,0 +1,19 @@
+from importer import *
+from importer.benchmarks.suite import BenchmarkRunner
+from importer.dateTimeParser import DateTimeParser
+
+VALUES = ['2020-12-22 21:00:40.958762', '2020-12-23 01:02:03.000001', '12/24/2020', 'December 25, 2020'] * 10
+
+
+def testDateTimeParserMatchesSafeDateTimeParse():
+    parser = DateTimeParser(sampleSize=4)
+    assert [parser(val) for val in VALUES] == [safeDateTimeParse(val) for val in VALUES]
+
+
+def testDateTimeParseBenchmark(tmp_path):
+    runner = BenchmarkRunner(str(tmp_path), repeat=1)
+    runner.runDateTimeParse('machineBreakdown', 100)
+    assert [result['params']['parser'] for result in runner.results] == ['safeDateTimeParse', 'DateTimeParser']
+    # Datasets without safeDateTimeParse columns have nothing to time
+    runner.runDateTimeParse('sunFoodCustomers', 100)
+    assert len(runner.results) == 2
@@ -0,0 +1,123 @@
+import random
+from datetime import datetime, timedelta
+
+from importer import *
+from importer.eventSessions import EventSessionizer
+from importer.fileImport import FileImporter
+
+EVENT_KEYS = {
+    'Machine broke': 'brokeDateTime',
+    'Mechanic started repairing machine': 'mechanicRepairingDateTime',
+    'Machine is fixed': 'fixedDateTime'
+}
+START_TIME = datetime(2020, 12, 16)
+
+
+def getBaselineEventRecords(events):
+    """ The pairing which machineBreakdownAnalysis did before it used EventSessionizer """
+    filteredEvents = [record for record in events if record['eventDescription']]
+    filteredEvents.sort(key=lambda record: record['eventDateTime'])
+    eventRecordsByMachine = {}
+    for record in filteredEvents:
+        machineId = record['machineId']
+        eventKey = EVENT_KEYS[record['eventDescription']]
+        newEventRecord = {
+            'machineId': machineId, 'machineType': record['machineType'], eventKey: record['eventDateTime']
+        }
+        if machineId not in eventRecordsByMachine:
+            eventRecordsByMachine[machineId] = [newEventRecord]
+        elif eventKey in eventRecordsByMachine[machineId][-1]:
+            eventRecordsByMachine[machineId].append(newEventRecord)
+        else:
+            eventRecordsByMachine[machineId][-1][eventKey] = record['eventDateTime']
+
+    eventRecords = []
+    for records in eventRecordsByMachine.values():
+        for record in records:
+            eventTimes = [record.get(eventKey) for eventKey in EVENT_KEYS.values()]
+            if None not in eventTimes and eventTimes == sorted(eventTimes):
+                eventRecords.append(record)
+    return eventRecords
+
+
+def getSessionizer(reorderWindow=None):
+    return EventSessionizer('machineId', 'eventDateTime', 'eventDescription', EVENT_KEYS,
+                            sessionColumns=['machineType'], reorderWindow=reorderWindow)
+
+
+def getEvent(machineId, eventDescription, minutes):
+    return {'machineId': machineId, 'machineType': 'Paint machine', 'eventDescription': eventDescription,
+            'eventDateTime': START_TIME + timedelta(minutes=minutes)}
+
+
+def getSortKey(record):
+    return record['machineId'], record['brokeDateTime']
+
+
+def testSortedSessionsMatchTheBaseline(getDataFilePath):
+    events = FileImporter(getDataFilePath('MachineBreakdownData_20201216_20201229.csv'),
+                          defaultDataTypes={'machineId': int, 'eventDateTime': safeDateTimeParse}).data
+    baselineRecords = getBaselineEventRecords(events)
+    assert baselineRecords
+
+    # Sorting every event first (as machineBreakdownAnalysis does) makes the file order not matter
+    shuffledEvents = list(events)
+    random.Random(3).shuffle(shuffledEvents)
+    for inputEvents in (events, shuffledEvents):
+        filteredEvents = [record for record in inputEvents if record['eventDescription']]
+        filteredEvents.sort(key=lambda record: record['eventDateTime'])
+        sessionizer = getSessionizer()
+        sessions = list(sessionizer.iterSessions(filteredEvents))
+        assert sorted(sessions, key=getSortKey) == sorted(baselineRecords, key=getSortKey)
+        assert all(
+            quarantinedRecord['reason'] in (QUARANTINE_MISSING_EVENTS, QUARANTINE_OUT_OF_ORDER)
+            for quarantinedRecord in sessionizer.quarantinedRecords
+        )
+
+
+def testSessionsAndQuarantine():
+    events = [
+        getEvent(1, 'Machine broke', 0),
+        getEvent(2, 'Machine broke', 5),
+        getEvent(1, 'Mechanic started repairing machine', 10),
+        getEvent(1, 'Machine is fixed', 20),
+        # Starts a new session before machine 2 is repaired
+        getEvent(2, 'Machine broke', 30),
+        getEvent(2, 'Mechanic started repairing machine', 40),
+        # Earlier than the last event of machine 2
+        getEvent(2, 'Machine is fixed', 35),
+        getEvent(1, 'Unknown event', 50)
+    ]
+    sessionizer = getSessionizer()
+    sessions = list(sessionizer.iterSessions(events))
+    assert sessions == [{
+        'machineId': 1, 'machineType': 'Paint machine', 'brokeDateTime': START_TIME,
+        'mechanicRepairingDateTime': START_TIME + timedelta(minutes=10),
+        'fixedDateTime': START_TIME + timedelta(minutes=20)
+    }]
+    assert [quarantinedRecord['reason'] for quarantinedRecord in sessionizer.quarantinedRecords] == [
+        QUARANTINE_MISSING_EVENTS, QUARANTINE_LATE_EVENT, QUARANTINE_UNKNOWN_EVENT, QUARANTINE_MISSING_EVENTS
+    ]
+
+
+def testReorderWindow():
+    events = [
+        getEvent(1, 'Machine broke', 0),
+        getEvent(1, 'Machine is fixed', 20),
+        getEvent(1, 'Mechanic started repairing machine', 10),
+        getEvent(1, 'Machine broke', 100),
+        # Earlier than events which have already left the window
+        getEvent(1, 'Mechanic started repairing machine', 15)
+    ]
+    sessionizer = getSessionizer(reorderWindow=timedelta(minutes=15))
+    sessions = list(sessionizer.iterSessions(events))
+    assert [session['mechanicRepairingDateTime'] for session in sessions] == [START_TIME + timedelta(minutes=10)]
+    assert [quarantinedRecord['reason'] for quarantinedRecord in sessionizer.quarantinedRecords] == [
+        QUARANTINE_LATE_EVENT, QUARANTINE_MISSING_EVENTS
+    ]
+
+    sessionizer = getSessionizer()
+    assert list(sessionizer.iterSessions(events[:3])) == []
+    assert [quarantinedRecord['reason'] for quarantinedRecord in sessionizer.quarantinedRecords] == [
+        QUARANTINE_LATE_EVENT, QUARANTINE_MISSING_EVENTS
+    ]
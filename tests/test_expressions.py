@@ -0,0 +1,19 @@
+from importer import *
+from importer.expressions import column
+from importer.fileImport import FileImporter
+
+CSV_TEXT = 'a,b\n1,2\n3\n\n'
+
+
+def testDerivedColumnsWithShortRows(writeCsv):
+    fileImporter = FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'a': int, 'b': int},
+                                derivedColumns={'a2': column('a') * 2, 'total': column('a') + column('b')})
+    assert fileImporter.data == [
+        {'a': 1, 'b': 2, 'a2': 2, 'total': 3},
+        {'a': 3, 'b': None, 'a2': 6, 'total': None},
+        {'a': None, 'b': None, 'a2': None, 'total': None}
+    ]
+
+    fileImporter = FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'a': int, 'b': int},
+                                derivedColumns={'a2': column('a') * 2}, rowDataType=ROW_TYPE_LIST)
+    assert fileImporter.data == [[1, 2, 2], [3, None, 6], [None, None, None]]
@@ -0,0 +1,167 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from openpyxl import load_workbook
+
+from importer import *
+from importer import fileImport
+from importer.fileImport import FileImporter
+from importer.importWatermark import ImportWatermark
+
+CSV_TEXT = 'a,b\n1,x\n2,y\n3,z\n'
+
+
+def testDataStreamIterationsAreIndependent(writeCsv):
+    fileImporter = FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'a': int}, isStreaming=True)
+    firstRows = iter(fileImporter.data)
+    secondRows = iter(fileImporter.data)
+    assert next(firstRows)['a'] == 1
+    assert next(secondRows)['a'] == 1
+    assert next(secondRows)['a'] == 2
+    assert next(firstRows)['a'] == 2
+    # Finishing one iteration doesn't close the file of the other
+    assert [row['a'] for row in secondRows] == [3]
+    assert [row['a'] for row in firstRows] == [3]
+    assert [row['a'] for row in fileImporter.data] == [1, 2, 3]
+
+
+def testExcelRowsHaveEveryHeader(getDataFilePath):
+    # The workbook doesn't store its size, so read-only rows would leave out trailing empty cells
+    fileImporter = FileImporter(getDataFilePath('BiodieselDataChallenge.xlsx'))
+    assert all(list(row) == list(fileImporter.data[0]) for row in fileImporter.data)
+    assert set(fileImporter.data[18].values()) == {None}
+
+    fileImporter = FileImporter(getDataFilePath('BiodieselDataChallenge.xlsx'), rowDataType=ROW_TYPE_LIST)
+    assert {len(row) for row in fileImporter.data} == {len(fileImporter.fileHeaders)}
+
+
+def testWatermarkSkipsTheCache(writeCsv, tmp_path):
+    filePath = writeCsv(CSV_TEXT)
+    cacheDir = tmp_path / 'cache'
+    watermark = ImportWatermark(str(tmp_path / 'watermark.json'))
+    fileImporter = FileImporter(filePath, defaultDataTypes={'a': int}, cacheDir=str(cacheDir), watermark=watermark)
+    assert [row['a'] for row in fileImporter.data] == [1, 2, 3]
+
+    with open(filePath, 'a') as csvFile:
+        csvFile.write('4,w\n')
+    fileImporter = FileImporter(filePath, defaultDataTypes={'a': int}, cacheDir=str(cacheDir), watermark=watermark)
+    assert [row['a'] for row in fileImporter.data] == [4]
+    assert not cacheDir.exists() or not list(cacheDir.iterdir())
+
+
+def testEmptySheetsOnlyHaveHeaders(writeCsv, tmp_path):
+    fileImporter = FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'a': int})
+    outputPath = os.path.join(str(tmp_path), '')
+    sheetsConfig = [
+        {'data': fileImporter.data, 'headers': fileImporter.headers, 'title': 'data'},
+        {'data': [], 'headers': ['reason', 'a'], 'title': 'quarantine'}
+    ]
+    fileImporter.writeExcelFile('output', sheetsConfig=sheetsConfig, outputPath=outputPath)
+    workbook = load_workbook(os.path.join(outputPath, f'output_{date.today()}.xlsx'))
+    assert len(list(workbook['data'].values)) == 4
+    assert list(workbook['quarantine'].values) == [('reason', 'a')]
+
+    fileImporter.writeCsvFile('output', data=[], headers=['a', 'b'], outputPath=outputPath)
+    with open(os.path.join(outputPath, f'output_{date.today()}.csv')) as csvFile:
+        assert csvFile.read().splitlines() == ['a,b']
+
+
+def testCheckingHeadersKeepsTheFirstFileOpen(writeCsv):
+    filePaths = [writeCsv(CSV_TEXT, 'first.csv'), writeCsv('a,b\n4,w\n', 'second.csv')]
+    fileImporter = FileImporter(filePaths, defaultDataTypes={'a': int}, isStreaming=True)
+    assert fileImporter.filePath == filePaths[0]
+    assert fileImporter.fileType == FILE_TYPE_CSV
+    assert fileImporter.file.name == filePaths[0] and not fileImporter.file.closed
+    assert [row['a'] for row in fileImporter.data] == [1, 2, 3, 4]
+
+
+def testJoinTypes(writeCsv):
+    fileImporter = FileImporter(writeCsv('customerKey,amount\nc1,5\nc2,6\nc3,7\nc1,8\nc4,9\n'))
+    customers = [
+        {'customerKey': 'c1', 'age': 30}, {'customerKey': 'c2', 'age': 40}, {'customerKey': 'c2', 'age': 41}
+    ]
+
+    innerData = fileImporter.getJoinData(customers, 'customerKey')
+    assert [(record['customerKey'], record['amount'], record['age']) for record in innerData] == [
+        ('c1', '5', 30), ('c2', '6', 40), ('c2', '6', 41), ('c1', '8', 30)
+    ]
+    assert fileImporter.unmatchedJoinKeys == {('c3',), ('c4',)}
+    assert fileImporter.unmatchedJoinCount == 2
+
+    leftData = fileImporter.getJoinData(customers, 'customerKey', joinType=JOIN_LEFT)
+    assert [record['age'] for record in leftData] == [30, 40, 41, None, 30, None]
+
+    antiData = fileImporter.getJoinData(customers, 'customerKey', joinType=JOIN_ANTI)
+    assert antiData == [fileImporter.data[2], fileImporter.data[4]]
+
+    fileImporter.getJoinData(customers, 'customerKey', maxUnmatchedKeys=1)
+    assert len(fileImporter.unmatchedJoinKeys) == 1
+    assert fileImporter.unmatchedJoinCount == 2
+
+
+def testWatermarkSkipsImportedFilesAndRowsBeforeConverting(writeCsv, tmp_path, monkeypatch):
+    # Threads instead of processes so the converted values can be counted
+    monkeypatch.setattr(fileImport, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    convertedValues = []
+
+    def convertInt(val):
+        convertedValues.append(val)
+        return int(val)
+
+    filePaths = [writeCsv(CSV_TEXT, 'first.csv'), writeCsv('a,b\n4,w\n', 'second.csv')]
+    for workers in (None, 2):
+        for importPaths in (filePaths, filePaths[:1]):
+            watermark = ImportWatermark(str(tmp_path / f'watermark_{workers}_{len(importPaths)}.json'))
+            fileImporter = FileImporter(importPaths, defaultDataTypes={'a': convertInt}, watermark=watermark,
+                                        workers=workers)
+            assert len(fileImporter.data) == len(importPaths) + 2
+            watermark.save()
+
+            convertedValues.clear()
+            fileImporter = FileImporter(importPaths, defaultDataTypes={'a': convertInt}, watermark=watermark,
+                                        workers=workers)
+            assert fileImporter.data == []
+            assert convertedValues == []
+
+    with open(filePaths[0], 'a') as csvFile:
+        csvFile.write('5,v\n')
+    for workers in (None, 2):
+        for importPaths in (filePaths, filePaths[:1]):
+            watermark = ImportWatermark(str(tmp_path / f'watermark_{workers}_{len(importPaths)}.json'))
+            convertedValues.clear()
+            fileImporter = FileImporter(importPaths, defaultDataTypes={'a': convertInt}, watermark=watermark,
+                                        workers=workers)
+            assert [row['a'] for row in fileImporter.data] == [5]
+            assert convertedValues == ['5']
+
+
+def testGroupDataMatchesOneScanPerGrouping(writeCsv):
+    csvText = 'sex,age,city\n' + ''.join(
+        f'{"Female" if idx % 3 else "Male"},{20 + idx % 47},{"abc"[idx % 3]}\n' for idx in range(200)
+    )
+    groupings = [('sex',), ('sex', ('age', lambda age: age // 10 * 10)), ('city', 'sex')]
+
+    def isIncluded(record):
+        return (record['age'] if isinstance(record, dict) else record[1]) != 30
+
+    for rowDataType in (ROW_TYPE_DICT, ROW_TYPE_LIST):
+        fileImporter = FileImporter(writeCsv(csvText), defaultDataTypes={'age': int}, rowDataType=rowDataType)
+        dataGroups = fileImporter.getGroupData(groupings, filterFn=isIncluded)
+        groupIndexes = fileImporter.getGroupIndexes(groupings, filterFn=isIncluded)
+        for grouping in groupings:
+            expectedGroups = {}
+            for record in fileImporter.data:
+                if not isIncluded(record):
+                    continue
+                recordDict = record if isinstance(record, dict) else dict(zip(fileImporter.headers, record))
+                groupKey = tuple(
+                    column[1](recordDict[column[0]]) if isinstance(column, tuple) else recordDict[column]
+                    for column in grouping
+                )
+                expectedGroups.setdefault(groupKey, []).append(record)
+            groupColumnKey = fileImporter.getGroupColumnKey(grouping)
+            assert dataGroups[groupColumnKey] == expectedGroups
+            groupIndex = groupIndexes[groupColumnKey]
+            for groupKey, records in expectedGroups.items():
+                assert [fileImporter.data[rowIdx] for rowIdx in groupIndex.getRowIndexes(groupKey)] == records
@@ -0,0 +1,81 @@
+import random
+from statistics import fmean, stdev
+
+import pytest
+
+from importer import *
+from importer.groupIndex import GroupIndex
+from importer.groupStatistics import GroupStatistics, GroupedStatistics, loadGroupedStatistics
+
+DATA = [
+    {'sex': 'Female', 'age': 30},
+    {'sex': 'Male', 'age': 40},
+    {'sex': 'Female', 'age': 50}
+]
+
+
+def testEmptyGroupIndexHasNoGroups():
+    groupedStatistics = GroupedStatistics(DATA, groupIndex=GroupIndex({}))
+    assert groupedStatistics.calculatedStatistics == {}
+
+
+def testGroupIndexMatchesGrouping():
+    groupIndex = GroupIndex({('Female',): [0, 2], ('Male',): [1]})
+    indexedStatistics = GroupedStatistics(DATA, groupIndex=groupIndex)
+    groupedStatistics = GroupedStatistics(DATA, grouping=('sex',))
+    assert indexedStatistics.calculatedStatistics == groupedStatistics.calculatedStatistics
+
+
+def testSavedStatisticsKeepTheirStatistics(tmp_path):
+    data = [dict(record, customerKey=f'c{idx}') for idx, record in enumerate(DATA)]
+    statistics = {'age': [GroupStatistics.SUM, GroupStatistics.COUNT_UNIQUE]}
+    groupedStatistics = GroupedStatistics(data[:2], grouping=('sex',), statistics=statistics,
+                                          uniqueModes={'age': UNIQUE_MODE_APPROXIMATE})
+    statePath = str(tmp_path / 'state.pkl')
+    groupedStatistics.saveState(statePath)
+
+    loadedStatistics = loadGroupedStatistics(statePath, grouping=('sex',))
+    assert loadedStatistics.calculatedStatistics == groupedStatistics.calculatedStatistics
+    loadedStatistics.addData(data[2:])
+    expectedStatistics = GroupedStatistics(data, grouping=('sex',), statistics=statistics,
+                                           uniqueModes={'age': UNIQUE_MODE_APPROXIMATE})
+    for groupKey, columnStatistics in expectedStatistics.calculatedStatistics.items():
+        assert set(loadedStatistics.calculatedStatistics[groupKey]) == {'age'}
+        assert loadedStatistics.calculatedStatistics[groupKey]['age']['sum'] == columnStatistics['age']['sum']
+
+
+def testDistinctCountIsOnlyCalculatedWhenRequested():
+    groupStatistics = GroupStatistics(DATA)
+    groupedStatistics = GroupedStatistics(DATA, grouping=('sex',))
+    assert GroupStatistics.DISTINCT_COUNT not in groupStatistics.calculatedStatistics['age']
+    assert GroupStatistics.DISTINCT_COUNT not in groupedStatistics.calculatedStatistics[('Female',)]['age']
+    assert set(groupedStatistics.calculatedStatistics[('Female',)]['age']) == set(GroupStatistics.DEFAULT_STATISTICS)
+
+    statistics = {'age': [GroupStatistics.DISTINCT_COUNT]}
+    assert GroupStatistics(DATA, statistics=statistics).calculatedStatistics['age']['distinctCount'] == 3
+    groupedStatistics = GroupedStatistics(DATA, grouping=('sex',), statistics=statistics)
+    assert groupedStatistics.calculatedStatistics[('Female',)]['age']['distinctCount'] == 2
+
+
+def testMergedStatisticsMatchASinglePass():
+    rand = random.Random(11)
+    data = [
+        {'sex': rand.choice(['Female', 'Male']),
+         'amount': rand.choice([None, rand.uniform(-50, 500), rand.randint(0, 9)])}
+        for _ in range(2000)
+    ]
+    groupedStatistics = GroupedStatistics(data, grouping=('sex',))
+    mergedStatistics = GroupedStatistics(data[:700], grouping=('sex',))
+    mergedStatistics.merge(GroupedStatistics(data[700:1500], grouping=('sex',)))
+    mergedStatistics.addData(data[1500:])
+
+    for groupKey, columnStatistics in groupedStatistics.calculatedStatistics.items():
+        amounts = [record['amount'] for record in data if (record['sex'],) == groupKey and record['amount'] is not None]
+        expected = columnStatistics['amount']
+        merged = mergedStatistics.calculatedStatistics[groupKey]['amount']
+        assert expected['mean'] == pytest.approx(fmean(amounts), rel=1e-12)
+        assert expected['stdDeviation'] == pytest.approx(stdev(amounts), rel=1e-12)
+        assert merged['mean'] == pytest.approx(expected['mean'], rel=1e-12)
+        assert merged['stdDeviation'] == pytest.approx(expected['stdDeviation'], rel=1e-12)
+        for statistic in ('count', 'countNotNull', 'min', 'max', 'countUnique'):
+            assert merged[statistic] == expected[statistic]
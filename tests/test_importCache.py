@@ -0,0 +1,92 @@
+from importer.expressions import FunctionExpression, column
+from importer.fileImport import FileImporter
+from importer.importCache import getDataTypeKey
+
+CSV_TEXT = 'name,age,hasNewBaby\na,20,1\nb,30,0\nc,40,0\n'
+
+
+def getMultiplier(factor):
+    return lambda val: int(val) * factor
+
+
+def testFunctionsWhichOnlyDifferInValuesHaveDifferentKeys():
+    assert getDataTypeKey(lambda val: int(val) * 2) != getDataTypeKey(lambda val: int(val) * 3)
+    assert getDataTypeKey(lambda val: int(val)) != getDataTypeKey(lambda val: float(val))
+    assert getDataTypeKey(getMultiplier(2)) != getDataTypeKey(getMultiplier(3))
+    assert getDataTypeKey(getMultiplier(2)) == getDataTypeKey(getMultiplier(2))
+
+    def getScaled(val, factor=2):
+        return int(val) * factor
+
+    def getOtherScaled(val, factor=3):
+        return int(val) * factor
+
+    getOtherScaled.__qualname__ = getScaled.__qualname__
+    assert getDataTypeKey(getScaled) != getDataTypeKey(getOtherScaled)
+    assert getDataTypeKey(int) == getDataTypeKey(int)
+
+
+def testUnidentifiableFunctionsRaise():
+    class Multiplier:
+        def __call__(self, val):
+            return int(val) * 2
+
+    multiplier = Multiplier()
+    try:
+        getDataTypeKey(multiplier)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Expected a ValueError')
+    try:
+        getDataTypeKey(lambda val: multiplier(val))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Expected a ValueError')
+
+
+def testCachedImportsWithDifferentFunctions(writeCsv, tmp_path):
+    filePath = writeCsv(CSV_TEXT)
+    cacheDir = str(tmp_path / 'cache')
+    dataTypes = {'age': int, 'hasNewBaby': int}
+
+    def getNames(**kwargs):
+        fileImporter = FileImporter(filePath, defaultDataTypes=dataTypes, cacheDir=cacheDir, **kwargs)
+        return [row['name'] for row in fileImporter.data]
+
+    readFilter = {'readFilterColumns': ['hasNewBaby']}
+    assert getNames(readFilterFn=lambda row: row['hasNewBaby'] == 1, **readFilter) == ['a']
+    assert getNames(readFilterFn=lambda row: row['hasNewBaby'] == 0, **readFilter) == ['b', 'c']
+
+    def getAges(dataType):
+        fileImporter = FileImporter(filePath, defaultDataTypes={'age': dataType}, cacheDir=cacheDir)
+        return [row['age'] for row in fileImporter.data]
+
+    assert getAges(lambda val: int(val) * 2) == [40, 60, 80]
+    assert getAges(lambda val: int(val) * 3) == [60, 90, 120]
+
+    def getDerived(factor):
+        derivedColumns = {'scaledAge': FunctionExpression(getMultiplier(factor), column('age'))}
+        fileImporter = FileImporter(filePath, defaultDataTypes=dataTypes, derivedColumns=derivedColumns,
+                                    cacheDir=cacheDir)
+        return [row['scaledAge'] for row in fileImporter.data]
+
+    assert getDerived(2) == [40, 60, 80]
+    assert getDerived(3) == [60, 90, 120]
+
+
+def testUnidentifiableFunctionsSkipTheCache(writeCsv, tmp_path):
+    class Multiplier:
+        def __init__(self, factor):
+            self.factor = factor
+
+        def __call__(self, val):
+            return int(val) * self.factor
+
+    filePath = writeCsv(CSV_TEXT)
+    cacheDir = tmp_path / 'cache'
+    for factor in (2, 3):
+        fileImporter = FileImporter(filePath, defaultDataTypes={'age': Multiplier(factor)}, cacheDir=str(cacheDir))
+        assert [row['age'] for row in fileImporter.data] == [20 * factor, 30 * factor, 40 * factor]
+    assert not list(cacheDir.iterdir())
@@ -0,0 +1,41 @@
+import os
+
+from importer.importWatermark import ImportWatermark
+
+
+def writeFile(filePath, text, modifiedTime):
+    with open(filePath, 'w') as file:
+        file.write(text)
+    os.utime(filePath, ns=(modifiedTime, modifiedTime))
+
+
+def testRowCountOnlyKeptForAppendedFiles(tmp_path):
+    filePath = str(tmp_path / 'data.csv')
+    watermark = ImportWatermark(str(tmp_path / 'watermark.json'))
+    writeFile(filePath, 'a\n1\n2\n', 10 ** 18)
+    assert watermark.getRowCount(filePath) == 0
+    watermark.setRowCount(filePath, 2)
+    watermark.save()
+
+    watermark = ImportWatermark(str(tmp_path / 'watermark.json'))
+    assert watermark.isImported(filePath)
+    assert watermark.getNewFilePaths([filePath]) == []
+    assert watermark.getRowCount(filePath) == 2
+
+    # Appended
+    writeFile(filePath, 'a\n1\n2\n3\n', 2 * 10 ** 18)
+    assert watermark.getNewFilePaths([filePath]) == [filePath]
+    assert watermark.getRowCount(filePath) == 2
+
+    # Rewritten with the same size
+    writeFile(filePath, 'a\n7\n8\n', 3 * 10 ** 18)
+    assert not watermark.isImported(filePath)
+    assert watermark.getRowCount(filePath) == 0
+
+    # Replaced with a larger file which doesn't start with the imported rows
+    writeFile(filePath, 'a\n7\n8\n9\n', 4 * 10 ** 18)
+    assert watermark.getRowCount(filePath) == 0
+
+    # Replaced with a smaller file
+    writeFile(filePath, 'a\n1\n', 5 * 10 ** 18)
+    assert watermark.getRowCount(filePath) == 0
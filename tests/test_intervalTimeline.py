@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from importer import *
+from importer.intervalTimeline import IntervalTimeline
+
+START_TIME = datetime(2020, 12, 16, 10)
+
+
+def getPart(machineId, startMinutes, endMinutes, readyMinutes=None):
+    return {
+        'machineId': machineId, 'machineType': 'Car machine',
+        'startTime': START_TIME + timedelta(minutes=startMinutes),
+        'endTime': START_TIME + timedelta(minutes=endMinutes),
+        'readyTime': START_TIME + timedelta(minutes=readyMinutes) if readyMinutes is not None else None
+    }
+
+
+def getTimeline():
+    parts = [
+        getPart(1, 0, 30),
+        # Starts on machine 1 as the first part ends, after waiting in the queue for 20 minutes
+        getPart(1, 30, 60, readyMinutes=10),
+        # Ready as it starts, so it's never in the queue
+        getPart(2, 15, 45, readyMinutes=15),
+        # Skipped because it doesn't end after it starts
+        getPart(2, 50, 50)
+    ]
+    return IntervalTimeline(parts, 'startTime', 'endTime', ('machineId',),
+                            [('machineId',), ('machineType',)], readyColumn='readyTime')
+
+
+def testCountsAtEqualTimeBoundaries():
+    timeline = getTimeline()
+    machineCounts = timeline.getCountsAt(START_TIME + timedelta(minutes=30))
+    assert machineCounts[(1,)] == {'wip': 1, 'busy': 1, 'queue': 0}
+    assert machineCounts[(2,)] == {'wip': 1, 'busy': 1, 'queue': 0}
+
+    typeCounts = timeline.getCountsAt(START_TIME + timedelta(minutes=20), ('machineType',))
+    assert typeCounts[('Car machine',)] == {'wip': 2, 'busy': 2, 'queue': 1}
+    typeCounts = timeline.getCountsAt(START_TIME + timedelta(minutes=15), ('machineType',))
+    assert typeCounts[('Car machine',)] == {'wip': 2, 'busy': 2, 'queue': 1}
+    typeCounts = timeline.getCountsAt(START_TIME + timedelta(minutes=60), ('machineType',))
+    assert typeCounts[('Car machine',)] == {'wip': 0, 'busy': 0, 'queue': 0}
+    assert timeline.getCountsAt(START_TIME - timedelta(minutes=1))[(1,)] == {'wip': 0, 'busy': 0, 'queue': 0}
+
+
+def testBucketAverages():
+    timeline = getTimeline()
+    buckets = timeline.getBucketStats(TIME_RESOLUTION_HOUR, ('machineType',))[('Car machine',)]
+    assert len(buckets) == 1
+    bucket = buckets[0]
+    assert bucket['bucketStart'] == START_TIME
+    assert bucket['wipAvg'] == pytest.approx(1.5)
+    assert bucket['wipMax'] == 2
+    assert bucket['busyMinutes'] == pytest.approx(90)
+    assert bucket['idleMinutes'] == pytest.approx(30)
+    assert bucket['utilization'] == pytest.approx(0.75)
+    assert bucket['queueAvg'] == pytest.approx(20 / 60)
+    assert bucket['queueMax'] == 1
+
+    buckets = timeline.getBucketStats(timedelta(minutes=15), ('machineId',))[(2,)]
+    assert [bucket['bucketStart'] for bucket in buckets] == [START_TIME + timedelta(minutes=15 * idx) for idx in (1, 2)]
+    assert [bucket['wipAvg'] for bucket in buckets] == pytest.approx([1, 1])
+
+    with pytest.raises(ValueError):
+        timeline.getBucketStats(timedelta(minutes=7))
@@ -0,0 +1,53 @@
+import pytest
+
+from importer.fileImport import FileImporter
+from importer.groupStatistics import GroupStatistics
+from importer.pivotTable import PIVOT_AGGREGATIONS, PivotTable
+
+CSV_TEXT = (
+    'machineType,day,minutes,note\n'
+    'Paint,1,10,a\n'
+    'Paint,1,null,b\n'
+    'Paint,2,5,c\n'
+    'Door,2,7,d\n'
+    'Door,2,3,e\n'
+    'Body,3,1,f\n'
+)
+
+
+def getFileImporter(writeCsv):
+    return FileImporter(writeCsv(CSV_TEXT), defaultDataTypes={'day': int, 'minutes': int})
+
+
+@pytest.mark.parametrize('aggregation', PIVOT_AGGREGATIONS)
+def testCellsMatchGroupStatistics(writeCsv, aggregation):
+    fileImporter = getFileImporter(writeCsv)
+    pivotTable = fileImporter.getPivotTable(('machineType',), ('day',), ['minutes'], aggregation=aggregation)
+    assert pivotTable.rowLabels == ['Body', 'Door', 'Paint']
+    assert pivotTable.columnLabels == [1, 2, 3]
+
+    cellGroups = fileImporter.getGroupData([('machineType', 'day')], isFlat=True)[0]
+    for rowLabel in pivotTable.rowLabels:
+        for columnLabel in pivotTable.columnLabels:
+            group = cellGroups.get((rowLabel, columnLabel))
+            assert pivotTable.hasData(rowLabel, columnLabel) == bool(group)
+            if not group:
+                assert pivotTable.getValue(rowLabel, columnLabel) is None
+                continue
+            statistics = GroupStatistics(group, statistics={'minutes': [aggregation]}).calculatedStatistics['minutes']
+            assert pivotTable.getValue(rowLabel, columnLabel) == statistics[aggregation]
+
+
+def testFixedLabelsAndRows(writeCsv):
+    fileImporter = getFileImporter(writeCsv)
+    pivotTable = fileImporter.getPivotTable(('machineType',), ('day',), ['minutes', 'note'],
+                                            aggregation=GroupStatistics.COUNT_NOT_NULL,
+                                            rowLabels=['Paint', 'Roof', 'Door'], columnLabels=[2, 1], fillValue=0)
+    assert pivotTable.getRows() == [['Paint', 1, 1], ['Roof', 0, 0], ['Door', 2, 0]]
+    assert pivotTable.getRows('note') == [['Paint', 1, 2], ['Roof', 0, 0], ['Door', 2, 0]]
+    assert pivotTable.getHeaders(['machineType']) == ['machineType', 2, 1]
+    assert not pivotTable.hasData('Roof', 2)
+    assert [sheet['title'] for sheet in pivotTable.getSheetsConfig()] == ['minutes', 'note']
+
+    with pytest.raises(ValueError):
+        PivotTable([], lambda record: (None, None, ()), ['minutes'], aggregation=GroupStatistics.PCT_UNIQUE)
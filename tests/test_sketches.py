@@ -0,0 +1,45 @@
+import random
+from collections import Counter
+
+from importer.sketches import HyperLogLog, SpaceSaving
+
+
+def testHyperLogLogErrorIsWithinBounds():
+    # Four standard errors (about 1.6% each for the default precision)
+    for distinctCount in (10, 1000, 50000):
+        hyperLogLog = HyperLogLog()
+        for value in range(distinctCount):
+            hyperLogLog.add(f'customer{value}')
+            # Repeated values don't change the count
+            hyperLogLog.add(f'customer{value}')
+        assert abs(hyperLogLog.getCount() - distinctCount) <= max(distinctCount * 0.065, 1)
+
+
+def testMergedHyperLogLogMatchesOneSketch():
+    firstHalf, secondHalf, allValues = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for value in range(5000):
+        (firstHalf if value % 2 else secondHalf).add(value)
+        allValues.add(value)
+    firstHalf.merge(secondHalf)
+    assert firstHalf.registers == allValues.registers
+
+
+def testSpaceSavingCountsAreWithinBounds():
+    rand = random.Random(5)
+    size = 20
+    # Skewed values so some appear more than n / size times
+    values = [int(rand.paretovariate(1.2)) for _ in range(20000)]
+    spaceSaving = SpaceSaving(size)
+    for value in values:
+        spaceSaving.add(value)
+
+    actualCounts = Counter(values)
+    maxOvercount = len(values) / size
+    topCounts = spaceSaving.getTopCounts()
+    assert len(topCounts) == size
+    assert list(topCounts.values()) == sorted(topCounts.values(), reverse=True)
+    for value, count in topCounts.items():
+        assert actualCounts[value] <= count <= actualCounts[value] + maxOvercount
+    for value, actualCount in actualCounts.items():
+        if actualCount > maxOvercount:
+            assert value in topCounts